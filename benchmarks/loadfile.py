@@ -0,0 +1,132 @@
+# Load-time benchmark for HeFile.loadFile
+#
+# Builds synthetic hetool files containing a single closed polygon with N
+# edges (one bounded face plus the infinite face holding the outer loop) and
+# times how long HeFile.loadFile takes to rebuild the half-edge structure.
+# With ID-indexed lookups the time per edge should stay roughly constant.
+#
+# Usage (from the repository root):
+#     python benchmarks/loadfile.py [N1 N2 ...]
+
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from hetool.hetool import HeFile
+
+
+def polygonModel(_n):
+    vertices = []
+    edges = []
+    outer = []  # half-edges of the bounded face (he1 of every edge)
+    inner = []  # half-edges of the infinite face (he2 of every edge)
+
+    for k in range(_n):
+        angle = 2.0 * math.pi * k / _n
+        vertices.append({
+            'type': 'VERTEX',
+            'ID': k + 1,
+            'prev_ID': k if k > 0 else None,
+            'next_ID': k + 2 if k < _n - 1 else None,
+            'he_ID': 2 * k + 1,
+            'point': (100.0 * math.cos(angle), 100.0 * math.sin(angle)),
+            'attributes': {'att_names': []}
+        })
+
+    for k in range(_n):
+        v1 = vertices[k]['point']
+        v2 = vertices[(k + 1) % _n]['point']
+        edges.append({
+            'type': 'EDGE',
+            'ID': k + 1,
+            'prev_ID': k if k > 0 else None,
+            'next_ID': k + 2 if k < _n - 1 else None,
+            'he1_ID': 2 * k + 1,
+            'he2_ID': 2 * k + 2,
+            'segment_type': 'LINE',
+            'points': [list(v1), list(v2)],
+            'attributes': {'nsudv': None, 'att_names': []}
+        })
+
+        outer.append({
+            'type': 'HALF-EDGE',
+            'ID': 2 * k + 1,
+            'prev_ID': 2 * ((k - 1) % _n) + 1,
+            'next_ID': 2 * ((k + 1) % _n) + 1,
+            'vertex_ID': k + 1,
+            'edge_ID': k + 1,
+            'loop_ID': 3
+        })
+
+    for k in range(_n - 1, -1, -1):
+        inner.append({
+            'type': 'HALF-EDGE',
+            'ID': 2 * k + 2,
+            'prev_ID': 2 * ((k + 1) % _n) + 2,
+            'next_ID': 2 * ((k - 1) % _n) + 2,
+            'vertex_ID': (k + 1) % _n + 1,
+            'edge_ID': k + 1,
+            'loop_ID': 2
+        })
+
+    attributes = {'isDeleted': False, 'mesh': None, 'att_names': []}
+
+    faces = [{
+        'type': 'FACE',
+        'ID': 0,
+        'prev_ID': None,
+        'next_ID': 1,
+        'loop': {'type': 'LOOP', 'ID': 1, 'prev_ID': None, 'next_ID': 2,
+                 'face_ID': 0, 'he_loop': None, 'isClosed': False},
+        'intLoops': [{'type': 'LOOP', 'ID': 2, 'prev_ID': 1, 'next_ID': None,
+                      'face_ID': 0, 'he_loop': inner, 'isClosed': False}],
+        'attributes': attributes
+    }, {
+        'type': 'FACE',
+        'ID': 1,
+        'prev_ID': 0,
+        'next_ID': None,
+        'loop': {'type': 'LOOP', 'ID': 3, 'prev_ID': None, 'next_ID': None,
+                 'face_ID': 1, 'he_loop': outer, 'isClosed': True},
+        'intLoops': [],
+        'attributes': attributes
+    }]
+
+    return {
+        'type': 'SHELL',
+        'vertices': vertices,
+        'edges': edges,
+        'faces': faces,
+        'attributes_list': []
+    }
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]]
+    if not sizes:
+        sizes = [1000, 5000, 10000, 50000, 100000, 500000]
+
+    print('{:>10} {:>12} {:>14}'.format('edges', 'load (s)', 'us / edge'))
+
+    for n in sizes:
+        handle, filename = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(handle, 'w') as file:
+            json.dump(polygonModel(n), file)
+
+        try:
+            start = time.perf_counter()
+            HeFile.loadFile(filename)
+            elapsed = time.perf_counter() - start
+        finally:
+            os.remove(filename)
+
+        print('{:>10} {:>12.3f} {:>14.2f}'.format(n, elapsed, elapsed / n * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# Memory benchmark for the half-edge entities
+#
+# Builds planar N x N grids of square faces with HeController (N + 1
+# horizontal and N + 1 vertical segments crossing each other) and reports
+# the bytes taken by each vertex (Vertex + Point), edge (Edge + two HalfEdges
+# + Line) and face (Face + outer Loop + Patch), counting the objects and their
+# __dict__ if they have one, plus the total memory traced while building the
+# model once its undo history is dropped.
+#
+# Usage (from the repository root):
+#     python benchmarks/memory.py [N1 N2 ...]
+
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from hetool.hetool import HeController, HeModel
+
+
+def footprint(*_objects):
+    size = 0
+    for obj in _objects:
+        size += sys.getsizeof(obj)
+        if hasattr(obj, '__dict__'):
+            size += sys.getsizeof(obj.__dict__)
+
+    return size
+
+
+def gridModel(_n):
+    model = HeModel()
+    controller = HeController(model)
+
+    for k in range(_n + 1):
+        controller.insertSegment([0.0, float(k), float(_n), float(k)], 1e-3)
+    for k in range(_n + 1):
+        controller.insertSegment([float(k), 0.0, float(k), float(_n)], 1e-3)
+
+    controller.undoredo.clear()
+    return model, controller
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]]
+    if not sizes:
+        sizes = [5, 10, 20, 40]
+
+    print('{:>6} {:>9} {:>9} {:>9} {:>12} {:>10} {:>10} {:>10} {:>10}'.format(
+        'N', 'vertices', 'edges', 'faces', 'total (MB)', 'B/vertex',
+        'B/edge', 'B/face', 'build (s)'))
+
+    for n in sizes:
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        model, controller = gridModel(n)
+        elapsed = time.perf_counter() - start
+        gc.collect()
+        total, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        shell = model.shell
+        vertices = list(shell.vertices)
+        edges = list(shell.edges)
+        faces = list(shell.faces)[1:]  # the infinite face has no patch boundary
+
+        vertexBytes = sum(footprint(v, v.point) for v in vertices) / len(vertices)
+        edgeBytes = sum(footprint(e, e.he1, e.he2, e.segment) for e in edges) / len(edges)
+        faceBytes = sum(footprint(f, f.loop, f.patch) for f in faces) / len(faces)
+
+        print('{:>6} {:>9} {:>9} {:>9} {:>12.2f} {:>10.0f} {:>10.0f} {:>10.0f} {:>10.2f}'.format(
+            n, len(vertices), len(edges), len(faces), total / 2 ** 20,
+            vertexBytes, edgeBytes, faceBytes, elapsed))
+
+
+if __name__ == '__main__':
+    main()
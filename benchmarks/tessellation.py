@@ -0,0 +1,69 @@
+# Triangulation benchmark: Tesselation.earClipping vs Tesselation.triangleParing
+#
+# Triangulates discretized curved boundaries, a five-lobed flower with every
+# vertex jittered radially by up to one vertex spacing, so about half of the
+# vertices are reflex. Both implementations get the same polygons. The reference implementation is cubic in
+# the worst case, so it is only run up to a size limit.
+#
+# Usage (from the repository root):
+#     python benchmarks/tessellation.py [N1 N2 ...]
+
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from hetool.hetool import Point, Tesselation
+
+REFERENCE_LIMIT = 2000  # largest polygon handed to triangleParing
+
+
+def flowerPolygon(_n, _seed=0):
+    rng = random.Random(_seed)
+    spacing = 2.0 * math.pi * 100.0 / _n
+    pts = []
+    for k in range(_n):
+        angle = 2.0 * math.pi * k / _n
+        radius = 100.0 + 30.0 * math.sin(5.0 * angle) + rng.uniform(-spacing, spacing)
+        pts.append(Point(radius * math.cos(angle), radius * math.sin(angle)))
+
+    return pts
+
+
+def timeit(_function, _pts):
+    start = time.perf_counter()
+    triangs = _function(_pts)
+    elapsed = time.perf_counter() - start
+
+    if len(triangs) != len(_pts) - 2:
+        raise RuntimeError('{} returned {} triangles for {} vertices'.format(
+            _function.__name__, len(triangs), len(_pts)))
+
+    return elapsed
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]]
+    if not sizes:
+        sizes = [10, 100, 1000, 2000, 10000, 100000]
+
+    print('{:>10} {:>16} {:>16} {:>10}'.format(
+        'vertices', 'earClipping (s)', 'triangleParing (s)', 'speedup'))
+
+    for n in sizes:
+        pts = flowerPolygon(n)
+        fast = timeit(Tesselation.earClipping, pts)
+
+        if n <= REFERENCE_LIMIT:
+            slow = timeit(Tesselation.triangleParing, pts)
+            print('{:>10} {:>16.4f} {:>18.4f} {:>10.1f}'.format(
+                n, fast, slow, slow / fast))
+        else:
+            print('{:>10} {:>16.4f} {:>18} {:>10}'.format(n, fast, '-', '-'))
+
+
+if __name__ == '__main__':
+    main()
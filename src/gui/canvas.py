@@ -1,17 +1,25 @@
 from PyQt5 import QtGui
-from PyQt5.QtCore import QPoint, QPointF, QRectF, Qt, pyqtSignal
-from PyQt5.QtGui import QBrush, QColor, QFont, QPainter, QPen, QPainterPath
+from PyQt5.QtCore import QLineF, QPointF, QRectF, QSize, Qt, pyqtSignal
+from PyQt5.QtGui import QBrush, QColor, QFont, QPainter, QPen, QPainterPath, QTransform
+from PyQt5.QtGui import QOpenGLFramebufferObject, QOpenGLFramebufferObjectFormat, QOpenGLPaintDevice
 from PyQt5.QtWidgets import QOpenGLWidget, qApp
 from OpenGL.GL import *
+from OpenGL.error import GLError, NullFunctionError
 
-from multipledispatch import *
-import json
+import numpy as np
 import math
 import os
 
-from hetool.hetool import HeController, HeModel, HeView, Tesselation, Point
-from utility import normalized, collision
+from hetool.hetool import HeArrayModel, HeController, HeModel, HeView
+from utility import normalized, collision, SpatialHash, BoxIndex
+from particles import ParticleField
+from mesh import regularMesh
 from gui.inputdialog import InputDialog
+from gui.solveworker import SolveWorker
+from gui.particlerenderer import ParticleRenderer
+from gui.heatmap import HeatMap, RASTER_THRESHOLD
+from gui.profiler import FrameProfiler, profiled
+from gui.viewtransform import ViewTransform
 
 # https://doc.qt.io/qt-5/qopenglwidget.html
 # https://doc.qt.io/qt-5/coordsys.html
@@ -19,6 +27,7 @@ from gui.inputdialog import InputDialog
 
 class Canvas(QOpenGLWidget):
     cursorSignal = pyqtSignal(QPointF, QPointF)
+    solveSignal = pyqtSignal(str)  # Status of background solves and the scene layer
 
     def __init__(self):
         super().__init__()
@@ -41,76 +50,62 @@ class Canvas(QOpenGLWidget):
         self.interval = 1.0  # Canvas grid interval
 
         self.debug = False
+        self.profiler = FrameProfiler()  # Timings of paintGL stages and input handlers, shown while debugging
 
         self.heM = HeModel()
         self.heV = HeView(self.heM)
         self.heC = HeController(self.heM)
+        self.heA = HeArrayModel(self.heM)  # Coordinates of segment ends and points, for culling and drawing
 
         self.tol = 10e-6
         self.snapTol = 10  # Viewport units
 
-        self.data = {}
-        self.selection = []
+        self.data = ParticleField()
+        self.selection = np.empty(0, dtype=np.intp)  # Indices of selected particles, sorted
 
-    # ----- UNIVERSE-VIEWPORT CONVERSIONS -----
-
-    @dispatch(QPoint)
-    def universeToViewport(self, u):
-        return self.universeToViewport(u.x(), u.y())
-
-    @dispatch(QPointF)
-    def universeToViewport(self, u):
-        return self.universeToViewport(u.x(), u.y())
+        self.patchPaths = {}  # Patch -> (triangles, QPainterPath) built from the patch's cached triangulation
 
-    @dispatch(int, int)
-    def universeToViewport(self, ux, uy):
-        return self.universeToViewport(float(ux), float(uy))
+        self.pointHash = None  # SpatialHash of Hetool points in universe coordinates, for snapping
+        self.pointHashVersion = None  # HeModel version the hash was built from
 
-    @dispatch(float, int)
-    def universeToViewport(self, ux, uy):
-        return self.universeToViewport(ux, float(uy))
+        self.sceneIndex = None  # BoxIndex of Hetool patches, segments and points, for culling what is off screen
+        self.sceneIndexVersion = None  # HeModel version the index was built from
 
-    @dispatch(int, float)
-    def universeToViewport(self, ux, uy):
-        return self.universeToViewport(float(ux), uy)
+        self.sceneLayer = None  # Offscreen framebuffer holding the static scene: gridlines, Hetool model and particles
+        self.sceneLayerKey = None  # View and data the layer was drawn for, see sceneKey
+        self.sceneLayerFailed = False  # Framebuffers are not available, the scene is painted directly every frame
 
-    @dispatch(float, float)
-    def universeToViewport(self, ux, uy):
-        w = self.width()
-        h = self.height()
+        self.particleRenderer = ParticleRenderer()  # Draws particles as point sprites, when the context allows
+        self.heatMap = HeatMap()  # Draws particles as one image, when they are smaller than a pixel
 
-        vx = (ux - self.center.x()) / self.factor + w / 2
-        vy = -(uy - self.center.y()) / self.factor + h / 2
-        return QPointF(vx, vy)
+        self.solveWorker = SolveWorker()
+        self.solveJobs = {}  # Job id -> (ParticleField, its version) the job was submitted from
+        self.solveWorker.progress.connect(self.onSolveProgress)
+        self.solveWorker.solved.connect(self.onSolved)
+        self.solveWorker.failed.connect(self.onSolveFinished)
+        self.solveWorker.cancelled.connect(self.onSolveFinished)
+        qApp.aboutToQuit.connect(self.solveWorker.stop)
 
-    @dispatch(QPoint)
-    def viewportToUniverse(self, v):
-        return self.viewportToUniverse(v.x(), v.y())
+    # ----- UNIVERSE-VIEWPORT CONVERSIONS -----
 
-    @dispatch(QPointF)
-    def viewportToUniverse(self, v):
-        return self.viewportToUniverse(v.x(), v.y())
+    # Current view as a ViewTransform, for converting whole arrays of coordinates in one call
 
-    @dispatch(int, int)
-    def viewportToUniverse(self, vx, vy):
-        return self.viewportToUniverse(float(vx), float(vy))
+    def view(self):
+        return ViewTransform(self.center, self.factor, self.width(), self.height())
 
-    @dispatch(float, int)
-    def viewportToUniverse(self, vx, vy):
-        return self.viewportToUniverse(vx, float(vy))
+    # Scalar conversions, of a QPoint/QPointF or of x and y, returning a QPointF
 
-    @dispatch(int, float)
-    def viewportToUniverse(self, vx, vy):
-        return self.viewportToUniverse(float(vx), vy)
+    def universeToViewport(self, *args):
+        ux, uy = (args[0].x(), args[0].y()) if len(args) == 1 else args
+        return QPointF(*self.view().toViewport(ux, uy))
 
-    @dispatch(float, float)
-    def viewportToUniverse(self, vx, vy):
-        w = self.width()
-        h = self.height()
+    def viewportToUniverse(self, *args):
+        vx, vy = (args[0].x(), args[0].y()) if len(args) == 1 else args
+        return QPointF(*self.view().toUniverse(vx, vy))
 
-        ux = self.center.x() + (vx - w / 2) * self.factor
-        uy = self.center.y() - (vy - h / 2) * self.factor
-        return QPointF(ux, uy)
+    # Universe to viewport mapping as a QTransform, so geometry stored in universe coordinates can be drawn as is
+    def universeTransform(self):
+        return self.view().qtransform()
 
     # ----------
 
@@ -143,39 +138,132 @@ class Canvas(QOpenGLWidget):
 
         self.interval = max(xi, yi)
 
+    # The static scene is drawn into an offscreen layer only when the view or the data changed, so moving the cursor
+    # just copies that layer and paints the overlay (cursor, new segment, area selection, debug text) on top
+
+    @profiled('frame')
     def paintGL(self):
         self.updateInterval()
+        with self.profiler.section('layer'):
+            cached = self.drawSceneLayer()
 
         painter = QPainter(self)
         painter.setRenderHints(QPainter.RenderHint.Antialiasing)
         painter.setFont(QFont('Consolas', 12))
 
+        if not cached:
+            self.paintScene(painter)
+
+        with self.profiler.section('overlay'):
+            self.paintOverlay(painter)
+
+    # Everything the static scene depends on. Values are compared by equality, objects (data and selection, which are
+    # replaced rather than modified in place, apart from data.version) by identity
+
+    def sceneKey(self):
+        values = (self.width(), self.height(), self.devicePixelRatioF(), self.center.x(), self.center.y(), self.factor,
+                  self.interval, self.debug, self.heM.version, self.data.version)
+        objects = (self.data, self.selection)
+        return values, objects
+
+    # Redraws the scene layer if its key changed and copies it to the widget's framebuffer. Returns False when
+    # framebuffers are not available, in which case the scene must be painted directly
+
+    def drawSceneLayer(self):
+        if self.sceneLayerFailed or self.context() is None:
+            return False
+
+        ratio = self.devicePixelRatioF()
+        size = QSize(int(self.width() * ratio), int(self.height() * ratio))
+        key = self.sceneKey()
+
+        try:
+            if self.sceneLayer is None or self.sceneLayer.size() != size:
+                layerFormat = QOpenGLFramebufferObjectFormat()
+                layerFormat.setAttachment(QOpenGLFramebufferObject.CombinedDepthStencil)
+                layerFormat.setSamples(max(self.format().samples(), 0))
+
+                self.sceneLayer = QOpenGLFramebufferObject(size, layerFormat)
+                self.sceneLayerKey = None
+                if not self.sceneLayer.isValid():
+                    return self.disableSceneLayer('invalid framebuffer')
+
+            current = (self.sceneLayerKey is not None and key[0] == self.sceneLayerKey[0] and
+                       all(a is b for a, b in zip(key[1], self.sceneLayerKey[1])))
+
+            if not current:
+                if not self.sceneLayer.bind():
+                    return self.disableSceneLayer('framebuffer could not be bound')
+
+                glViewport(0, 0, size.width(), size.height())
+                glClearColor(0.058, 0.058, 0.058, 1.0)
+                glClear(GL_COLOR_BUFFER_BIT | GL_STENCIL_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+
+                device = QOpenGLPaintDevice(size)
+                device.setDevicePixelRatio(ratio)
+
+                painter = QPainter(device)
+                painter.setRenderHints(QPainter.RenderHint.Antialiasing)
+                painter.setFont(QFont('Consolas', 12))
+                self.paintScene(painter)
+                painter.end()
+
+                self.sceneLayerKey = key
+
+            try:
+                glBindFramebuffer(GL_READ_FRAMEBUFFER, self.sceneLayer.handle())
+                glBindFramebuffer(GL_DRAW_FRAMEBUFFER, self.defaultFramebufferObject())
+                glBlitFramebuffer(0, 0, size.width(), size.height(), 0, 0, size.width(), size.height(),
+                                  GL_COLOR_BUFFER_BIT, GL_NEAREST)
+            except (GLError, NullFunctionError) as e:
+                return self.disableSceneLayer('framebuffer could not be copied ({})'.format(e))
+
+            return True
+
+        finally:
+            glBindFramebuffer(GL_FRAMEBUFFER, self.defaultFramebufferObject())
+            glViewport(0, 0, size.width(), size.height())
+
+    # Drops the scene layer for the rest of the session, telling why once on the status bar. Returns False, like drawSceneLayer then
+
+    def disableSceneLayer(self, reason):
+        self.solveSignal.emit('Scene layer disabled, painting the scene directly: {}'.format(reason))
+        self.sceneLayer = None
+        self.sceneLayerKey = None
+        self.sceneLayerFailed = True
+        return False
+
+    # Gridlines, Hetool model and particles
+
+    def paintScene(self, painter):
+
         # Gridlines
 
-        painter.setPen(QPen(QColor('#2f2f2f'), 1))
-        painter.setBrush(QBrush())
+        with self.profiler.section('gridlines'):
+            painter.setPen(QPen(QColor('#2f2f2f'), 1))
+            painter.setBrush(QBrush())
 
-        tl = self.viewportToUniverse(0, 0)
-        br = self.viewportToUniverse(self.width(), self.height())
+            view = self.view()
+            l, t = view.toUniverse(0, 0)
+            r, b = view.toUniverse(self.width(), self.height())
 
-        i = int(tl.y() / self.interval) * self.interval
-        while i >= br.y():
-            v = self.universeToViewport(0, i)
-            painter.drawLine(0, v.y(), self.width(), v.y())
-            i -= self.interval
+            # Multiples of the interval from the top left corner down to the bottom and right to the right edge
+            i = int(t / self.interval) * self.interval
+            i = i - self.interval * np.arange(max(int(math.floor((i - b) / self.interval)) + 1, 0))
+            j = int(l / self.interval) * self.interval
+            j = j + self.interval * np.arange(max(int(math.floor((r - j) / self.interval)) + 1, 0))
 
-        j = int(tl.x() / self.interval) * self.interval
-        while j <= br.x():
-            v = self.universeToViewport(j, 0)
-            painter.drawLine(v.x(), 0, v.x(), self.height())
-            j += self.interval
+            _, vy = view.toViewport(0.0, i)
+            vx, _ = view.toViewport(j, 0.0)
+            painter.drawLines([QLineF(0, y, self.width(), y) for y in vy.tolist()])
+            painter.drawLines([QLineF(x, 0, x, self.height()) for x in vx.tolist()])
 
-        painter.setPen(QPen(QColor('#2f2f2f'), 4))
-        painter.setBrush(QBrush())
+            painter.setPen(QPen(QColor('#2f2f2f'), 4))
+            painter.setBrush(QBrush())
 
-        origin = self.universeToViewport(0.0, 0.0)
-        painter.drawLine(0, origin.y(), self.width(), origin.y())
-        painter.drawLine(origin.x(), 0, origin.x(), self.height())
+            origin = view.pointToViewport(QPointF(0.0, 0.0))
+            painter.drawLine(0, origin.y(), self.width(), origin.y())
+            painter.drawLine(origin.x(), 0, origin.x(), self.height())
 
         # He Tools Data
 
@@ -183,73 +271,84 @@ class Canvas(QOpenGLWidget):
             painter.setPen(QPen(QColor('#286ed2'), 1))
             painter.setBrush(QBrush(QColor('#286ed2')))
 
-            patches = self.heV.getPatches()
-            for patch in patches:
-                triangles = Tesselation.tessellate(patch.getPoints())
-                for triangle in triangles:
-                    a = self.universeToViewport(triangle[0].getX(), triangle[0].getY())
-                    b = self.universeToViewport(triangle[1].getX(), triangle[1].getY())
-                    c = self.universeToViewport(triangle[2].getX(), triangle[2].getY())
-                    path = QPainterPath()
-                    path.moveTo(a.x(), a.y())
-                    path.lineTo(b.x(), b.y())
-                    path.lineTo(c.x(), c.y())
-                    painter.drawPath(path)
+            pen = QPen(QColor('#286ed2'), 1)
+            pen.setCosmetic(True)
+
+            painter.save()
+            painter.setTransform(self.universeTransform())
+            painter.setPen(pen)
+
+            # Only what overlaps the viewport (plus the vertex markers and strokes) is drawn
+            index = self.updateSceneIndex()
+            left, right, bottom, top = self.visibleRect(8)
+
+            # Paths are rebuilt only when a patch's triangulation is invalidated
+            with self.profiler.section('patches'):
+                for patch in index['patches'].query(left, right, bottom, top):
+                    triangles = patch.getTriangles()
+                    cached = self.patchPaths.get(patch)
+                    if cached is None or cached[0] is not triangles:
+                        cached = (triangles, self.trianglesPath(triangles))
+                        self.patchPaths[patch] = cached
+                    painter.drawPath(cached[1])
+
+            painter.restore()
 
             painter.setPen(QPen(QColor('#d72337'), 3))
             painter.setBrush(QBrush(QColor('#d72337')))
 
-            segments = self.heV.getSegments()
-            for curve in segments:
-                points = curve.getPointsToDraw()
-                a = self.universeToViewport(points[0].getX(), points[0].getY())
-                b = self.universeToViewport(points[1].getX(), points[1].getY())
-                painter.drawLine(a.x(), a.y(), b.x(), b.y())
-
-            vertices = self.heV.getPoints()
-            for vertex in vertices:
-                a = self.universeToViewport(vertex.getX(), vertex.getY())
-                painter.drawEllipse(a.x() - 4, a.y() - 4, 8, 8)
+            # Endpoints and vertices are converted to viewport coordinates all at once
+            view = self.view()
+
+            with self.profiler.section('segments'):
+                segments = index['segments'].query(left, right, bottom, top)
+                if segments:
+                    ends = index['segmentEnds'][segments]
+                    x0, y0 = view.toViewport(ends[:, 0], ends[:, 1])
+                    x1, y1 = view.toViewport(ends[:, 2], ends[:, 3])
+                    lines = np.column_stack((x0, y0, x1, y1)).tolist()
+                    painter.drawLines([QLineF(*line) for line in lines])
+
+            with self.profiler.section('vertices'):
+                vertices = index['points'].query(left, right, bottom, top)
+                if vertices:
+                    xy = index['pointXY'][vertices]
+                    vx, vy = view.toViewport(xy[:, 0], xy[:, 1])
+                    for x, y in zip(vx.tolist(), vy.tolist()):
+                        painter.drawEllipse(QRectF(x - 4, y - 4, 8, 8))
 
         # Regular Mesh of Particles
 
         if self.data:
             if self.debug:
-                tl = self.universeToViewport(self.data['minx'] - self.data['dx'] / 2.0, self.data['maxy'] + self.data['dy'] / 2.0)
-                br = self.universeToViewport(self.data['maxx'] + self.data['dx'] / 2.0, self.data['miny'] - self.data['dy'] / 2.0)
+                tl = self.universeToViewport(self.data.minx - self.data.dx / 2.0, self.data.maxy + self.data.dy / 2.0)
+                br = self.universeToViewport(self.data.maxx + self.data.dx / 2.0, self.data.miny - self.data.dy / 2.0)
 
                 painter.setPen(QPen(QColor('#ffffff'), 1, Qt.DashLine))
                 painter.setBrush(QBrush())
                 painter.drawRect(QRectF(tl, br))
 
-            dx = self.data['dx'] / self.factor
-            dy = self.data['dy'] / self.factor
-            mint = self.data['mint']
-            maxt = self.data['maxt']
-
-            for index in range(self.data['n']):
-                x = self.data['x'][index]
-                y = self.data['y'][index]
-                t = self.data['t'][index]
-                v = self.universeToViewport(x, y)
-                
-                if not t or maxt == mint:
-                    color = QColor('#ffffff')
+            with self.profiler.section('particles'):
+                # Rows and columns of the lattice on screen
+                window = self.data.latticeWindow(*self.visibleRect(2))
+
+                if min(self.data.dx, self.data.dy) / self.factor < RASTER_THRESHOLD:
+                    painter.save()
+                    painter.setTransform(self.universeTransform())
+                    self.heatMap.draw(painter, self.data, self.selection, window)
+                    painter.restore()
                 else:
-                    scale = (t - mint) / (maxt - mint)
-                    r = int((1 - scale) *   0) + int(scale * 255)
-                    g = int((1 - scale) *   0) + int(scale *   0)
-                    b = int((1 - scale) * 255) + int(scale *   0)
-                    color = QColor.fromRgb(r, g, b)
+                    painter.beginNativePainting()
+                    drawn = self.particleRenderer.draw(self.data, self.selection, self.center, self.factor,
+                                                       self.width(), self.height(), self.devicePixelRatioF(), window)
+                    painter.endNativePainting()
+
+                    if not drawn:
+                        self.paintParticles(painter, self.data.window(*window))
 
-                painter.setPen(QPen(color, 1))
-                painter.setBrush(QBrush(color))
-                painter.drawEllipse(v.x() - dx / 2.0, v.y() - dy / 2.0, dx, dy)
+    # Area selection, new segment, cursor and debug text
 
-                if index in self.selection:                    
-                    painter.setPen(QPen(QColor('#ffffff'), 2))
-                    painter.setBrush(QBrush(QColor('#5582af69')))
-                    painter.drawEllipse(v.x() - dx / 2.0, v.y() - dy / 2.0, dx, dy)
+    def paintOverlay(self, painter):
 
         # Area selection
 
@@ -317,6 +416,63 @@ class Canvas(QOpenGLWidget):
         painter.setPen(QPen(QColor('#ffffff'), 1))
         painter.drawText(QRectF(0, 0, self.width(), self.height()), text)
 
+        # Timings, E exports them to profile.json
+        lines = self.profiler.lines()
+        painter.drawText(QRectF(0, 8, self.width() - 8, self.height()), Qt.AlignRight | Qt.AlignTop, '\n'.join(lines))
+
+    # Draws the particles at <indices> one by one with <painter>, when ParticleRenderer cannot
+
+    def paintParticles(self, painter, indices):
+        dx = self.data.dx / self.factor
+        dy = self.data.dy / self.factor
+        mint = self.data.mint
+        maxt = self.data.maxt
+
+        # Viewport coordinates and colors of all those particles at once
+        vx, vy = self.view().toViewport(self.data.x[indices], self.data.y[indices])
+        vx -= dx / 2.0
+        vy -= dy / 2.0
+
+        t = self.data.t[indices]
+        known = ~np.isnan(t)
+        scale = np.zeros(len(indices))
+        if maxt is not None and maxt != mint:
+            scale[known] = (t[known] - mint) / (maxt - mint)
+        else:
+            known[:] = False
+        red = (scale * 255).astype(int)
+        blue = ((1 - scale) * 255).astype(int)
+
+        selected = np.zeros(self.data.n, dtype=bool)
+        selected[self.selection] = True
+        selected = selected[indices]
+
+        for x, y, k, r, b, s in zip(vx.tolist(), vy.tolist(), known.tolist(), red.tolist(), blue.tolist(), selected.tolist()):
+            color = QColor.fromRgb(r, 0, b) if k else QColor('#ffffff')
+
+            painter.setPen(QPen(color, 1))
+            painter.setBrush(QBrush(color))
+            painter.drawEllipse(QRectF(x, y, dx, dy))
+
+            if s:
+                painter.setPen(QPen(QColor('#ffffff'), 2))
+                painter.setBrush(QBrush(QColor('#5582af69')))
+                painter.drawEllipse(QRectF(x, y, dx, dy))
+
+    # Builds a path in universe coordinates from a flat list of triangle coordinates
+    @staticmethod
+    def trianglesPath(triangles):
+        path = QPainterPath()
+        path.setFillRule(Qt.WindingFill)
+
+        for k in range(0, len(triangles), 6):
+            path.moveTo(triangles[k], triangles[k + 1])
+            path.lineTo(triangles[k + 2], triangles[k + 3])
+            path.lineTo(triangles[k + 4], triangles[k + 5])
+            path.closeSubpath()
+
+        return path
+
     # ----- Input Processing -----
 
     def resetCursor(self):
@@ -325,6 +481,7 @@ class Canvas(QOpenGLWidget):
         self.cursorSignal.emit(self.cursorU, self.cursorV)
 
     # Processes the cursor for snapping, straight lines and whatnot
+    @profiled('parseCursor')
     def parseCursor(self):
         if self.keyStates['rmb']:
             return
@@ -345,18 +502,21 @@ class Canvas(QOpenGLWidget):
 
             # Align to existing Hetool points
 
+            pointHash = self.updatePointHash()
+            radius = self.snapTol * self.factor
+
             x = (self.snapTol, self.cursorV.x())
             y = (self.snapTol, self.cursorV.y())
 
-            for point in self.heV.getPoints():
-                pointV = self.universeToViewport(point.getX(), point.getY())
-
-                dx = abs(pointV.x() - self.cursorV.x())
-                dy = abs(pointV.y() - self.cursorV.y())
+            for ux, uy, point in pointHash.queryColumns(self.cursorU.x(), radius):
+                dx = abs(ux - self.cursorU.x()) / self.factor
                 if dx < x[0]:
-                    x = (dx, pointV.x())
+                    x = (dx, self.universeToViewport(ux, uy).x())
+
+            for ux, uy, point in pointHash.queryRows(self.cursorU.y(), radius):
+                dy = abs(uy - self.cursorU.y()) / self.factor
                 if dy < y[0]:
-                    y = (dy, pointV.y())
+                    y = (dy, self.universeToViewport(ux, uy).y())
 
             self.cursorV = QPointF(x[1], y[1])
             self.cursorU = self.viewportToUniverse(self.cursorV)
@@ -380,20 +540,72 @@ class Canvas(QOpenGLWidget):
         else:
             # Snap to pre-existing Hetool points
 
-            new = (self.snapTol, self.cursorV)
-            for point in self.heV.getPoints():
-                pointV = self.universeToViewport(point.getX(), point.getY())
-                dx = pointV.x() - self.cursorV.x()
-                dy = pointV.y() - self.cursorV.y()
+            pointHash = self.updatePointHash()
+            radius = self.snapTol * self.factor
+
+            new = (self.snapTol, None)
+            for ux, uy, point in pointHash.queryRadius(self.cursorU.x(), self.cursorU.y(), radius):
+                dx = (ux - self.cursorU.x()) / self.factor
+                dy = (uy - self.cursorU.y()) / self.factor
                 distance = math.sqrt(dx * dx + dy * dy)
                 if distance < new[0]:
-                    new = (distance, pointV)
+                    new = (distance, point)
 
-            self.cursorV = new[1]
+            if new[1] is not None:
+                self.cursorV = self.universeToViewport(new[1].getX(), new[1].getY())
             self.cursorU = self.viewportToUniverse(self.cursorV)
 
         self.cursorSignal.emit(self.cursorU, self.cursorV)
 
+    # Rebuilds the spatial hash of Hetool points after model changes, or when zooming made its cells
+    # too small or too large for the snapping tolerance
+    def updatePointHash(self):
+        size = self.snapTol * self.factor
+
+        if (self.pointHash is None or self.pointHashVersion != self.heM.version or
+                not 0.5 <= size / self.pointHash.size <= 2.0):
+            self.pointHash = SpatialHash(size)
+            for point in self.heV.getPoints():
+                self.pointHash.insert(point.getX(), point.getY(), point)
+            self.pointHashVersion = self.heM.version
+
+        return self.pointHash
+
+    # Rebuilds the bounding box indices of Hetool patches, segments and points after model changes, dropping the
+    # cached paths of patches that no longer exist. Segments and points are indexed by their rows in the arrays of
+    # heA, whose end points and coordinates are kept alongside for drawing (the canvas only inserts straight lines)
+    def updateSceneIndex(self):
+        if self.sceneIndex is None or self.sceneIndexVersion != self.heM.version:
+            patches = self.heV.getPatches() if not self.heV.isEmpty() else []
+            patches = [patch for patch in patches if patch.getBoundBox() is not None]
+            patchBoxes = [patch.getBoundBox() for patch in patches]
+
+            ends = self.heA.segmentEndPoints()
+            x = ends[:, 0::2]
+            y = ends[:, 1::2]
+            segmentBoxes = np.column_stack((x.min(axis=1), x.max(axis=1), y.min(axis=1), y.max(axis=1)))
+
+            xy = self.heA.vertexXY
+            pointBoxes = np.column_stack((xy[:, 0], xy[:, 0], xy[:, 1], xy[:, 1]))
+
+            self.sceneIndex = {
+                'patches': BoxIndex(patches, patchBoxes),
+                'segments': BoxIndex(list(range(len(ends))), segmentBoxes),
+                'points': BoxIndex(list(range(len(xy))), pointBoxes),
+                'segmentEnds': ends,
+                'pointXY': xy
+            }
+            self.sceneIndexVersion = self.heM.version
+            self.patchPaths = {patch: self.patchPaths[patch] for patch in patches if patch in self.patchPaths}
+
+        return self.sceneIndex
+
+    # Universe rectangle (l, r, b, t) shown in the viewport, grown by <margin> viewport units on every side
+    def visibleRect(self, margin=0.0):
+        tl = self.viewportToUniverse(-margin, -margin)
+        br = self.viewportToUniverse(self.width() + margin, self.height() + margin)
+        return tl.x(), br.x(), br.y(), tl.y()
+
     def mouseMoveEvent(self, event: QtGui.QMouseEvent):
         self.rawCursorV = event.pos()
         self.rawCursorU = self.viewportToUniverse(self.rawCursorV)
@@ -431,10 +643,11 @@ class Canvas(QOpenGLWidget):
             self.keyStates['lmb'] = False
             self.rmbDown = self.cursorU
             if not self.keyStates['ctrl']:
-                self.selection.clear()
+                self.selection = np.empty(0, dtype=np.intp)
 
         self.update()
 
+    @profiled('mouseRelease')
     def mouseReleaseEvent(self, event: QtGui.QMouseEvent):
         if event.button() == Qt.MouseButton.LeftButton:
             if self.keyStates['lmb']:  # Pressing RMB can cancel adding a segment
@@ -459,10 +672,10 @@ class Canvas(QOpenGLWidget):
             self.keyStates['rmb'] = False
             # Check for bounding box collision and only then for individual datapoints
             if self.data:
-                l1 = self.data['minx'] - self.data['dx'] / 2.0
-                r1 = self.data['maxx'] + self.data['dx'] / 2.0
-                b1 = self.data['miny'] - self.data['dy'] / 2.0
-                t1 = self.data['maxy'] + self.data['dy'] / 2.0
+                l1 = self.data.minx - self.data.dx / 2.0
+                r1 = self.data.maxx + self.data.dx / 2.0
+                b1 = self.data.miny - self.data.dy / 2.0
+                t1 = self.data.maxy + self.data.dy / 2.0
 
                 l2 = min(self.rmbDown.x(), self.cursorU.x())
                 r2 = max(self.rmbDown.x(), self.cursorU.x())
@@ -470,12 +683,7 @@ class Canvas(QOpenGLWidget):
                 t2 = max(self.rmbDown.y(), self.cursorU.y())
 
                 if collision(l1, r1, b1, t1, l2, r2, b2, t2):
-                    for index in range(self.data['n']):
-                        x = self.data['x'][index]
-                        y = self.data['y'][index]
-
-                        if collision(l2, r2, b2, t2, x, y) and index not in self.selection:
-                            self.selection.append(index)
+                    self.selection = np.union1d(self.selection, self.data.select(l2, r2, b2, t2))
 
         self.update()
 
@@ -499,6 +707,9 @@ class Canvas(QOpenGLWidget):
         if event.key() == Qt.Key_D:
             self.debug = not self.debug
 
+        if event.key() == Qt.Key_E and self.debug:
+            self.saveProfile()
+
         if event.key() == Qt.Key.Key_Control:
             self.keyStates['ctrl'] = True
 
@@ -508,6 +719,9 @@ class Canvas(QOpenGLWidget):
         if event.key() == Qt.Key.Key_Delete:
             self.deleteSelection()
 
+        if event.key() == Qt.Key.Key_C:
+            self.cancelSolves()
+
         self.resetCursor()
         self.parseCursor()
         self.update()
@@ -528,73 +742,12 @@ class Canvas(QOpenGLWidget):
 
 # ----- Data Manipulation -----
 
-    # Updates self.data entries for min and max values of X, Y, I, J and T
-
-    def updateMinMax(self):
-        if 'n' not in self.data:
-            return
-
-        minx = None
-        miny = None
-        mini = None
-        minj = None
-        mint = None
-
-        maxx = None
-        maxy = None
-        maxi = None
-        maxj = None
-        maxt = None
-
-        for index in range(self.data['n']):
-            x = self.data['x'][index]
-            y = self.data['y'][index]
-            i = self.data['i'][index]
-            j = self.data['j'][index]
-            t = self.data['t'][index]
-
-            minx = x if minx is None else min(x, minx)
-            miny = y if miny is None else min(y, miny)
-            mini = i if mini is None else min(i, mini)
-            minj = j if minj is None else min(j, minj)
-            mint = t if mint is None else (mint if t is None else min(t, mint))
-
-            maxx = x if maxx is None else max(x, maxx)
-            maxy = y if maxy is None else max(y, maxy)
-            maxi = i if maxi is None else max(i, maxi)
-            maxj = j if maxj is None else max(j, maxj)
-            maxt = t if maxt is None else (maxt if t is None else max(t, maxt))
-
-        self.data['minx'] = minx
-        self.data['miny'] = miny
-        self.data['mini'] = mini
-        self.data['minj'] = minj
-        self.data['mint'] = mint
-
-        self.data['maxx'] = maxx
-        self.data['maxy'] = maxy
-        self.data['maxi'] = maxi
-        self.data['maxj'] = maxj
-        self.data['maxt'] = maxt
-
     # Delete selected datapoints
 
     def deleteSelection(self):
-        if self.selection:
-            self.selection.sort()
-            self.data['n'] -= len(self.selection)
-
-            count = 0
-            for index in self.selection:
-                del self.data['x'][index - count]
-                del self.data['y'][index - count]
-                del self.data['i'][index - count]
-                del self.data['j'][index - count]
-                del self.data['t'][index - count]
-                count += 1
-
-            self.selection.clear()
-            self.updateMinMax()
+        if len(self.selection):
+            self.data.delete(self.selection)
+            self.selection = np.empty(0, dtype=np.intp)
 
     # Set values (temperature) for selected datapoints
 
@@ -604,23 +757,19 @@ class Canvas(QOpenGLWidget):
         if dialog.result() == 1:
             try:
                 t = float(dialog.lineEdits[0].text())
-                for index in self.selection:
-                    self.data['t'][index] = t
-
             except Exception:
-                for index in self.selection:
-                    self.data['t'][index] = None
+                t = None
 
-            self.updateMinMax()
+            self.data.assign(self.selection, t)
 
     # Adjuts screen to fit data, JSON first, then Hetool
 
     def fit(self):
-        if 'n' in self.data and self.data['n'] > 0:
-            L = self.data['minx']
-            R = self.data['maxx']
-            B = self.data['miny']
-            T = self.data['maxy']
+        if self.data.n > 0:
+            L = self.data.minx
+            R = self.data.maxx
+            B = self.data.miny
+            T = self.data.maxy
             W = max(10.0, R - L)
             H = max(10.0, T - B)
 
@@ -641,12 +790,13 @@ class Canvas(QOpenGLWidget):
     # Clears Hetool data, JSON data and selection
 
     def clear(self):
-        self.data.clear()
+        self.data = ParticleField()
         self.heM.clearAll()
-        self.selection.clear()
+        self.selection = np.empty(0, dtype=np.intp)
+        self.patchPaths.clear()
         self.update()
 
-    # Shows a dialog for saving self.data to JSON file
+    # Shows a dialog for saving self.data to a JSON file, or a binary one if the name ends with .pfb
 
     def showSaveDialog(self):
         dialog = InputDialog(title='Salvar Arquivo', labels=['Nome do Arquivo'])
@@ -655,12 +805,22 @@ class Canvas(QOpenGLWidget):
         if dialog.result() == 1:
             try:
                 filename = dialog.lineEdits[0].text()
-                with open(filename, 'w') as outfile:
-                    json.dump(self.data, outfile, indent=4)
+                self.data.save(filename)
             except Exception as e:
                 pass
 
-    # Shows a dialog for loading JSON file to self.data
+    # Writes the debug timings to profile.json, or profile(n).json if it exists
+
+    def saveProfile(self):
+        path = 'profile.json'
+        count = 1
+        while os.path.exists(path):
+            path = 'profile({}).json'.format(count)
+            count += 1
+
+        self.profiler.save(path)
+
+    # Shows a dialog for loading a JSON or binary (.pfb) file to self.data
 
     def showLoadDialog(self):
         dialog = InputDialog(title='Carregar Arquivo', labels=['Nome do Arquivo'])
@@ -671,8 +831,7 @@ class Canvas(QOpenGLWidget):
 
             try:
                 filename = dialog.lineEdits[0].text()
-                with open(filename) as infile:
-                    self.data = json.load(infile)
+                self.data = ParticleField.load(filename)
             except Exception as e:
                 pass
 
@@ -695,90 +854,47 @@ class Canvas(QOpenGLWidget):
                 dx = 1.0
                 dy = 1.0
 
-        self.data.clear()
-        self.selection.clear()
-
-        L, R, B, T = self.heV.getBoundBox()
-
-        n = 0
-        minx = None
-        miny = None
-        mini = None
-        minj = None
-        maxx = None
-        maxy = None
-        maxi = None
-        maxj = None
-
-        X = []
-        Y = []
-        I = []
-        J = []
-
-        y = B + dy / 2.0
-        i = 1
-        while y <= T:
-            x = L + dx / 2.0
-            j = 1
-            while x <= R:
-                point = Point(x, y)
-                for patch in self.heV.getPatches():
-                    if patch.isPointInside(point):
-                        n += 1
-
-                        X.append(x)
-                        Y.append(y)
-                        I.append(i)
-                        J.append(j)
-
-                        minx = x if minx is None else min(x, minx)
-                        miny = y if miny is None else min(y, miny)
-                        mini = i if mini is None else min(i, mini)
-                        minj = j if minj is None else min(j, minj)
-
-                        maxx = x if maxx is None else max(x, maxx)
-                        maxy = y if maxy is None else max(y, maxy)
-                        maxi = i if maxi is None else max(i, maxi)
-                        maxj = j if maxj is None else max(j, maxj)
-                x += dx
-                j += 1
-            y += dy
-            i += 1
-
-        self.data['n'] = n
-        self.data['dx'] = dx
-        self.data['dy'] = dy
-
-        self.data['minx'] = minx
-        self.data['miny'] = miny
-        self.data['mini'] = mini
-        self.data['minj'] = minj
-        self.data['mint'] = None
-
-        self.data['maxx'] = maxx
-        self.data['maxy'] = maxy
-        self.data['maxi'] = maxi
-        self.data['maxj'] = maxj
-        self.data['maxt'] = None
-
-        self.data['x'] = X
-        self.data['y'] = Y
-        self.data['i'] = I
-        self.data['j'] = J
-        self.data['t'] = [None] * n
-
-
-    # Calls upon a Julia program to do some work using <filename> JSON file
+        self.selection = np.empty(0, dtype=np.intp)
+
+        X, Y, I, J = regularMesh(self.heV.getPatches(), dx, dy, self.heV.getBoundBox())
+        self.data = ParticleField(X, Y, I, J, None, dx, dy)
+
+    # Queues a solve of the boundary value problem on self.data. It runs in the background and the unknown temperatures
+    # are filled in when it finishes, as long as self.data was not replaced in the meantime
 
     def solve(self):
-        dialog = InputDialog(title='Solucionar PVC', labels=['Arquivo de Dados', 'Arquivo do Solucionador', 'Arquivo de saída'])
-        dialog.exec()
+        if not self.data:
+            return
 
-        if dialog.result() == 1:
-            try:
-                infilename = dialog.lineEdits[0].text()
-                solver = dialog.lineEdits[1].text()
-                outfilename = dialog.lineEdits[2].text()
-                os.system('julia {} "{}" "{}"'.format(solver, infilename, outfilename))
-            except Exception as e:
-                pass
+        id = self.solveWorker.submit(self.data)
+        self.solveJobs[id] = (self.data, self.data.version)
+        self.solveSignal.emit('Solve {} queued ({} pending)'.format(id, self.solveWorker.pending()))
+
+    # Cancels the running solve and every queued one
+
+    def cancelSolves(self):
+        self.solveWorker.cancelAll()
+
+    def onSolveProgress(self, id, iteration, residual):
+        self.solveSignal.emit('Solve {}: iteration {}, residual {:.2e}'.format(id, iteration, residual))
+
+    # Applies the temperatures of solve <id> only if self.data was not edited since it was submitted, otherwise they
+    # would overwrite the edits with a solution of the older field
+
+    def onSolved(self, id, t):
+        field, version = self.solveJobs.pop(id, (None, None))
+
+        if field is not self.data or version != self.data.version:
+            self.solveSignal.emit('Solve {} outdated, not applied ({} pending)'.format(id, self.solveWorker.pending()))
+            return
+
+        self.data.t = t
+        self.data.updateMinMax()
+        self.update()
+
+        self.solveSignal.emit('Solve {} done ({} pending)'.format(id, self.solveWorker.pending()))
+
+    def onSolveFinished(self, id, *args):
+        self.solveJobs.pop(id, None)
+        reason = ': {}'.format(args[0]) if args else ''
+        self.solveSignal.emit('Solve {} stopped{} ({} pending)'.format(id, reason, self.solveWorker.pending()))
@@ -0,0 +1,92 @@
+from PyQt5.QtCore import QRectF
+from PyQt5.QtGui import QImage
+import numpy as np
+
+# Temperature field of a ParticleField rasterized into one image, one pixel per particle of the i/j lattice.
+# Used instead of drawing particles individually when they are smaller than a screen pixel. Row 0 of the image is the
+# lowest i, so drawing it into rect() through Canvas.universeTransform (which flips y) puts every pixel on its
+# particle. The image is rebuilt only when the field or the selection changes.
+
+RASTER_THRESHOLD = 2.0  # Particles narrower than this many viewport pixels are drawn as a raster
+
+SELECTED = np.array([0x82, 0xaf, 0x69])  # Same translucent tint Canvas uses over selected particles
+SELECTED_ALPHA = 0x55 / 255.0
+
+
+# 256 entry RGBA lookup table of the canvas colormap, blue (coldest) to red (hottest)
+
+def colormap():
+    lut = np.zeros((256, 4), dtype=np.uint8)
+    lut[:, 0] = np.arange(256)
+    lut[:, 2] = 255 - np.arange(256)
+    lut[:, 3] = 255
+    return lut
+
+
+class HeatMap:
+    def __init__(self):
+        self.lut = colormap()
+        self.buffer = None  # RGBA pixels the image points to, kept alive with it
+        self.image = None
+
+        self.field = None  # Field, version and selection the image was built from
+        self.version = None
+        self.selection = None
+
+    # Universe rectangle covered by the image of <field>
+
+    @staticmethod
+    def rect(field):
+        columns = field.maxj - field.minj + 1
+        rows = field.maxi - field.mini + 1
+        return QRectF(field.minx - field.dx / 2.0, field.miny - field.dy / 2.0, columns * field.dx, rows * field.dy)
+
+    def update(self, field, selection):
+        if field is self.field and field.version == self.version and selection is self.selection:
+            return
+
+        rows = field.maxi - field.mini + 1
+        columns = field.maxj - field.minj + 1
+        r = field.i - field.mini
+        c = field.j - field.minj
+
+        # Unknown temperatures (or a field with a single temperature) are white, cells without particles transparent
+        colors = np.full((field.n, 4), 255, dtype=np.uint8)
+        known = field.known()
+        if field.maxt is not None and field.maxt != field.mint:
+            scale = (field.t[known] - field.mint) / (field.maxt - field.mint)
+            colors[known] = self.lut[(scale * 255).astype(int)]
+
+        if len(selection):
+            tinted = colors[selection, :3] * (1.0 - SELECTED_ALPHA) + SELECTED * SELECTED_ALPHA
+            colors[selection, :3] = tinted.astype(np.uint8)
+
+        self.buffer = np.zeros((rows, columns, 4), dtype=np.uint8)
+        self.buffer[r, c] = colors
+        self.image = QImage(self.buffer.data, columns, rows, columns * 4, QImage.Format_RGBA8888)
+
+        self.field = field
+        self.version = field.version
+        self.selection = selection
+
+    # Draws <field> with <painter>, whose transform must map universe to viewport coordinates. Only the part in
+    # <window> (ilo, ihi, jlo, jhi) if given
+
+    def draw(self, painter, field, selection, window=None):
+        self.update(field, selection)
+
+        if window is None:
+            painter.drawImage(HeatMap.rect(field), self.image)
+            return
+
+        ilo, ihi, jlo, jhi = window
+        if ilo > ihi or jlo > jhi:
+            return
+
+        rows = ihi - ilo + 1
+        columns = jhi - jlo + 1
+        target = QRectF(field.minx - field.dx / 2.0 + (jlo - field.minj) * field.dx,
+                        field.miny - field.dy / 2.0 + (ilo - field.mini) * field.dy,
+                        columns * field.dx, rows * field.dy)
+        source = QRectF(jlo - field.minj, ilo - field.mini, columns, rows)
+        painter.drawImage(target, self.image, source)
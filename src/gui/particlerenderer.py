@@ -0,0 +1,195 @@
+from OpenGL.GL import *
+from OpenGL.GL import shaders
+import numpy as np
+
+# Draws every particle of a ParticleField as a point sprite in a single call.
+# Positions (relative to the field's min corner, so float precision is not lost far from the origin), temperatures and
+# flags (known, selected) live in OpenGL buffers that are only re-uploaded when the field or the selection changes.
+# Particles are uploaded in lattice order (ParticleField.lattice), so the ones inside a window of rows and columns are
+# one range per row and can be drawn alone with glMultiDrawArrays.
+# The colormap and the ellipse shape are computed in the shaders. draw returns False when sprites cannot be used
+# (no shader support or particles larger than the biggest point size), so the caller can draw them another way.
+
+VERTEX_SHADER = '''
+#version 120
+
+attribute vec2 position;
+attribute float temperature;
+attribute float flags;
+
+uniform vec2 offset;
+uniform vec2 scale;
+uniform float pointSize;
+uniform float mint;
+uniform float maxt;
+
+varying vec3 color;
+varying float selected;
+
+void main() {
+    gl_Position = vec4((position + offset) * scale, 0.0, 1.0);
+    gl_PointSize = pointSize;
+
+    selected = step(2.0, flags);
+    if (mod(flags, 2.0) > 0.5 && maxt > mint) {
+        float s = clamp((temperature - mint) / (maxt - mint), 0.0, 1.0);
+        color = vec3(s, 0.0, 1.0 - s);
+    } else {
+        color = vec3(1.0);
+    }
+}
+'''
+
+FRAGMENT_SHADER = '''
+#version 120
+
+uniform vec2 radii;
+uniform float pointSize;
+
+varying vec3 color;
+varying float selected;
+
+void main() {
+    vec2 q = (gl_PointCoord - 0.5) * pointSize;
+    vec2 e = q / radii;
+    if (dot(e, e) > 1.0)
+        discard;
+
+    vec3 c = color;
+    if (selected > 0.5) {
+        vec2 inner = q / max(radii - 2.0, vec2(0.5));
+        if (dot(inner, inner) > 1.0)
+            c = vec3(1.0);
+        else
+            c = mix(c, vec3(0.510, 0.686, 0.412), 0.333);
+    }
+
+    gl_FragColor = vec4(c, 1.0);
+}
+'''
+
+KNOWN = 1.0
+SELECTED = 2.0
+
+
+class ParticleRenderer:
+    def __init__(self):
+        self.program = None
+        self.failed = False  # Shaders could not be built, never try again
+        self.buffers = None  # Positions, temperatures, flags
+        self.maxPointSize = 0.0
+
+        self.field = None  # Field and version the buffers hold
+        self.version = None
+        self.selection = None  # Selection the flags buffer holds
+        self.origin = (0.0, 0.0)
+
+    # Builds the shaders and buffers, with the OpenGL context current. Returns False if that is not possible
+
+    def initialize(self):
+        if self.program is not None:
+            return True
+        if self.failed:
+            return False
+
+        try:
+            self.program = shaders.compileProgram(
+                shaders.compileShader(VERTEX_SHADER, GL_VERTEX_SHADER),
+                shaders.compileShader(FRAGMENT_SHADER, GL_FRAGMENT_SHADER))
+            self.buffers = glGenBuffers(3)
+            self.maxPointSize = float(glGetFloatv(GL_ALIASED_POINT_SIZE_RANGE)[1])
+        except Exception as e:
+            self.program = None
+            self.failed = True
+            return False
+
+        return True
+
+    def upload(self, field, selection):
+        order, _ = field.lattice()
+
+        if field is not self.field or field.version != self.version:
+            self.origin = (field.minx, field.miny)
+            positions = np.empty((field.n, 2), dtype=np.float32)
+            positions[:, 0] = field.x[order] - self.origin[0]
+            positions[:, 1] = field.y[order] - self.origin[1]
+
+            glBindBuffer(GL_ARRAY_BUFFER, self.buffers[0])
+            glBufferData(GL_ARRAY_BUFFER, positions.nbytes, positions, GL_STATIC_DRAW)
+
+            temperatures = np.nan_to_num(field.t[order]).astype(np.float32)
+            glBindBuffer(GL_ARRAY_BUFFER, self.buffers[1])
+            glBufferData(GL_ARRAY_BUFFER, temperatures.nbytes, temperatures, GL_STATIC_DRAW)
+
+            self.field = field
+            self.version = field.version
+            self.selection = None
+
+        if selection is not self.selection:
+            flags = np.where(field.known(), KNOWN, 0.0).astype(np.float32)
+            flags[selection] += SELECTED
+            flags = flags[order]
+
+            glBindBuffer(GL_ARRAY_BUFFER, self.buffers[2])
+            glBufferData(GL_ARRAY_BUFFER, flags.nbytes, flags, GL_STATIC_DRAW)
+
+            self.selection = selection
+
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    # Draws <field> for a view centered at <center> with <factor> universe units per pixel on a <width> by <height>
+    # viewport, <ratio> device pixels per pixel. Only the particles in <window> (ilo, ihi, jlo, jhi) if given
+
+    def draw(self, field, selection, center, factor, width, height, ratio=1.0, window=None):
+        if not field or not self.initialize():
+            return False
+
+        rx = field.dx / factor / 2.0 * ratio
+        ry = field.dy / factor / 2.0 * ratio
+        pointSize = 2.0 * max(rx, ry) + 2.0
+        if pointSize > self.maxPointSize:
+            return False
+
+        self.upload(field, selection)
+
+        glUseProgram(self.program)
+        glEnable(GL_PROGRAM_POINT_SIZE)
+        try:
+            glEnable(GL_POINT_SPRITE)  # Needed by compatibility profiles, an error elsewhere
+        except Exception:
+            pass
+
+        location = glGetUniformLocation
+        glUniform2f(location(self.program, 'offset'), self.origin[0] - center.x(), self.origin[1] - center.y())
+        glUniform2f(location(self.program, 'scale'), 2.0 / (factor * width), 2.0 / (factor * height))
+        glUniform1f(location(self.program, 'pointSize'), pointSize)
+        glUniform2f(location(self.program, 'radii'), rx, ry)
+
+        known = field.mint is not None
+        glUniform1f(location(self.program, 'mint'), field.mint if known else 0.0)
+        glUniform1f(location(self.program, 'maxt'), field.maxt if known else 0.0)
+
+        attributes = []
+        for index, (name, size) in enumerate([('position', 2), ('temperature', 1), ('flags', 1)]):
+            attribute = glGetAttribLocation(self.program, name)
+            if attribute < 0:
+                continue
+            glBindBuffer(GL_ARRAY_BUFFER, self.buffers[index])
+            glEnableVertexAttribArray(attribute)
+            glVertexAttribPointer(attribute, size, GL_FLOAT, GL_FALSE, 0, None)
+            attributes.append(attribute)
+
+        if window is None:
+            glDrawArrays(GL_POINTS, 0, field.n)
+        else:
+            first, count = field.windowRanges(*window)
+            if len(count):
+                glMultiDrawArrays(GL_POINTS, first.astype(np.int32), count.astype(np.int32), len(count))
+
+        for attribute in attributes:
+            glDisableVertexAttribArray(attribute)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glDisable(GL_PROGRAM_POINT_SIZE)
+        glUseProgram(0)
+
+        return True
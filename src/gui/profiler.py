@@ -0,0 +1,80 @@
+from contextlib import contextmanager
+import functools
+import json
+import time
+import numpy as np
+
+# Rolling timings of named sections of code, the last <size> samples of each. Canvas times every stage of paintGL and
+# its input handlers with it, shows them in the debug overlay and can export them as JSON, so slow frames on heavy
+# models can be tracked down without an external profiler.
+
+PERCENTILES = (50, 90, 99)
+
+
+class FrameProfiler:
+    def __init__(self, size=240):
+        self.size = size
+        self.samples = {}  # Section name -> ring buffer of durations in seconds
+        self.counts = {}  # Section name -> number of samples recorded so far, including the overwritten ones
+
+    def record(self, name, seconds):
+        if name not in self.samples:
+            self.samples[name] = np.zeros(self.size)
+            self.counts[name] = 0
+
+        self.samples[name][self.counts[name] % self.size] = seconds
+        self.counts[name] += 1
+
+    # Times the body of a with statement as section <name>
+
+    @contextmanager
+    def section(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def clear(self):
+        self.samples.clear()
+        self.counts.clear()
+
+    # Count, mean, max and PERCENTILES of section <name> in milliseconds, over the samples still in its buffer
+
+    def stats(self, name):
+        count = self.counts[name]
+        samples = self.samples[name][:min(count, self.size)] * 1000.0
+
+        stats = {'count': count, 'mean': float(samples.mean()), 'max': float(samples.max())}
+        for percentile, value in zip(PERCENTILES, np.percentile(samples, PERCENTILES)):
+            stats['p{}'.format(percentile)] = float(value)
+        return stats
+
+    def toDict(self):
+        return {name: self.stats(name) for name in self.samples}
+
+    # One line per section, sorted by name, for the debug overlay
+
+    def lines(self):
+        header = '{:<16}{:>9}{:>9}{:>9}{:>9}'.format('section (ms)', 'mean', 'p50', 'p90', 'p99')
+        lines = [header]
+        for name in sorted(self.samples):
+            stats = self.stats(name)
+            lines.append('{:<16}{:>9.3f}{:>9.3f}{:>9.3f}{:>9.3f}'.format(name, stats['mean'], stats['p50'], stats['p90'], stats['p99']))
+        return lines
+
+    def save(self, filename):
+        with open(filename, 'w') as outfile:
+            json.dump(self.toDict(), outfile, indent=4)
+
+
+# Decorator timing every call of a Canvas method as section <name> of its profiler
+
+def profiled(name):
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.profiler.section(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
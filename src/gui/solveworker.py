@@ -0,0 +1,99 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+import queue
+
+import solver
+
+# Runs solves one after the other on a background thread, so the canvas keeps drawing while they run.
+# Every submitted field is copied, so the canvas is free to keep editing its own data meanwhile.
+# By default a solve uses multigrid, which reports progress every iteration and can be cancelled between them, unless
+# the worker's session already holds the factorization of the field's system, in which case only the back-substitution
+# is left. After a multigrid solve, when no other job is waiting, the worker factorizes its system in the session, so
+# re-solving after editing known temperatures (same particles, same known ones) is immediate.
+# Solves with method 'session' always go through the session, factorizing if needed.
+
+
+class SolveWorker(QThread):
+    progress = pyqtSignal(int, int, float)  # Job, iteration, relative residual
+    solved = pyqtSignal(int, object)  # Job, temperatures
+    failed = pyqtSignal(int, str)  # Job, error message
+    cancelled = pyqtSignal(int)  # Job
+
+    def __init__(self):
+        super().__init__()
+        self.jobs = queue.Queue()
+        self.count = 0  # Last job id handed out
+        self.cancelUpTo = 0  # Jobs with id up to this one are cancelled
+        self.current = None  # Job being solved
+        self.session = solver.Session()  # Only used from the worker thread
+
+    # Queues a solve of a copy of <field> with <method> ('multigrid', 'session' or any method of solver.solve, None to
+    # pick as described above) and returns its job id
+
+    def submit(self, field, method=None):
+        self.count += 1
+        self.jobs.put((self.count, field.copy(), method))
+
+        if not self.isRunning():
+            self.start()
+
+        return self.count
+
+    # Number of jobs waiting or running
+
+    def pending(self):
+        return self.jobs.qsize() + (1 if self.current is not None else 0)
+
+    # Cancels the running job and every queued one
+
+    def cancelAll(self):
+        self.cancelUpTo = self.count
+
+    # Cancels everything and waits for the thread to finish
+
+    def stop(self):
+        self.cancelAll()
+        self.jobs.put(None)
+        self.wait()
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+
+            id, field, method = job
+            if id <= self.cancelUpTo:
+                self.cancelled.emit(id)
+                continue
+
+            def callback(iteration, residual):
+                self.progress.emit(id, iteration, residual)
+                return id <= self.cancelUpTo
+
+            self.current = id
+            try:
+                if method is None:
+                    method = 'session' if self.session.isFactorized(field) else 'multigrid'
+
+                if method == 'session':
+                    t = self.session.solve(field, callback)
+                else:
+                    t = solver.solve(field, method, callback=callback)
+            except solver.Cancelled:
+                self.current = None
+                self.cancelled.emit(id)
+                continue
+            except Exception as e:
+                self.current = None
+                self.failed.emit(id, str(e))
+                continue
+            self.current = None
+
+            if id <= self.cancelUpTo:
+                self.cancelled.emit(id)
+                continue
+
+            self.solved.emit(id, t)
+
+            if method == 'multigrid' and self.jobs.empty() and not self.session.isFactorized(field):
+                self.session.factorize(field)
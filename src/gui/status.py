@@ -7,8 +7,10 @@ class Status(QWidget):
         #print('Navbar(height={})'.format(height))
 
         self.label = QLabel()
+        self.solveLabel = QLabel()
 
         self.containerLayout = QHBoxLayout()
+        self.containerLayout.addWidget(self.solveLabel)
         self.containerLayout.addStretch()
         self.containerLayout.addWidget(self.label)
 
@@ -0,0 +1,36 @@
+from PyQt5.QtCore import QPointF
+from PyQt5.QtGui import QTransform
+
+# Affine mapping between universe and viewport coordinates for one view: <center> (universe coordinates at the center
+# of the viewport), <factor> universe units per viewport unit and a <width> by <height> viewport. The viewport y axis
+# points down, the universe one up.
+# toViewport and toUniverse take scalars or NumPy arrays of coordinates and return the same, so a whole model or
+# particle field is converted in a single call. pointToViewport and pointToUniverse map one QPoint/QPointF.
+
+
+class ViewTransform:
+    def __init__(self, center, factor, width, height):
+        self.cx = center.x()
+        self.cy = center.y()
+        self.factor = factor
+        self.scale = 1.0 / factor
+        self.hw = width / 2
+        self.hh = height / 2
+
+    def toViewport(self, ux, uy):
+        return (ux - self.cx) * self.scale + self.hw, (self.cy - uy) * self.scale + self.hh
+
+    def toUniverse(self, vx, vy):
+        return self.cx + (vx - self.hw) * self.factor, self.cy - (vy - self.hh) * self.factor
+
+    def pointToViewport(self, u):
+        return QPointF(*self.toViewport(u.x(), u.y()))
+
+    def pointToUniverse(self, v):
+        return QPointF(*self.toUniverse(v.x(), v.y()))
+
+    # The mapping as a QTransform, so geometry stored in universe coordinates can be drawn as is
+    def qtransform(self):
+        return QTransform(self.scale, 0.0, 0.0, -self.scale,
+                          self.hw - self.cx * self.scale,
+                          self.hh + self.cy * self.scale)
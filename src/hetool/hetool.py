@@ -1,6 +1,7 @@
 import math
 import json
 import jsonschema
+import numpy as np
 
 # Hetool Library
 # Half-Edge Based Data Structure for Two-Dimensional Solid Modeling
@@ -22,6 +23,7 @@ import jsonschema
 
 
 class Point():
+    __slots__ = ('x', 'y', 'selected', 'vertex', 'attributes')
 
     def __init__(self, _x=None, _y=None):
         self.x = _x
@@ -155,9 +157,12 @@ class Point():
 
 
 class Segment:
-    selected = False
+    __slots__ = ('selected', 'nsudv', 'nPts', 'edge', 'attributes')
     PARAM_TOL = 1e-7
-    nsudv = None
+
+    def __init__(self):
+        self.selected = False
+        self.nsudv = None
 
     def setNumberOfSubdivisions(self, _number):
         self.nsudv = _number
@@ -173,8 +178,10 @@ class Segment:
 
 
 class Line(Segment):
+    __slots__ = ('pt1', 'pt2')
 
     def __init__(self, _pt1=None, _pt2=None):
+        Segment.__init__(self)
         self.pt1 = _pt1
         self.pt2 = _pt2
         self.nPts = 0
@@ -442,7 +449,10 @@ class Line(Segment):
 
 
 class Polyline(Segment):
+    __slots__ = ('pts',)
+
     def __init__(self, _pts=None):
+        Segment.__init__(self)
         self.pts = _pts
         if self.pts is None:
             self.pts = []
@@ -876,6 +886,10 @@ class Polyline(Segment):
 
 
 class Patch:
+    __slots__ = ('pts', 'segments', 'segmentOrients', 'mesh', 'selected',
+                 'holes', 'holesOrients', 'internalSegments',
+                 'internalSegmentsOrients', 'isDeleted', 'face', 'attributes',
+                 'triangles')
 
     def __init__(self):
         self.pts = []  # boundary points
@@ -891,6 +905,8 @@ class Patch:
         self.isDeleted = False
         self.face = None
         self.attributes = []
+        # cached triangulation as flat coordinates [x0, y0, x1, y1, x2, y2, ...]
+        self.triangles = None
 
     def __del__(self):
         if self.mesh:
@@ -917,6 +933,27 @@ class Patch:
     def getMesh(self):
         return self.mesh
 
+    # Returns the cached triangulation of the patch as a flat list of
+    # coordinates, three (x, y) pairs per triangle. Holes are left out and
+    # internal segments are respected. It is only recomputed after the
+    # boundary or the holes of the patch change.
+    def getTriangles(self):
+        if self.triangles is None:
+            pts, triangs = self.triangulate()
+            self.triangles = []
+            for triangle in triangs:
+                for index in triangle:
+                    self.triangles.append(pts[index].getX())
+                    self.triangles.append(pts[index].getY())
+
+        return self.triangles
+
+    # Constrained triangulation of the patch, see
+    # Tesselation.constrainedTriangulation
+    def triangulate(self):
+        return Tesselation.constrainedTriangulation(
+            self.pts, self.boundaryHole(), self.boundaryInternalSegments())
+
     def getBoundBox(self):
 
         if len(self.pts) == 0:
@@ -942,14 +979,17 @@ class Patch:
         self.segments = _boundarysegments.copy()
         self.segmentOrients = _isOriented.copy()
         self.pts = self.boundaryPolygon()
+        self.triangles = None
 
     def setHoles(self, _holessegments, _isOriented):
         self.holes = _holessegments
         self.holesOrients = _isOriented
+        self.triangles = None
 
     def setInternalSegments(self, _internalSegments, _isOriented):
         self.internalSegments = _internalSegments
         self.internalSegmentsOrients = _isOriented
+        self.triangles = None
 
     def isPointInside(self, _pt):
         numIntersec = 0
@@ -1023,7 +1063,7 @@ class Patch:
     def Area(self):
         Area = 0
         pts = self.pts
-        triangs = Tesselation.triangleParing(pts)
+        triangs = Tesselation.earClipping(pts)
         for j in range(0, len(triangs)):
             a = Point(pts[triangs[j][0]].getX(),
                       pts[triangs[j][0]].getY())
@@ -3272,9 +3312,137 @@ class Tesselation:
                 return False
         return True
 
+    # Ear clipping with a uniform grid over the reflex vertices. Only reflex
+    # vertices can lie inside a candidate ear, so each ear test looks at the
+    # reflex vertices in the grid cells covered by the ear's bounding box
+    # instead of at every remaining polygon point. Produces the same kind of
+    # output as triangleParing: a list of [left, i, right] index triples for
+    # a counter-clockwise polygon.
+    @staticmethod
+    def earClipping(_p):
+        pn = len(_p)
+        triangs = []
+
+        if pn < 3:
+            return triangs
+
+        xs = [pt.getX() for pt in _p]
+        ys = [pt.getY() for pt in _p]
+        left = [((i-1) + pn) % pn for i in range(0, pn)]
+        right = [((i+1) + pn) % pn for i in range(0, pn)]
+
+        def orient(_a, _b, _c):
+            return ((xs[_a] - xs[_c]) * (ys[_b] - ys[_c]) -
+                    (ys[_a] - ys[_c]) * (xs[_b] - xs[_c]))
+
+        # reflex (or flat) vertices, bucketed in a uniform grid
+        reflex = [orient(left[i], i, right[i]) <= 0.0 for i in range(0, pn)]
+        numReflex = reflex.count(True)
+
+        xmin = min(xs)
+        ymin = min(ys)
+        size = max(max(xs) - xmin, max(ys) - ymin)
+        cells = max(1, int(math.sqrt(numReflex)))
+        cellSize = size / cells if size > 0.0 else 1.0
+
+        grid = {}
+        for i in range(0, pn):
+            if reflex[i]:
+                key = (int((xs[i] - xmin) / cellSize),
+                       int((ys[i] - ymin) / cellSize))
+                grid.setdefault(key, set()).add(i)
+
+        def updateReflex(_i):
+            isReflex = orient(left[_i], _i, right[_i]) <= 0.0
+            if isReflex == reflex[_i]:
+                return
+
+            reflex[_i] = isReflex
+            key = (int((xs[_i] - xmin) / cellSize),
+                   int((ys[_i] - ymin) / cellSize))
+            if isReflex:
+                grid.setdefault(key, set()).add(_i)
+            else:
+                grid[key].discard(_i)
+
+        def isEar(_a, _b, _c):
+            if orient(_a, _b, _c) <= 0.0:
+                return False
+
+            ax, ay = xs[_a], ys[_a]
+            bx, by = xs[_b], ys[_b]
+            cx, cy = xs[_c], ys[_c]
+
+            i0 = int((min(ax, bx, cx) - xmin) / cellSize)
+            i1 = int((max(ax, bx, cx) - xmin) / cellSize)
+            j0 = int((min(ay, by, cy) - ymin) / cellSize)
+            j1 = int((max(ay, by, cy) - ymin) / cellSize)
+
+            for i in range(i0, i1 + 1):
+                for j in range(j0, j1 + 1):
+                    bucket = grid.get((i, j))
+                    if not bucket:
+                        continue
+
+                    for m in bucket:
+                        if m == _a or m == _b or m == _c:
+                            continue
+
+                        mx, my = xs[m], ys[m]
+                        if ((mx == ax and my == ay) or (mx == bx and my == by) or
+                                (mx == cx and my == cy)):
+                            continue
+
+                        # same test as point_in_triangle: points on the
+                        # triangle boundary also block the ear
+                        if ((ax - mx) * (by - my) - (ay - my) * (bx - mx) >= 0.0 and
+                                (bx - mx) * (cy - my) - (by - my) * (cx - mx) >= 0.0 and
+                                (cx - mx) * (ay - my) - (cy - my) * (ax - mx) >= 0.0):
+                            return False
+
+            return True
+
+        remaining = pn
+        i = pn - 1
+        stop = i
+
+        while remaining > 3:
+            i = right[i]
+            clip = isEar(left[i], i, right[i])
+
+            if not clip and i == stop:
+                # a whole turn without ears only happens on degenerate
+                # polygons, clip the current vertex to guarantee progress
+                clip = True
+
+            if clip:
+                triangs.append([left[i], i, right[i]])
+                left[right[i]] = left[i]
+                right[left[i]] = right[i]
+                remaining -= 1
+
+                if reflex[i]:
+                    reflex[i] = False
+                    key = (int((xs[i] - xmin) / cellSize),
+                           int((ys[i] - ymin) / cellSize))
+                    grid[key].discard(i)
+
+                updateReflex(left[i])
+                updateReflex(right[i])
+
+                # skip one vertex so that consecutive ears do not fan out
+                # of the same vertex into long, thin triangles
+                i = right[i]
+                stop = i
+
+        i = right[i]
+        triangs.append([left[i], i, right[i]])
+
+        return triangs
+
     @staticmethod
     def tessellate(_pts):
-        indices = Tesselation.triangleParing(_pts)
+        indices = Tesselation.earClipping(_pts)
         triangs = []
 
         for j in range(0, len(indices)):
@@ -3289,6 +3457,177 @@ class Tesselation:
 
         return triangs
 
+    # Same as tessellate, but returns the triangles as a flat list of
+    # coordinates [x0, y0, x1, y1, x2, y2, ...] instead of Point objects
+    @staticmethod
+    def tessellateCoords(_pts):
+        indices = Tesselation.earClipping(_pts)
+        coords = []
+
+        for triangle in indices:
+            for index in triangle:
+                coords.append(_pts[index].getX())
+                coords.append(_pts[index].getY())
+
+        return coords
+
+    # Constrained triangulation of a region given by its outer boundary, its
+    # holes and its internal segments (as returned by Patch.boundaryPolygon,
+    # Patch.boundaryHole and Patch.boundaryInternalSegments). Every hole and
+    # internal segment loop is bridged to the outer boundary, turning the
+    # region into a single weakly simple polygon that is then ear clipped,
+    # so no triangle covers a hole or crosses an internal segment.
+    # Returns the list of points (boundary, then holes, then internal
+    # segments, in the given order) and the triangles as [i, j, k] indices
+    # into that list.
+    @staticmethod
+    def constrainedTriangulation(_pts, _holes=[], _internalSegments=[]):
+        pts = list(_pts)
+        if len(pts) < 3:
+            return pts, []
+
+        # polygon being built, as indices into pts, in counter-clockwise order
+        polygon = list(range(0, len(pts)))
+        if not CompGeom.isCounterClockwisePolygon(pts):
+            polygon.reverse()
+
+        loops = []
+        for hole in _holes:
+            if len(hole) < 3:
+                continue
+
+            loop = list(range(len(pts), len(pts) + len(hole)))
+            pts.extend(hole)
+
+            # holes are bridged clockwise
+            if CompGeom.isCounterClockwisePolygon(hole):
+                loop.reverse()
+            loops.append((loop, True))
+
+        for segment in _internalSegments:
+            if len(segment) < 2:
+                continue
+
+            loops.append((list(range(len(pts), len(pts) + len(segment))), False))
+            pts.extend(segment)
+
+        # bridge loops from right to left, so that each bridge only has to
+        # look at the boundary merged so far
+        def rightmost(_loop):
+            return max(range(0, len(_loop)), key=lambda k: (
+                pts[_loop[k]].getX(), pts[_loop[k]].getY()))
+
+        loops.sort(key=lambda loop: -pts[loop[0][rightmost(loop[0])]].getX())
+
+        for loop, closed in loops:
+            k = rightmost(loop)
+            at = Tesselation.bridgeVertex(pts, polygon, pts[loop[k]])
+            if at is None:
+                continue
+
+            # walk around the loop starting and ending at its rightmost vertex,
+            # then come back to the bridge vertex; an open segment is walked
+            # out to its last point, back to its first and on to the start
+            if closed:
+                walk = loop[k:] + loop[:k] + [loop[k]]
+            else:
+                walk = loop[k:] + loop[-2::-1] + loop[1:k + 1]
+            bridge = walk + [polygon[at]]
+            polygon[at + 1:at + 1] = bridge
+
+        triangs = Tesselation.earClipping([pts[i] for i in polygon])
+        for triangle in triangs:
+            for m in range(0, 3):
+                triangle[m] = polygon[triangle[m]]
+
+        return pts, triangs
+
+    # Finds a vertex of the counter-clockwise polygon (indices into _pts) that
+    # is visible from point _m, which lies inside the polygon, following the
+    # construction by Eberly: a ray is cast from _m in the +x direction to the
+    # closest boundary edge, and the endpoint of that edge is replaced by the
+    # reflex vertex inside the resulting triangle that makes the smallest angle
+    # with the ray, if there is one. Returns the position in _polygon.
+    @staticmethod
+    def bridgeVertex(_pts, _polygon, _m):
+        mx = _m.getX()
+        my = _m.getY()
+        n = len(_polygon)
+
+        # closest intersection of the ray with an upward polygon edge
+        best = None
+        ix = None
+        for k in range(0, n):
+            a = _pts[_polygon[k]]
+            b = _pts[_polygon[(k + 1) % n]]
+            if not (a.getY() <= my <= b.getY()) or a.getY() == b.getY():
+                continue
+
+            x = a.getX() + (my - a.getY()) * (b.getX() - a.getX()) / (b.getY() - a.getY())
+            if x < mx or (ix is not None and x >= ix):
+                continue
+
+            ix = x
+            if my == a.getY():
+                best = k
+            elif my == b.getY():
+                best = (k + 1) % n
+            else:
+                best = k if a.getX() > b.getX() else (k + 1) % n
+
+        if best is None:
+            return None
+
+        # look for reflex vertices inside the triangle (m, i, p)
+        p = _pts[_polygon[best]]
+        i = Point(ix, my)
+        if Point.area2d(_m, i, p) != 0.0:
+            if Point.area2d(_m, i, p) > 0.0:
+                tri = [_m, i, p]
+            else:
+                tri = [_m, p, i]
+
+            tan = None
+            for k in range(0, n):
+                v = _pts[_polygon[k]]
+                if v.getX() == p.getX() and v.getY() == p.getY():
+                    continue
+                if not Tesselation.point_in_triangle(v, tri):
+                    continue
+
+                prev = _pts[_polygon[(k - 1) % n]]
+                next = _pts[_polygon[(k + 1) % n]]
+                if Point.area2d(prev, v, next) > 0.0:
+                    continue
+
+                dx = v.getX() - mx
+                if dx <= 0.0:
+                    continue
+
+                vtan = abs(v.getY() - my) / dx
+                if tan is None or vtan < tan or (vtan == tan and v.getX() < p.getX()):
+                    tan = vtan
+                    best = k
+                    p = v
+
+        # when the bridge vertex appears more than once (a previous bridge
+        # passes through it) pick the occurrence whose wedge contains _m
+        for k in range(0, n):
+            if _polygon[k] != _polygon[best]:
+                continue
+
+            prev = _pts[_polygon[(k - 1) % n]]
+            next = _pts[_polygon[(k + 1) % n]]
+            left1 = Point.area2d(prev, p, _m) >= 0.0
+            left2 = Point.area2d(p, next, _m) >= 0.0
+            if Point.area2d(prev, p, next) >= 0.0:
+                if left1 and left2:
+                    return k
+            elif left1 or left2:
+                return k
+
+        return best
+
 
 # ----------------------------------------------------------------------------
 # ----------------------------------------------------------------------------
@@ -3301,6 +3640,8 @@ class Tesselation:
 
 # Linkedlist superclass declaration
 class Linkedlist:
+    __slots__ = ('prev', 'next')
+
     def __init__(self, prev=None, next=None):
 
         self.prev = prev
@@ -3314,6 +3655,7 @@ class Linkedlist:
 
 # Vertex class declaration
 class Vertex(Linkedlist):
+    __slots__ = ('point', 'he', 'ID')
 
     def __init__(self, point=None, he=None):
         Linkedlist.__init__(self)
@@ -3383,6 +3725,7 @@ class Vertex(Linkedlist):
 
 
 class HalfEdge(Linkedlist):
+    __slots__ = ('vertex', 'edge', 'loop', 'ID')
 
     def __init__(self, vertex=None, loop=None, edge=None, prev=None, next=None):
         Linkedlist.__init__(self, prev, next)
@@ -3436,6 +3779,7 @@ class HalfEdge(Linkedlist):
 
 # Edge class declaration
 class Edge(Linkedlist):
+    __slots__ = ('segment', 'he1', 'he2', 'ID')
 
     def __init__(self, segment=None, he1=None, he2=None):
         Linkedlist.__init__(self)
@@ -3515,6 +3859,7 @@ class Edge(Linkedlist):
 
 # Loop class declaration
 class Loop():
+    __slots__ = ('prev', 'next', 'face', 'he', 'isClosed', 'ID')
 
     def __init__(self, face=None, he=None, prev=None, next=None):
         self.prev = prev
@@ -3548,6 +3893,7 @@ class Loop():
 
 
 class Face(Linkedlist):
+    __slots__ = ('shell', 'loop', 'intLoops', 'patch', 'ID')
 
     def __init__(self, shell=None, loop=None, prev=None, next=None, patch=None):
         Linkedlist.__init__(self, prev, next)
@@ -3653,7 +3999,16 @@ class Face(Linkedlist):
             if he == he_init:
                 break
 
+        # keeps the patch (and its cached triangulation) if the loop still has
+        # the same segments in the same order
+        segments = self.patch.segments
+        if (len(bound) == len(segments) and
+                all(a is b for a, b in zip(bound, segments)) and
+                orientation == self.patch.segmentOrients):
+            return False
+
         self.patch.setBoundary(bound, orientation)
+        return True
 
     def updateHoles(self):
         loop = self.loop.next
@@ -3699,13 +4054,86 @@ class Face(Linkedlist):
 
 
 # Shell class declaration
+# List of model entities with O(1) append, O(1) removal and iteration in
+# insertion order. Removed entities leave holes that iteration skips. Holes are
+# squeezed out before indexing at positions other than the ends, and when they
+# outnumber the entities, so a batch of removals costs one compaction instead
+# of one linear search each. Entities are told apart by identity, not by ==
+# (Point compares coordinates).
+class EntityList:
+
+    HOLE = object()
+
+    def __init__(self, _items=()):
+        self.items = []
+        self.slots = {}  # id(entity) -> position in items
+        self.holes = 0
+
+        for item in _items:
+            self.append(item)
+
+    def __len__(self):
+        return len(self.items) - self.holes
+
+    def __iter__(self):
+        if self.holes == 0:
+            return iter(self.items)
+
+        return (item for item in self.items if item is not EntityList.HOLE)
+
+    def __contains__(self, _item):
+        return id(_item) in self.slots
+
+    def __getitem__(self, _index):
+        if self.holes > 0:
+            # the first and last entities are found without compacting
+            if _index == 0 and len(self) > 0:
+                return next(iter(self))
+            if _index == -1 and len(self) > 0:
+                for item in reversed(self.items):
+                    if item is not EntityList.HOLE:
+                        return item
+
+            self.compact()
+
+        return self.items[_index]
+
+    def append(self, _item):
+        if self.holes > 32 and 2 * self.holes > len(self.items):
+            self.compact()
+
+        self.slots[id(_item)] = len(self.items)
+        self.items.append(_item)
+
+    def remove(self, _item):
+        slot = self.slots.pop(id(_item), None)
+        if slot is None:
+            raise ValueError('EntityList.remove(x): x not in list')
+
+        self.items[slot] = EntityList.HOLE
+        self.holes += 1
+
+    def clear(self):
+        self.items = []
+        self.slots = {}
+        self.holes = 0
+
+    def compact(self):
+        if self.holes == 0:
+            return
+
+        self.items = [item for item in self.items if item is not EntityList.HOLE]
+        self.slots = {id(item): i for i, item in enumerate(self.items)}
+        self.holes = 0
+
+
 class Shell:
 
     def __init__(self, face=None):
         self.face = face
-        self.vertices = []
-        self.edges = []
-        self.faces = []
+        self.vertices = EntityList()
+        self.edges = EntityList()
+        self.faces = EntityList()
         self.num_vertices = 0
         self.num_edges = 0
         self.num_faces = -1
@@ -5158,7 +5586,7 @@ class HeFile():
         json.dump(shell, file, indent=4)
         file.close()
 
-    @ staticmethod
+    @staticmethod
     def loadFile(_file):
         with open(_file, 'r') as file:
             input = json.load(file)
@@ -5168,16 +5596,24 @@ class HeFile():
         faces = input['faces']
         attributes = input['attributes_list']
 
+        # ID -> entity tables, so that every reference in the file is
+        # resolved with a single lookup instead of a scan of the whole list
+        attributes_map = {}
+        for attribute in attributes:
+            attributes_map.setdefault(attribute['name'], attribute)
+
         # creates the shell
         shell = Shell()
 
         # creates the edges
+        edges_map = {}
         for edge_dict in edges:
             edge = Edge()
             edge.ID = edge_dict['ID']
 
             # creates a key for the edge
             edge_dict['edge'] = edge
+            edges_map[edge.ID] = edge_dict
 
             # set edge segment
             edge_pts = edge_dict['points']
@@ -5197,9 +5633,8 @@ class HeFile():
             # set segment attributes
             att_names = edge_dict['attributes']['att_names']
             for att_name in att_names:
-                for attribute in attributes:
-                    if att_name == attribute['name']:
-                        segment.attributes.append(attribute)
+                if att_name in attributes_map:
+                    segment.attributes.append(attributes_map[att_name])
 
             if edge_dict['attributes']['nsudv'] is not None:
                 segment.setNumberOfSubdivisions(
@@ -5207,12 +5642,14 @@ class HeFile():
                 segment.attributes.append(edge_dict['attributes']['nsudv'])
 
         # creates the vertices
+        vertices_map = {}
         for vertex_dict in vertices:
             vertex = Vertex()
             vertex.ID = vertex_dict['ID']
 
             # creates a key for the vertex
             vertex_dict['vertex'] = vertex
+            vertices_map[vertex.ID] = vertex_dict
 
             # set the point
             pt = vertex_dict['point']
@@ -5221,9 +5658,8 @@ class HeFile():
             # set point attributes
             att_names = vertex_dict['attributes']['att_names']
             for att_name in att_names:
-                for attribute in attributes:
-                    if att_name == attribute['name']:
-                        vertex.point.attributes.append(attribute)
+                if att_name in attributes_map:
+                    vertex.point.attributes.append(attributes_map[att_name])
 
         # creates the faces
         for face_dict in faces:
@@ -5234,9 +5670,8 @@ class HeFile():
             # set patch attributes
             att_names = face_dict['attributes']['att_names']
             for att_name in att_names:
-                for attribute in attributes:
-                    if att_name == attribute['name']:
-                        face.patch.attributes.append(attribute)
+                if att_name in attributes_map:
+                    face.patch.attributes.append(attributes_map[att_name])
 
             # creates a key for the face
             face_dict['face'] = face
@@ -5250,47 +5685,8 @@ class HeFile():
             # creates the half-edges
             he_dicts = loop_dict['he_loop']
             if he_dicts is not None:
-                for he_dict in he_dicts:
-                    he = HalfEdge()
-                    he.ID = he_dict['ID']
-                    he.loop = loop
-
-                    # creates a key for the he
-                    he_dict['he'] = he
-
-                    # set he.vertex and vertex.he
-                    for vertex_dict in vertices:
-                        if he_dict['vertex_ID'] == vertex_dict['ID']:
-                            he.vertex = vertex_dict['vertex']
-
-                            if vertex_dict['he_ID'] == he.ID:
-                                he.vertex.he = he
-
-                            break
-
-                    # set he.edge and edge.he(1 or 2)
-                    for edge_dict in edges:
-                        if he_dict['edge_ID'] == edge_dict['ID']:
-                            he.edge = edge_dict['edge']
-
-                            if edge_dict['he1_ID'] == he.ID:
-                                he.edge.he1 = he
-                                he.edge.segment.setInitPoint(he.vertex.point)
-                            else:
-                                he.edge.he2 = he
-                                he.edge.segment.setEndPoint(he.vertex.point)
-
-                            break
-
-                # set he.prev/next
-                he_dicts[0]['he'].prev = he_dicts[-1]['he']
-                he_dicts[-1]['he'].next = he_dicts[0]['he']
-                for i in range(1, len(he_dicts)):
-                    he_dicts[i]['he'].prev = he_dicts[i-1]['he']
-                    he_dicts[i-1]['he'].next = he_dicts[i]['he']
-
-                # set loop.he
-                loop.he = he_dicts[0]['he']
+                loop.he = HeFile.loadHalfEdges(
+                    he_dicts, loop, vertices_map, edges_map)
 
             # creates internal loops
             intLoops_list = []
@@ -5304,45 +5700,8 @@ class HeFile():
 
                 # creates the half-edges
                 he_dicts = intLoop_dict['he_loop']
-                for he_dict in he_dicts:
-                    he = HalfEdge()
-                    he.ID = he_dict['ID']
-                    he.loop = intLoop
-
-                    # creates a key for the he
-                    he_dict['he'] = he
-
-                    # set he.vertex and vertex.he
-                    for vertex_dict in vertices:
-                        if he_dict['vertex_ID'] == vertex_dict['ID']:
-                            he.vertex = vertex_dict['vertex']
-
-                            if vertex_dict['he_ID'] == he.ID:
-                                he.vertex.he = he
-
-                            break
-
-                    # set he.edge and edge.he(1 or 2)
-                    for edge_dict in edges:
-                        if he_dict['edge_ID'] == edge_dict['ID']:
-                            he.edge = edge_dict['edge']
-
-                            if edge_dict['he1_ID'] == he.ID:
-                                he.edge.he1 = he
-                                he.edge.segment.setInitPoint(he.vertex.point)
-                            else:
-                                he.edge.he2 = he
-                                he.edge.segment.setEndPoint(he.vertex.point)
-
-                # set he.prev/next
-                he_dicts[0]['he'].prev = he_dicts[-1]['he']
-                he_dicts[-1]['he'].next = he_dicts[0]['he']
-                for i in range(1, len(he_dicts)):
-                    he_dicts[i]['he'].prev = he_dicts[i-1]['he']
-                    he_dicts[i-1]['he'].next = he_dicts[i]['he']
-
-                # set loop.he
-                intLoop.he = he_dicts[0]['he']
+                intLoop.he = HeFile.loadHalfEdges(
+                    he_dicts, intLoop, vertices_map, edges_map)
 
             # set loop.prev/next
             if len(intLoops_list) > 0:
@@ -5367,6 +5726,281 @@ class HeFile():
 
         return vertices, edges, faces, attributes
 
+    # Creates the half-edges of a loop read from file and links them to their
+    # vertices and edges through the ID tables built by loadFile. Returns the
+    # first half-edge of the loop.
+    @staticmethod
+    def loadHalfEdges(_he_dicts, _loop, _vertices_map, _edges_map):
+        hes = []
+        for he_dict in _he_dicts:
+            he = HalfEdge()
+            he.ID = he_dict['ID']
+            he.loop = _loop
+            hes.append(he)
+
+            # creates a key for the he
+            he_dict['he'] = he
+
+            # set he.vertex and vertex.he
+            vertex_dict = _vertices_map.get(he_dict['vertex_ID'])
+            if vertex_dict is not None:
+                he.vertex = vertex_dict['vertex']
+
+                if vertex_dict['he_ID'] == he.ID:
+                    he.vertex.he = he
+
+            # set he.edge and edge.he(1 or 2)
+            edge_dict = _edges_map.get(he_dict['edge_ID'])
+            if edge_dict is not None:
+                he.edge = edge_dict['edge']
+
+                if edge_dict['he1_ID'] == he.ID:
+                    he.edge.he1 = he
+                    he.edge.segment.setInitPoint(he.vertex.point)
+                else:
+                    he.edge.he2 = he
+                    he.edge.segment.setEndPoint(he.vertex.point)
+
+        # set he.prev/next
+        hes[0].prev = hes[-1]
+        hes[-1].next = hes[0]
+        for i in range(1, len(hes)):
+            hes[i].prev = hes[i-1]
+            hes[i-1].next = hes[i]
+
+        return hes[0]
+
+
+# ----------------------------------------------------------------------------
+# ----------------------------------------------------------------------------
+# ----------------------------------------------------------------------------
+# ------------------------------- SPATIAL INDEX ------------------------------
+# ----------------------------------------------------------------------------
+# ----------------------------------------------------------------------------
+# ----------------------------------------------------------------------------
+
+
+# Node of a BVH: a leaf holds one item and its bounding box, an internal node
+# the union of the boxes of its two children. Boxes are (xmin, xmax, ymin, ymax)
+class BVHNode:
+    __slots__ = ('box', 'item', 'order', 'parent', 'child1', 'child2', 'height')
+
+    def __init__(self, _box, _item=None, _order=0):
+        self.box = _box
+        self.item = _item
+        self.order = _order
+        self.parent = None
+        self.child1 = None
+        self.child2 = None
+        self.height = 0
+
+    def isLeaf(self):
+        return self.child1 is None
+
+
+# Dynamic bounding volume hierarchy (AABB tree) of items with a fixed bounding
+# box. Items are inserted next to the sibling that grows the tree's perimeter the
+# least and the tree is kept balanced with AVL rotations, so insertions, removals
+# and window queries take logarithmic time. Queries return items in the order
+# they were inserted.
+class BVH:
+
+    def __init__(self):
+        self.root = None
+        self.leaves = {}
+        self.count = 0
+
+    def __len__(self):
+        return len(self.leaves)
+
+    def clear(self):
+        self.root = None
+        self.leaves = {}
+
+    @staticmethod
+    def union(_box1, _box2):
+        return (min(_box1[0], _box2[0]), max(_box1[1], _box2[1]),
+                min(_box1[2], _box2[2]), max(_box1[3], _box2[3]))
+
+    @staticmethod
+    def perimeter(_box):
+        return 2.0 * ((_box[1] - _box[0]) + (_box[3] - _box[2]))
+
+    def insert(self, _item, _box):
+        self.count += 1
+        leaf = BVHNode(tuple(_box), _item, self.count)
+        self.leaves[_item] = leaf
+
+        if self.root is None:
+            self.root = leaf
+            return
+
+        # descends to the sibling that minimizes the perimeter of the tree
+        # (half perimeters, inlined as this runs for every inserted entity)
+        xmin, xmax, ymin, ymax = leaf.box
+        node = self.root
+        while node.child1 is not None:
+            x0, x1, y0, y1 = node.box
+            perimeter = (x1 - x0) + (y1 - y0)
+            combined = ((x1 if x1 > xmax else xmax) - (x0 if x0 < xmin else xmin) +
+                        (y1 if y1 > ymax else ymax) - (y0 if y0 < ymin else ymin))
+
+            # cost of making the leaf and this node siblings, and the growth
+            # of its ancestors inherited by descending into its children
+            cost = 2.0 * combined
+            inheritance = 2.0 * (combined - perimeter)
+
+            costs = []
+            for child in (node.child1, node.child2):
+                x0, x1, y0, y1 = child.box
+                growth = ((x1 if x1 > xmax else xmax) - (x0 if x0 < xmin else xmin) +
+                          (y1 if y1 > ymax else ymax) - (y0 if y0 < ymin else ymin))
+                if child.child1 is not None:
+                    growth -= (x1 - x0) + (y1 - y0)
+                costs.append(growth + inheritance)
+
+            if cost < costs[0] and cost < costs[1]:
+                break
+
+            node = node.child1 if costs[0] < costs[1] else node.child2
+
+        sibling = node
+        oldParent = sibling.parent
+        newParent = BVHNode(BVH.union(sibling.box, leaf.box))
+        newParent.parent = oldParent
+        newParent.height = sibling.height + 1
+        newParent.child1 = sibling
+        newParent.child2 = leaf
+        sibling.parent = newParent
+        leaf.parent = newParent
+
+        if oldParent is None:
+            self.root = newParent
+        elif oldParent.child1 is sibling:
+            oldParent.child1 = newParent
+        else:
+            oldParent.child2 = newParent
+
+        self.refit(newParent.parent)
+
+    def remove(self, _item):
+        leaf = self.leaves.pop(_item, None)
+        if leaf is None:
+            return
+
+        if leaf is self.root:
+            self.root = None
+            return
+
+        parent = leaf.parent
+        grandParent = parent.parent
+        if parent.child1 is leaf:
+            sibling = parent.child2
+        else:
+            sibling = parent.child1
+
+        sibling.parent = grandParent
+        if grandParent is None:
+            self.root = sibling
+            return
+
+        if grandParent.child1 is parent:
+            grandParent.child1 = sibling
+        else:
+            grandParent.child2 = sibling
+
+        self.refit(grandParent)
+
+    # Rebalances and updates boxes and heights from _node up to the root
+    def refit(self, _node):
+        node = _node
+        while node is not None:
+            node = self.balance(node)
+            a = node.child1.box
+            b = node.child2.box
+            node.box = (a[0] if a[0] < b[0] else b[0], a[1] if a[1] > b[1] else b[1],
+                        a[2] if a[2] < b[2] else b[2], a[3] if a[3] > b[3] else b[3])
+            h1 = node.child1.height
+            h2 = node.child2.height
+            node.height = 1 + (h1 if h1 > h2 else h2)
+            node = node.parent
+
+    # Rotates the taller grandchild of _node up if its children heights differ
+    # by more than one, returning the node now at _node's place
+    def balance(self, _node):
+        a = _node
+        if a.isLeaf() or a.height < 2:
+            return a
+
+        b = a.child1
+        c = a.child2
+        difference = c.height - b.height
+
+        if difference > 1:
+            self.rotate(a, c, b, False)
+            return c
+
+        if difference < -1:
+            self.rotate(a, b, c, True)
+            return b
+
+        return a
+
+    # Moves _up (a child of _node) to _node's place, _node becoming its child
+    # next to _up's taller child. _other is _node's other child
+    def rotate(self, _node, _up, _other, _upIsChild1):
+        f = _up.child1
+        g = _up.child2
+
+        _up.child1 = _node
+        _up.parent = _node.parent
+        _node.parent = _up
+
+        if _up.parent is None:
+            self.root = _up
+        elif _up.parent.child1 is _node:
+            _up.parent.child1 = _up
+        else:
+            _up.parent.child2 = _up
+
+        if f.height > g.height:
+            keep, give = f, g
+        else:
+            keep, give = g, f
+
+        _up.child2 = keep
+        if _upIsChild1:
+            _node.child1 = give
+        else:
+            _node.child2 = give
+        give.parent = _node
+
+        _node.box = BVH.union(_other.box, give.box)
+        _up.box = BVH.union(_node.box, keep.box)
+        _node.height = 1 + max(_other.height, give.height)
+        _up.height = 1 + max(_node.height, keep.height)
+
+    # Items whose boxes overlap the given window (borders included)
+    def query(self, _xmin, _xmax, _ymin, _ymax):
+        leaves = []
+        stack = [self.root] if self.root is not None else []
+
+        while stack:
+            node = stack.pop()
+            box = node.box
+            if (box[0] > _xmax or box[1] < _xmin or
+                    box[2] > _ymax or box[3] < _ymin):
+                continue
+
+            if node.isLeaf():
+                leaves.append(node)
+            else:
+                stack.append(node.child1)
+                stack.append(node.child2)
+
+        leaves.sort(key=lambda leaf: leaf.order)
+        return [leaf.item for leaf in leaves]
+
 
 # ----------------------------------------------------------------------------
 # ----------------------------------------------------------------------------
@@ -5382,10 +6016,17 @@ class HeModel:
     def __init__(self):
         self.shell = None
         self.infinityFace = None
-        self.segments = []
-        self.points = []
+        self.segments = EntityList()
+        self.points = EntityList()
         self.patches = []
         self.updateSortPatches = False
+        # incremented whenever vertices, edges or faces are inserted or removed
+        self.version = 0
+        # bounding box trees of vertices and edges, for window and fence queries
+        self.vertexTree = BVH()
+        self.edgeTree = BVH()
+        # bounding box tree of face boundaries, for point location
+        self.faceTree = BVH()
 
     def insertShell(self, _shell):
         self.shell = _shell
@@ -5394,11 +6035,17 @@ class HeModel:
         self.shell.insertVertex(_vertex)
         self.points.append(_vertex.point)
         _vertex.point.vertex = _vertex
+        x = _vertex.point.getX()
+        y = _vertex.point.getY()
+        self.vertexTree.insert(_vertex, (x, x, y, y))
+        self.version += 1
 
     def insertEdge(self, _edge):
         self.shell.insertEdge(_edge)
         self.segments.append(_edge.segment)
         _edge.segment.edge = _edge
+        self.edgeTree.insert(_edge, _edge.segment.getBoundBox())
+        self.version += 1
 
     def insertFace(self, _face):
 
@@ -5407,12 +6054,16 @@ class HeModel:
 
         self.shell.insertFace(_face)
         _face.patch.face = _face
+        self.updateFaceTree(_face)
         self.updateSortPatches = True
+        self.version += 1
 
     def removeVertex(self, _vertex):
         _vertex.point.vertex = None
         self.shell.removeVertex(_vertex)
         self.points.remove(_vertex.point)
+        self.vertexTree.remove(_vertex)
+        self.version += 1
 
     def removeFace(self, _face):
         if _face == self.infinityFace:
@@ -5420,12 +6071,37 @@ class HeModel:
 
         self.shell.removeFace(_face)
         _face.patch.face = None
+        self.faceTree.remove(_face)
         self.updateSortPatches = True
+        self.version += 1
 
     def removeEdge(self, _edge):
         self.shell.removeEdge(_edge)
         self.segments.remove(_edge.segment)
         _edge.segment.edge = None
+        self.edgeTree.remove(_edge)
+        self.version += 1
+
+    # Updates the boundary of a face of the model from its outer loop, and its
+    # bounding box in the face tree if the boundary changed
+    def updateFaceBoundary(self, _face):
+        if _face.updateBoundary() or _face not in self.faceTree.leaves:
+            self.updateFaceTree(_face)
+
+    def updateFaceTree(self, _face):
+        # the infinity face contains everything outside the other faces
+        if _face == self.infinityFace:
+            self.faceTree.remove(_face)
+            return
+
+        box = _face.patch.getBoundBox()
+        leaf = self.faceTree.leaves.get(_face)
+        if leaf is not None and box is not None and leaf.box == tuple(box):
+            return
+
+        self.faceTree.remove(_face)
+        if box is not None:
+            self.faceTree.insert(_face, box)
 
     def removeShell(self):
         self.shell = None
@@ -5439,9 +6115,13 @@ class HeModel:
     def clearAll(self):
         self.shell = None
         self.infinityFace = None
-        self.segments = []
-        self.points = []
+        self.segments = EntityList()
+        self.points = EntityList()
         self.patches = []
+        self.vertexTree.clear()
+        self.edgeTree.clear()
+        self.faceTree.clear()
+        self.version += 1
 
     def getPoints(self):
         return self.points
@@ -5497,25 +6177,16 @@ class HeModel:
         return selectedFaces
 
     def verticesCrossingWindow(self, _xmin, _xmax, _ymin, _ymax):
-        vertices = []
         # search the points that are contained in the given rectangle
-        vertices_list = self.shell.vertices
-        for vertex in vertices_list:
-            if _xmin <= vertex.point.getX() and _xmax >= vertex.point.getX():
-                if _ymin <= vertex.point.getY() and _ymax >= vertex.point.getY():
-                    # then point is in window
-                    vertices.append(vertex)
-
-        vertices = list(set(vertices))
-
-        return vertices
+        return self.vertexTree.query(_xmin, _xmax, _ymin, _ymax)
 
     def edgesInWindow(self, _xmin, _xmax, _ymin, _ymax):
 
         edges_targets = []
 
-        # search the edges that are contained in the given rectangle
-        edges_list = self.shell.edges
+        # search the edges that are contained in the given rectangle, among
+        # the ones whose bounding boxes overlap it
+        edges_list = self.edgeTree.query(_xmin, _xmax, _ymin, _ymax)
         for edge in edges_list:
             edge_segment = edge.segment
             edg_xmin, edg_xmax, edg_ymin, edg_ymax = edge_segment.getBoundBox()
@@ -5529,27 +6200,17 @@ class HeModel:
 
     def edgesCrossingFence(self, _fence):
 
-        edges_targets = []
-
         xmin, xmax, ymin, ymax = _fence.getBoundBox()
 
         # get segments crossing fence's bounding box
-        edges_list = self.shell.edges
-        for edge in edges_list:
-            segment = edge.segment
-            segment_xmin, segment_xmax, segment_ymin, segment_ymax = segment.getBoundBox()
-
-            if not (xmax < segment_xmin or segment_xmax < xmin or
-                    ymax < segment_ymin or segment_ymax < ymin):
-                edges_targets.append(edge)
+        edges_list = self.edgeTree.query(xmin, xmax, ymin, ymax)
 
         # Checks if the segment intersects the _fence
-        for edge in edges_targets:
+        edges_targets = []
+        for edge in edges_list:
             status, pi, param1, param2 = _fence.intersectSegment(edge.segment)
-
-            # If it does not, remove the edge from edgesInFence and go to next edge
-            if not status:
-                edges_targets.remove(edge)
+            if status:
+                edges_targets.append(edge)
 
         return edges_targets
 
@@ -5579,16 +6240,112 @@ class HeModel:
         return edges
 
     def whichFace(self, _pt):
-        face = self.infinityFace.next
-
-        while face is not None:
+        # only faces whose boundary bounding box contains the point can
+        # contain it
+        x = _pt.getX()
+        y = _pt.getY()
+        for face in self.faceTree.query(x, x, y, y):
             if face.patch.isPointInside(_pt):
                 return face
 
-            face = face.next
-
         return self.infinityFace
 
+    # ------------------------- TOPOLOGICAL QUERIES ---------------------------
+    # Used by HeView, HeArrayModel answers the same ones from its arrays
+
+    def getIncidentSegmentsFromPoint(self, _point):
+        incidentEdges = _point.vertex.incidentEdges()
+        incidentSegments = []
+
+        for edge in incidentEdges:
+            incidentSegments.append(edge.segment)
+
+        return incidentSegments
+
+    def getIncidentPatchesFromPoint(self, _point):
+        incidentFaces = _point.vertex.incidentFaces()
+        incidentPatches = []
+
+        for face in incidentFaces:
+            if len(face.patch.segments) > 0:
+                incidentPatches.append(face.patch)
+
+        return incidentPatches
+
+    def getAdjacentPointsFromPoint(self, _point):
+        adjacentVertices = _point.vertex.adjacentVertices()
+        adjacentPoints = []
+
+        for vertex in adjacentVertices:
+            adjacentPoints.append(vertex.point)
+
+        return adjacentPoints
+
+    def getAdjacentSegmentsFromSegment(self, _segment):
+        adjacentEdges = _segment.edge.adjacentEdges()
+        adjacentSegments = []
+
+        for edge in adjacentEdges:
+            adjacentSegments.append(edge.segment)
+
+        return adjacentSegments
+
+    def getIncidentPatchesFromSegment(self, _segment):
+        incidentFaces = _segment.edge.incidentFaces()
+        adjacentPatches = []
+
+        for face in incidentFaces:
+            if len(face.patch.segments) > 0:
+                adjacentPatches.append(face.patch)
+
+        return adjacentPatches
+
+    def getIncidentPointsFromSegment(self, _segment):
+        incidentVertices = _segment.edge.incidentVertices()
+        adjacentPoints = []
+
+        for vertex in incidentVertices:
+            adjacentPoints.append(vertex.point)
+
+        return adjacentPoints
+
+    def getIncidentSegmentsFromPatch(self, _patch):
+        incidentEdges = _patch.face.incidentEdges()
+        adjacentSegments = []
+
+        for edge in incidentEdges:
+            adjacentSegments.append(edge.segment)
+
+        return adjacentSegments
+
+    def getAdjacentPatchesFromPatch(self, _patch):
+        adjacentFaces = _patch.face.adjacentFaces()
+        adjacentPatches = []
+
+        for face in adjacentFaces:
+            if len(face.patch.segments) > 0:
+                adjacentPatches.append(face.patch)
+
+        return adjacentPatches
+
+    def getIncidentPointsFromPatch(self, _patch):
+        incidentVertices = _patch.face.incidentVertices()
+        adjacentPoints = []
+
+        for vertex in incidentVertices:
+            adjacentPoints.append(vertex.point)
+
+        return adjacentPoints
+
+    def getInternalPacthesFromPatch(self, _patch):
+        internalFaces = _patch.face.internalFaces()
+        internalPatches = []
+
+        for face in internalFaces:
+            internalPatches.append(face.patch)
+
+        return internalPatches
+
     def sortPatches(self):
         patchesWithoutHoles = []
         facesWithHoles = []
@@ -5632,6 +6389,350 @@ class HeModel:
         return sort_patches
 
 
+# ----------------------------------------------------------------------------
+# ----------------------------------------------------------------------------
+# ----------------------------------------------------------------------------
+# ---------------------------- HEARRAYMODEL CLASS ----------------------------
+# ----------------------------------------------------------------------------
+# ----------------------------------------------------------------------------
+# ----------------------------------------------------------------------------
+
+
+# Read-only backend holding the topology of a HeModel in integer-indexed NumPy
+# arrays. Vertices, half-edges, edges, loops and faces are numbered in the order
+# of the model's lists and linked by index (-1 for none):
+#   vertexXY (nv, 2), vertexHe
+#   heNext, hePrev, heTwin, heVertex, heLoop, heEdge (an isolated vertex has a
+#   half-edge without edge that is its own twin)
+#   edgeHe (ne, 2), the half-edges he1 and he2 of each edge
+#   loopFace, loopHe, loopNext, loopIsClosed
+#   faceLoop, the outer loop of each face (face 0 is the infinite face)
+# Points, segments and patches are the model's own objects, so it can be
+# wrapped by a HeView like a HeModel. The arrays are rebuilt lazily whenever
+# the model's version changes.
+# The arrays serve whole-model queries: the canvas culls and draws segments and
+# points from segmentEndPoints and vertexXY. Per-entity HeView queries walk list
+# copies of the same tables, as stepping through NumPy scalars is slow, and are
+# still about twice as slow as on the HeModel itself, which is better suited to
+# them.
+class HeArrayModel:
+
+    def __init__(self, _hemodel):
+        self.hemodel = _hemodel
+        self.version = None
+        self.update()
+
+    def update(self):
+        if self.version == self.hemodel.version:
+            return
+
+        self.version = self.hemodel.version
+
+        # same order as the lists of the model, so both backends list points
+        # and segments alike
+        self.pointList = list(self.hemodel.points)
+        self.segmentList = list(self.hemodel.segments)
+        self.vertices = [point.vertex for point in self.pointList]
+        self.edges = [segment.edge for segment in self.segmentList]
+        if self.hemodel.isEmpty():
+            self.faces = []
+        else:
+            self.faces = list(self.hemodel.shell.faces)
+
+        # entities are numbered by identity, as in EntityList
+        vertexIndex = {id(vertex): i for i, vertex in enumerate(self.vertices)}
+        edgeIndex = {id(edge): i for i, edge in enumerate(self.edges)}
+        faceIndex = {id(face): i for i, face in enumerate(self.faces)}
+
+        # loops of every face, outer loop first, and the half-edges of each
+        loops = []
+        for face in self.faces:
+            loop = face.loop
+            while loop is not None:
+                loops.append(loop)
+                loop = loop.next
+        loopIndex = {id(loop): i for i, loop in enumerate(loops)}
+
+        hes = []
+        for loop in loops:
+            he = loop.he
+            if he is None:
+                continue
+            while True:
+                hes.append(he)
+                he = he.next
+                if he == loop.he:
+                    break
+        heIndex = {id(he): i for i, he in enumerate(hes)}
+
+        def index(_table, _entity):
+            return _table.get(id(_entity), -1) if _entity is not None else -1
+
+        self.vertexXY = np.array([[p.getX(), p.getY()] for p in self.pointList],
+                                 dtype=np.float64).reshape(-1, 2)
+        self.vertexHe = np.array([index(heIndex, v.he) for v in self.vertices], dtype=np.int64)
+
+        self.heNext = np.array([heIndex[id(he.next)] for he in hes], dtype=np.int64)
+        self.hePrev = np.array([heIndex[id(he.prev)] for he in hes], dtype=np.int64)
+        self.heTwin = np.array([heIndex[id(he.mate())] for he in hes], dtype=np.int64)
+        self.heVertex = np.array([index(vertexIndex, he.vertex) for he in hes], dtype=np.int64)
+        self.heLoop = np.array([loopIndex[id(he.loop)] for he in hes], dtype=np.int64)
+        self.heEdge = np.array([index(edgeIndex, he.edge) for he in hes], dtype=np.int64)
+
+        self.edgeHe = np.array([[heIndex[id(e.he1)], heIndex[id(e.he2)]] for e in self.edges],
+                               dtype=np.int64).reshape(-1, 2)
+
+        self.loopFace = np.array([faceIndex[id(loop.face)] for loop in loops], dtype=np.int64)
+        self.loopHe = np.array([index(heIndex, loop.he) for loop in loops], dtype=np.int64)
+        self.loopNext = np.array([index(loopIndex, loop.next) for loop in loops], dtype=np.int64)
+        self.loopIsClosed = np.array([loop.isClosed for loop in loops], dtype=bool)
+
+        self.faceLoop = np.array([loopIndex[id(face.loop)] for face in self.faces], dtype=np.int64)
+
+        # list copies walked by the per-entity queries
+        self.vertexHeList = self.vertexHe.tolist()
+        self.heNextList = self.heNext.tolist()
+        self.heTwinList = self.heTwin.tolist()
+        self.heVertexList = self.heVertex.tolist()
+        self.heLoopList = self.heLoop.tolist()
+        self.heEdgeList = self.heEdge.tolist()
+        self.edgeHeList = self.edgeHe.tolist()
+        self.loopFaceList = self.loopFace.tolist()
+        self.loopHeList = self.loopHe.tolist()
+        self.loopNextList = self.loopNext.tolist()
+        self.loopIsClosedList = self.loopIsClosed.tolist()
+        self.faceLoopList = self.faceLoop.tolist()
+
+        self.pointIndex = {id(point): i for i, point in enumerate(self.pointList)}
+        self.segmentIndex = {id(segment): i for i, segment in enumerate(self.segmentList)}
+        self.patchIndex = {id(face.patch): i for i, face in enumerate(self.faces)}
+
+    # points, segments and patches are read as attributes by HeView, as they
+    # are on HeModel
+    @property
+    def points(self):
+        self.update()
+        return self.pointList
+
+    @property
+    def segments(self):
+        self.update()
+        return self.segmentList
+
+    @property
+    def patches(self):
+        return self.hemodel.getPatches()
+
+    def getPoints(self):
+        return self.points
+
+    def getSegments(self):
+        return self.segments
+
+    def getPatches(self):
+        return self.patches
+
+    def isEmpty(self):
+        return self.hemodel.isEmpty()
+
+    # ------------------------ WHOLE MODEL QUERIES ------------------------
+
+    # (ne, 2) indices of the points at the start and end of every segment
+    def segmentPointIndices(self):
+        self.update()
+        return self.heVertex[self.edgeHe]
+
+    # (ne, 4) coordinates x0, y0, x1, y1 of the end points of every segment
+    def segmentEndPoints(self):
+        ends = self.segmentPointIndices()
+        return np.hstack((self.vertexXY[ends[:, 0]], self.vertexXY[ends[:, 1]]))
+
+    # (ne, 2) indices of the faces on the left (he1) and right (he2) of every
+    # segment
+    def segmentFaceIndices(self):
+        self.update()
+        return self.loopFace[self.heLoop[self.edgeHe]]
+
+    def pointsInWindow(self, _xmin, _xmax, _ymin, _ymax):
+        self.update()
+        x = self.vertexXY[:, 0]
+        y = self.vertexXY[:, 1]
+        inside = (x >= _xmin) & (x <= _xmax) & (y >= _ymin) & (y <= _ymax)
+        return [self.pointList[i] for i in np.flatnonzero(inside)]
+
+    # Closest point to (_x, _y) closer than _tol, or None
+    def closestPoint(self, _x, _y, _tol):
+        self.update()
+        if len(self.pointList) == 0:
+            return None
+
+        d = np.hypot(self.vertexXY[:, 0] - _x, self.vertexXY[:, 1] - _y)
+        i = int(np.argmin(d))
+        return self.pointList[i] if d[i] < _tol else None
+
+    # -------------------------- TRAVERSALS ----------------------------
+
+    # Half-edges leaving vertex _v, turning around it as Vertex.incidentEdges
+    def vertexHalfEdges(self, _v):
+        heNext = self.heNextList
+        heTwin = self.heTwinList
+        he_begin = self.vertexHeList[_v]
+        he = he_begin
+        hes = []
+
+        while True:
+            hes.append(he)
+            he = heNext[heTwin[he]]
+            if he == he_begin:
+                break
+
+        return hes
+
+    # Half-edges of loop _l
+    def loopHalfEdges(self, _l):
+        heNext = self.heNextList
+        he_begin = self.loopHeList[_l]
+        he = he_begin
+        hes = []
+
+        if he < 0:
+            return hes
+
+        while True:
+            hes.append(he)
+            he = heNext[he]
+            if he == he_begin:
+                break
+
+        return hes
+
+    # Non-negative indices of _indices without repeats, in order of appearance
+    @staticmethod
+    def unique(_indices):
+        seen = set()
+        unique = []
+        for i in _indices:
+            if i >= 0 and i not in seen:
+                seen.add(i)
+                unique.append(i)
+
+        return unique
+
+    def facePatches(self, _faces):
+        patches = []
+        for f in _faces:
+            patch = self.faces[f].patch
+            if len(patch.segments) > 0:
+                patches.append(patch)
+
+        return patches
+
+    # --------------------- TOPOLOGICAL QUERIES (HeView) ---------------------
+
+    def getIncidentSegmentsFromPoint(self, _point):
+        self.update()
+        hes = self.vertexHalfEdges(self.pointIndex[id(_point)])
+        heEdge = self.heEdgeList
+        edges = HeArrayModel.unique(heEdge[he] for he in hes)
+        return [self.segmentList[e] for e in edges]
+
+    def getIncidentPatchesFromPoint(self, _point):
+        self.update()
+        hes = self.vertexHalfEdges(self.pointIndex[id(_point)])
+        heLoop = self.heLoopList
+        loopFace = self.loopFaceList
+        faces = HeArrayModel.unique(loopFace[heLoop[he]] for he in hes)
+        return self.facePatches(faces)
+
+    def getAdjacentPointsFromPoint(self, _point):
+        self.update()
+        v = self.pointIndex[id(_point)]
+        hes = self.vertexHalfEdges(v)
+        heVertex = self.heVertexList
+        heTwin = self.heTwinList
+        vertices = [heVertex[heTwin[he]] for he in hes]
+        return [self.pointList[u] for u in vertices if u != v]
+
+    def getAdjacentSegmentsFromSegment(self, _segment):
+        self.update()
+        he1, he2 = self.edgeHeList[self.segmentIndex[id(_segment)]]
+        heNext = self.heNextList
+        heTwin = self.heTwinList
+        heEdge = self.heEdgeList
+        edges = []
+
+        # same walk as Edge.adjacentEdges
+        for he_from, he_to in ((he1, he2), (he2, he1)):
+            he = heNext[he_from]
+            if he != he_from:
+                while he != he_to:
+                    edges.append(heEdge[he])
+                    he = heNext[heTwin[he]]
+
+        return [self.segmentList[e] for e in edges]
+
+    def getIncidentPatchesFromSegment(self, _segment):
+        self.update()
+        heLoop = self.heLoopList
+        loopFace = self.loopFaceList
+        hes = self.edgeHeList[self.segmentIndex[id(_segment)]]
+        faces = HeArrayModel.unique(loopFace[heLoop[he]] for he in hes)
+        return self.facePatches(faces)
+
+    def getIncidentPointsFromSegment(self, _segment):
+        self.update()
+        heVertex = self.heVertexList
+        hes = self.edgeHeList[self.segmentIndex[id(_segment)]]
+        return [self.pointList[heVertex[he]] for he in hes]
+
+    def getIncidentSegmentsFromPatch(self, _patch):
+        self.update()
+        hes = self.loopHalfEdges(self.faceLoopList[self.patchIndex[id(_patch)]])
+        heEdge = self.heEdgeList
+        return [self.segmentList[heEdge[he]] for he in hes]
+
+    def getAdjacentPatchesFromPatch(self, _patch):
+        self.update()
+        f = self.patchIndex[id(_patch)]
+        hes = self.loopHalfEdges(self.faceLoopList[f])
+        heLoop = self.heLoopList
+        heTwin = self.heTwinList
+        loopFace = self.loopFaceList
+        faces = (loopFace[heLoop[heTwin[he]]] for he in hes)
+        return self.facePatches(HeArrayModel.unique(g for g in faces if g != f))
+
+    def getIncidentPointsFromPatch(self, _patch):
+        self.update()
+        hes = self.loopHalfEdges(self.faceLoopList[self.patchIndex[id(_patch)]])
+        heVertex = self.heVertexList
+        return [self.pointList[heVertex[he]] for he in hes]
+
+    def getInternalPacthesFromPatch(self, _patch):
+        self.update()
+        heLoop = self.heLoopList
+        heTwin = self.heTwinList
+        loopFace = self.loopFaceList
+        loopHe = self.loopHeList
+        loopNext = self.loopNextList
+        loopIsClosed = self.loopIsClosedList
+        patches = []
+
+        # same walk as Face.internalFaces
+        loop = loopNext[self.faceLoopList[self.patchIndex[id(_patch)]]]
+        while loop >= 0:
+            for he in self.loopHalfEdges(loop):
+                mate_loop = heLoop[heTwin[he]]
+                if mate_loop != loop:
+                    if loopIsClosed[mate_loop]:
+                        first_mate = heTwin[loopHe[loop]]
+                        patches.append(self.faces[loopFace[heLoop[first_mate]]].patch)
+                        break
+
+            loop = loopNext[loop]
+
+        return patches
+
+
 # ----------------------------------------------------------------------------
 # ----------------------------------------------------------------------------
 # ----------------------------------------------------------------------------
@@ -5766,7 +6867,7 @@ class HeController:
 
         faces = self.hemodel.shell.faces
         for i in range(1, len(faces)):
-            faces[i].updateBoundary()
+            self.hemodel.updateFaceBoundary(faces[i])
             faces[i].updateHoles()
 
         # update internal loops of infinite Face
@@ -5920,7 +7021,7 @@ class HeController:
                     insertFace.execute()
                     self.undoredo.insertOperation(insertFace)
 
-                    mef.face.updateBoundary()
+                    self.hemodel.updateFaceBoundary(mef.face)
 
                     inner_loops = self.findInnerLoops(
                         existent_face, mef.face, existent_loop)
@@ -6018,7 +7119,7 @@ class HeController:
                 insertFace.execute()
                 self.undoredo.insertOperation(insertFace)
 
-                mef.face.updateBoundary()
+                self.hemodel.updateFaceBoundary(mef.face)
 
                 inner_loops = self.findInnerLoops(
                     existent_face, mef.face, existent_loop)
@@ -6126,6 +7227,8 @@ class HeController:
 
         selectedEdges = self.hemodel.selectedEdges()
         selectedVertices = self.hemodel.selectedVertices()
+        # for constant time membership tests
+        selectedVerticesSet = set(selectedVertices)
 
         incidentVertices = []
         for edge in selectedEdges:
@@ -6136,7 +7239,7 @@ class HeController:
         incidentVertices = list(set(incidentVertices))  # removes duplicates
 
         for vertex in incidentVertices:
-            if vertex not in selectedVertices:
+            if vertex not in selectedVerticesSet:
                 self.killVertex(vertex)
 
         for vertex in selectedVertices:
@@ -6151,7 +7254,7 @@ class HeController:
                     self.killEdge(edge)
 
                     for incidentVertex in vertices:
-                        if incidentVertex not in selectedVertices:
+                        if incidentVertex not in selectedVerticesSet:
                             self.killVertex(incidentVertex)
 
                 self.killVertex(vertex)
@@ -7391,94 +8494,31 @@ class HeView:
         return True, xClst, yClst
 
     def getIncidentSegmentsFromPoint(self, _point):
-        incidentEdges = _point.vertex.incidentEdges()
-        incidentSegments = []
-
-        for edge in incidentEdges:
-            incidentSegments.append(edge.segment)
-
-        return incidentSegments
+        return self.hemodel.getIncidentSegmentsFromPoint(_point)
 
     def getIncidentPatchesFromPoint(self, _point):
-        incidentFaces = _point.vertex.incidentFaces()
-        incidentPatches = []
-
-        for face in incidentFaces:
-            if len(face.patch.segments) > 0:
-                incidentPatches.append(face.patch)
-
-        return incidentPatches
+        return self.hemodel.getIncidentPatchesFromPoint(_point)
 
     def getAdjacentPointsFromPoint(self, _point):
-        adjacentVertices = _point.vertex.adjacentVertices()
-        adjacentPoints = []
-
-        for vertex in adjacentVertices:
-            adjacentPoints.append(vertex.point)
-
-        return adjacentPoints
+        return self.hemodel.getAdjacentPointsFromPoint(_point)
 
     def getAdjacentSegmentsFromSegment(self, _segment):
-        adjacentEdges = _segment.edge.adjacentEdges()
-        adjacentSegments = []
-
-        for edge in adjacentEdges:
-            adjacentSegments.append(edge.segment)
-
-        return adjacentSegments
+        return self.hemodel.getAdjacentSegmentsFromSegment(_segment)
 
     def getIncidentPatchesFromSegment(self, _segment):
-        incidentFaces = _segment.edge.incidentFaces()
-        adjacentPatches = []
-
-        for face in incidentFaces:
-            if len(face.patch.segments) > 0:
-                adjacentPatches.append(face.patch)
-
-        return adjacentPatches
+        return self.hemodel.getIncidentPatchesFromSegment(_segment)
 
     def getIncidentPointsFromSegment(self, _segment):
-        incidentVertices = _segment.edge.incidentVertices()
-        adjacentPoints = []
-
-        for vertex in incidentVertices:
-            adjacentPoints.append(vertex.point)
-
-        return adjacentPoints
+        return self.hemodel.getIncidentPointsFromSegment(_segment)
 
     def getIncidentSegmentsFromPatch(self, _patch):
-        incidentEdges = _patch.face.incidentEdges()
-        adjacentSegments = []
-
-        for edge in incidentEdges:
-            adjacentSegments.append(edge.segment)
-
-        return adjacentSegments
+        return self.hemodel.getIncidentSegmentsFromPatch(_patch)
 
     def getAdjacentPatchesFromPatch(self, _patch):
-        adjacentFaces = _patch.face.adjacentFaces()
-        adjacentPatches = []
-
-        for face in adjacentFaces:
-            if len(face.patch.segments) > 0:
-                adjacentPatches.append(face.patch)
-
-        return adjacentPatches
+        return self.hemodel.getAdjacentPatchesFromPatch(_patch)
 
     def getIncidentPointsFromPatch(self, _patch):
-        incidentVertices = _patch.face.incidentVertices()
-        adjacentPoints = []
-
-        for vertex in incidentVertices:
-            adjacentPoints.append(vertex.point)
-
-        return adjacentPoints
+        return self.hemodel.getIncidentPointsFromPatch(_patch)
 
     def getInternalPacthesFromPatch(self, _patch):
-        internalFaces = _patch.face.internalFaces()
-        internalPatches = []
-
-        for face in internalFaces:
-            internalPatches.append(face.patch)
-
-        return internalPatches
+        return self.hemodel.getInternalPacthesFromPatch(_patch)
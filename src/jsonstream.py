@@ -0,0 +1,165 @@
+import json
+import re
+import numpy as np
+
+# Incremental reader for particle field JSON files (data.json / result.json), both the indented files written by the
+# canvas and the compact single-line ones written by the Julia solvers.
+# The file is read <chunkSize> characters at a time and every array is parsed chunk by chunk straight into a
+# preallocated typed array, so peak memory stays close to the size of the arrays themselves instead of the several
+# times larger lists of Python objects built by json.load. Scalars are returned as json.load would return them.
+
+ARRAYS = {'x': np.float64, 'y': np.float64, 'i': np.int32, 'j': np.int32, 't': np.float64}
+COUNT = re.compile(r'"n"\s*:\s*(\d+)')
+
+
+class JSONStreamReader:
+    def __init__(self, filename, chunkSize=1 << 20):
+        self.filename = filename
+        self.chunkSize = chunkSize
+        self.file = None
+        self.buffer = ''
+        self.position = 0
+        self.n = None
+
+    # Reads the next chunk into the buffer, dropping what was already consumed. Returns False at end of file
+
+    def fill(self):
+        chunk = self.file.read(self.chunkSize)
+        if not chunk:
+            return False
+
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    # Next character that is not whitespace, without consuming it
+
+    def peek(self):
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position].isspace():
+                self.position += 1
+
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+
+            if not self.fill():
+                raise ValueError('Unexpected end of {}'.format(self.filename))
+
+    def expect(self, character):
+        if self.peek() != character:
+            raise ValueError('Expected {!r} at {!r} in {}'.format(character, self.buffer[self.position:self.position + 20], self.filename))
+        self.position += 1
+
+    # Text from the current position up to (not including) the first of <characters>, which is left unconsumed
+
+    def readUntil(self, characters):
+        while True:
+            ends = [self.buffer.find(c, self.position) for c in characters]
+            ends = [end for end in ends if end >= 0]
+            if ends:
+                end = min(ends)
+                text = self.buffer[self.position:end]
+                self.position = end
+                return text
+
+            if not self.fill():
+                raise ValueError('Unexpected end of {}'.format(self.filename))
+
+    def readKey(self):
+        self.expect('"')
+        key = self.readUntil('"')
+        self.position += 1
+        self.expect(':')
+        return key
+
+    def readScalar(self):
+        self.peek()
+        return json.loads(self.readUntil(',}').strip())
+
+    # Number of particles, looked up ahead in the file when an array comes before "n"
+
+    def count(self):
+        if self.n is None:
+            tail = ''
+            with open(self.filename) as infile:
+                while self.n is None:
+                    chunk = infile.read(self.chunkSize)
+                    if not chunk:
+                        raise ValueError('No "n" in {}'.format(self.filename))
+
+                    # A match running to the end of the text may be cut, its number can continue in the next chunk
+                    text = tail + chunk
+                    match = COUNT.search(text)
+                    if match and match.end() < len(text):
+                        self.n = int(match.group(1))
+                    tail = text[-64:]
+
+        return self.n
+
+    # Parses the array at the current position into a new array of <dtype> with self.count() elements
+
+    def readArray(self, dtype):
+        array = np.empty(self.count(), dtype=dtype)
+        size = 0
+
+        def parse(text):
+            nonlocal size
+            values = np.fromstring(text.replace('null', 'nan'), dtype=np.float64, sep=',')
+            array[size:size + len(values)] = values
+            size += len(values)
+
+        self.expect('[')
+        while True:
+            end = self.buffer.find(']', self.position)
+            if end >= 0:
+                parse(self.buffer[self.position:end])
+                self.position = end + 1
+                break
+
+            # Parse every complete value in the buffer, keeping the one that may continue in the next chunk
+            last = self.buffer.rfind(',', self.position)
+            if last >= 0:
+                parse(self.buffer[self.position:last])
+                self.position = last + 1
+
+            if not self.fill():
+                raise ValueError('Unexpected end of {}'.format(self.filename))
+
+        if size != len(array):
+            raise ValueError('Array with {} values in {}, expected {}'.format(size, self.filename, len(array)))
+
+        return array
+
+    # Dictionary with the same keys as json.load would return, arrays in ARRAYS as NumPy arrays
+
+    def read(self):
+        data = {}
+
+        with open(self.filename) as infile:
+            self.file = infile
+            self.buffer = ''
+            self.position = 0
+
+            self.expect('{')
+            if self.peek() == '}':
+                return data
+
+            while True:
+                key = self.readKey()
+
+                if self.peek() == '[':
+                    if key not in ARRAYS:
+                        raise ValueError('Unexpected array {!r} in {}'.format(key, self.filename))
+                    data[key] = self.readArray(ARRAYS[key])
+                else:
+                    data[key] = self.readScalar()
+                    if key == 'n':
+                        self.n = data[key]
+
+                if self.peek() == '}':
+                    break
+                self.expect(',')
+
+        self.file = None
+        self.buffer = ''
+        return data
@@ -29,6 +29,7 @@ class MyMainWindow(MainWindow):
         self.navbar.button8.clicked.connect(lambda: qApp.quit())
 
         self.canvas.cursorSignal.connect(self.setLabel)
+        self.canvas.solveSignal.connect(self.status.solveLabel.setText)
 
     def keyPressEvent(self, event: QtGui.QKeyEvent):
         #print('keyPressEvent: event.key() = {}'.format(event.key()))
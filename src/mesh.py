@@ -0,0 +1,113 @@
+import numpy as np
+
+# Regular mesh generation over the patches of a Hetool model.
+# Each row of the grid is intersected once with every boundary and hole of every patch, and the cells whose centers
+# fall inside a patch (and outside all of its holes) are filled span by span. The inside test follows the same
+# crossing rules as Segment.ray / Patch.isPointInside, so the result matches testing every cell individually.
+
+
+# Edges of a closed loop of segments as arrays x1, y1, x2, y2
+
+def loopEdges(segments):
+    x1 = []
+    y1 = []
+    x2 = []
+    y2 = []
+
+    for segment in segments:
+        pts = segment.getPoints()
+        for k in range(len(pts) - 1):
+            x1.append(pts[k].getX())
+            y1.append(pts[k].getY())
+            x2.append(pts[k + 1].getX())
+            y2.append(pts[k + 1].getY())
+
+    return np.array(x1), np.array(y1), np.array(x2), np.array(y2)
+
+
+# Sorted x coordinates where the horizontal line at height y crosses the loop, counted as in Segment.ray:
+# horizontal edges are ignored and an edge counts when its lower end is on or below the line and its upper end above it
+
+def crossings(edges, y):
+    x1, y1, x2, y2 = edges
+
+    active = (np.minimum(y1, y2) <= y) & (y < np.maximum(y1, y2))
+    x1 = x1[active]
+    y1 = y1[active]
+    x2 = x2[active]
+    y2 = y2[active]
+
+    xc = x1 + (y - y1) * (x1 - x2) / (y1 - y2)
+    xc = np.where(y == y2, x2, xc)
+    xc.sort()
+
+    return xc
+
+
+# Mask of <xs> that lie inside the loop whose crossings with the row are <xc> (odd number of crossings to the right)
+
+def insideSpans(xc, xs):
+    return (len(xc) - np.searchsorted(xc, xs, side='right')) % 2 == 1
+
+
+# Grid coordinates starting at <start> + <step> / 2 and going up to <stop>, accumulated the same way the canvas always did
+
+def gridCoordinates(start, stop, step):
+    coords = []
+
+    c = start + step / 2.0
+    while c <= stop:
+        coords.append(c)
+        c += step
+
+    return np.array(coords)
+
+
+# Centers (x, y) and indices (i, j), starting at 1, of the <dx> by <dy> cells of the box (L, R, B, T) that lie inside
+# any of <patches>. The box defaults to the bounding box of the patches.
+
+def regularMesh(patches, dx, dy, box=None):
+    if box is None:
+        boxes = [patch.getBoundBox() for patch in patches]
+        boxes = [b for b in boxes if b is not None]
+        if not boxes:
+            return np.empty(0), np.empty(0), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)
+
+        box = (min(b[0] for b in boxes), max(b[1] for b in boxes), min(b[2] for b in boxes), max(b[3] for b in boxes))
+
+    L, R, B, T = box
+
+    regions = [(loopEdges(patch.getSegments()), [loopEdges(hole) for hole in patch.holes]) for patch in patches]
+
+    xs = gridCoordinates(L, R, dx)
+    ys = gridCoordinates(B, T, dy)
+    columns = np.arange(1, len(xs) + 1, dtype=np.int32)
+
+    X = []
+    Y = []
+    I = []
+    J = []
+
+    for row, y in enumerate(ys.tolist()):
+        inside = np.zeros(len(xs), dtype=bool)
+
+        for boundary, holes in regions:
+            region = insideSpans(crossings(boundary, y), xs)
+            for hole in holes:
+                if not region.any():
+                    break
+                region &= ~insideSpans(crossings(hole, y), xs)
+
+            inside |= region
+
+        count = np.count_nonzero(inside)
+        if count:
+            X.append(xs[inside])
+            Y.append(np.full(count, y))
+            I.append(np.full(count, row + 1, dtype=np.int32))
+            J.append(columns[inside])
+
+    if not X:
+        return np.empty(0), np.empty(0), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)
+
+    return np.concatenate(X), np.concatenate(Y), np.concatenate(I), np.concatenate(J)
@@ -0,0 +1,300 @@
+import json
+import math
+import os
+import tempfile
+import numpy as np
+
+from jsonstream import JSONStreamReader
+
+# Particle field of a regular mesh, stored as contiguous column arrays.
+# x, y are the particle centers, i, j their row and column in the mesh and t their temperature (NaN if unknown).
+# Reads and writes the same JSON schema used by the Julia solvers (data.json / result.json), where unknown
+# temperatures are null, and a binary format (.pfb) made of a small JSON header followed by the raw little-endian
+# columns, which is opened through memory maps instead of being parsed.
+
+BINARY_EXTENSION = '.pfb'
+BINARY_MAGIC = b'PFIELD01'
+BINARY_ALIGNMENT = 64  # Columns start at multiples of this many bytes
+BINARY_COLUMNS = [('x', '<f8'), ('y', '<f8'), ('i', '<i4'), ('j', '<i4'), ('t', '<f8')]
+BOUNDS = ['minx', 'miny', 'mini', 'minj', 'mint', 'maxx', 'maxy', 'maxi', 'maxj', 'maxt']
+
+
+class ParticleField:
+    # <bounds>, a dict with the min and max values, skips computing them from the arrays
+
+    def __init__(self, x=(), y=(), i=(), j=(), t=None, dx=1.0, dy=1.0, bounds=None):
+        self.x = np.ascontiguousarray(x, dtype=np.float64)
+        self.y = np.ascontiguousarray(y, dtype=np.float64)
+        self.i = np.ascontiguousarray(i, dtype=np.int32)
+        self.j = np.ascontiguousarray(j, dtype=np.int32)
+
+        if t is None:
+            self.t = np.full(len(self.x), np.nan)
+        else:
+            self.t = np.ascontiguousarray(t, dtype=np.float64)
+
+        self.dx = float(dx)
+        self.dy = float(dy)
+
+        self.version = 0  # Incremented whenever the particles or their temperatures change
+        self.latticeVersion = None  # Version the lattice order was built for
+
+        if bounds is None:
+            self.updateMinMax()
+        else:
+            for key in BOUNDS:
+                setattr(self, key, bounds[key])
+
+    @property
+    def n(self):
+        return len(self.x)
+
+    def __len__(self):
+        return len(self.x)
+
+    # Mask of particles with known temperature
+    def known(self):
+        return ~np.isnan(self.t)
+
+    # Updates min and max values of X, Y, I, J and T (None when there are no values)
+
+    def updateMinMax(self):
+        self.version += 1
+
+        if self.n == 0:
+            self.minx = self.miny = self.mini = self.minj = self.mint = None
+            self.maxx = self.maxy = self.maxi = self.maxj = self.maxt = None
+            return
+
+        self.minx = float(self.x.min())
+        self.miny = float(self.y.min())
+        self.mini = int(self.i.min())
+        self.minj = int(self.j.min())
+
+        self.maxx = float(self.x.max())
+        self.maxy = float(self.y.max())
+        self.maxi = int(self.i.max())
+        self.maxj = int(self.j.max())
+
+        known = self.t[self.known()]
+        if len(known) == 0:
+            self.mint = None
+            self.maxt = None
+        else:
+            self.mint = float(known.min())
+            self.maxt = float(known.max())
+
+    # Indices of the particles whose centers lie inside the rectangle [l, r] x [b, t]
+
+    def select(self, l, r, b, t):
+        inside = (l <= self.x) & (self.x <= r) & (b <= self.y) & (self.y <= t)
+        return np.flatnonzero(inside)
+
+    # Independent copy of the field
+
+    def copy(self):
+        return ParticleField(self.x.copy(), self.y.copy(), self.i.copy(), self.j.copy(), self.t.copy(), self.dx, self.dy)
+
+    # New field with only the particles in <mask> (boolean mask or index array)
+
+    def filter(self, mask):
+        return ParticleField(self.x[mask], self.y[mask], self.i[mask], self.j[mask], self.t[mask], self.dx, self.dy)
+
+    # Removes the particles at <indices>
+
+    def delete(self, indices):
+        keep = np.ones(self.n, dtype=bool)
+        keep[np.asarray(indices, dtype=np.intp)] = False
+
+        self.x = self.x[keep]
+        self.y = self.y[keep]
+        self.i = self.i[keep]
+        self.j = self.j[keep]
+        self.t = self.t[keep]
+        self.updateMinMax()
+
+    # Sets the temperature of the particles at <indices> to <t> (None or NaN for unknown)
+
+    def assign(self, indices, t):
+        self.t[np.asarray(indices, dtype=np.intp)] = np.nan if t is None else t
+        self.updateMinMax()
+
+    # ----- Lattice -----
+
+    # Particles sorted by lattice cell, row by row: (order, keys), where keys[k] is the cell of particle order[k].
+    # Rebuilt only when the field changes.
+
+    def lattice(self):
+        if self.latticeVersion != self.version:
+            width = self.maxj - self.minj + 1 if self.n else 1
+            keys = (self.i.astype(np.int64) - (self.mini or 0)) * width + (self.j - (self.minj or 0))
+            self.latticeOrder = np.argsort(keys, kind='stable')
+            self.latticeKeys = keys[self.latticeOrder]
+            self.latticeVersion = self.version
+
+        return self.latticeOrder, self.latticeKeys
+
+    # Rows ilo..ihi and columns jlo..jhi of the particles overlapping the rectangle [l, r] x [b, t], for particles on
+    # the regular mesh x = minx + (j - minj) dx, y = miny + (i - mini) dy
+
+    def latticeWindow(self, l, r, b, t):
+        if self.n == 0:
+            return 0, -1, 0, -1
+
+        ilo = max(self.mini, math.ceil((b - self.dy / 2.0 - self.miny) / self.dy) + self.mini)
+        ihi = min(self.maxi, math.floor((t + self.dy / 2.0 - self.miny) / self.dy) + self.mini)
+        jlo = max(self.minj, math.ceil((l - self.dx / 2.0 - self.minx) / self.dx) + self.minj)
+        jhi = min(self.maxj, math.floor((r + self.dx / 2.0 - self.minx) / self.dx) + self.minj)
+        return ilo, ihi, jlo, jhi
+
+    # Ranges (first, count) of the lattice order holding the particles in rows ilo..ihi and columns jlo..jhi, one range
+    # per non empty row
+
+    def windowRanges(self, ilo, ihi, jlo, jhi):
+        if self.n == 0 or ilo > ihi or jlo > jhi:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        order, keys = self.lattice()
+        width = self.maxj - self.minj + 1
+        rows = np.arange(ilo, ihi + 1, dtype=np.int64) - self.mini
+
+        first = np.searchsorted(keys, rows * width + (jlo - self.minj), side='left')
+        last = np.searchsorted(keys, rows * width + (jhi - self.minj), side='right')
+        count = last - first
+
+        return first[count > 0], count[count > 0]
+
+    # Indices of the particles in rows ilo..ihi and columns jlo..jhi
+
+    def window(self, ilo, ihi, jlo, jhi):
+        first, count = self.windowRanges(ilo, ihi, jlo, jhi)
+        if len(count) == 0:
+            return np.empty(0, dtype=np.intp)
+
+        order, _ = self.lattice()
+        starts = np.repeat(first - np.cumsum(count) + count, count)
+        return order[starts + np.arange(count.sum())]
+
+    # ----- JSON -----
+
+    def toDict(self):
+        t = self.t.astype(object)
+        t[np.isnan(self.t)] = None
+
+        data = {
+            'n': self.n,
+            'dx': self.dx,
+            'dy': self.dy,
+
+            'minx': self.minx,
+            'miny': self.miny,
+            'mini': self.mini,
+            'minj': self.minj,
+            'mint': self.mint,
+
+            'maxx': self.maxx,
+            'maxy': self.maxy,
+            'maxi': self.maxi,
+            'maxj': self.maxj,
+            'maxt': self.maxt,
+
+            'x': self.x.tolist(),
+            'y': self.y.tolist(),
+            'i': self.i.tolist(),
+            'j': self.j.tolist(),
+            't': t.tolist()
+        }
+        return data
+
+    @staticmethod
+    def fromDict(data):
+        # None (null) becomes NaN when converted to a float array
+        return ParticleField(data['x'], data['y'], data['i'], data['j'],
+                             np.asarray(data['t'], dtype=np.float64), data['dx'], data['dy'])
+
+    # Saves to <filename>, in the binary format if it ends with BINARY_EXTENSION and as JSON otherwise
+
+    def save(self, filename, indent=4):
+        if filename.endswith(BINARY_EXTENSION):
+            self.saveBinary(filename)
+            return
+
+        with open(filename, 'w') as outfile:
+            json.dump(self.toDict(), outfile, indent=indent)
+
+    @staticmethod
+    def load(filename):
+        if filename.endswith(BINARY_EXTENSION):
+            return ParticleField.loadBinary(filename)
+
+        return ParticleField.fromDict(JSONStreamReader(filename).read())
+
+    # ----- Binary -----
+
+    # Layout: BINARY_MAGIC, header length (little-endian uint32), JSON header padded with spaces, then every column of
+    # BINARY_COLUMNS at the offset given in the header
+
+    def saveBinary(self, filename):
+        header = {'n': self.n, 'dx': self.dx, 'dy': self.dy}
+        for key in BOUNDS:
+            header[key] = getattr(self, key)
+
+        # Header size depends on the offsets written in it, so grow it until the offsets fit
+        size = BINARY_ALIGNMENT
+        while True:
+            offset = size
+            columns = []
+            for name, dtype in BINARY_COLUMNS:
+                columns.append({'name': name, 'dtype': dtype, 'offset': offset})
+                offset += self.n * np.dtype(dtype).itemsize
+                offset += -offset % BINARY_ALIGNMENT
+
+            header['columns'] = columns
+            text = json.dumps(header).encode('utf-8')
+            if len(BINARY_MAGIC) + 4 + len(text) <= size:
+                break
+            size += BINARY_ALIGNMENT
+
+        # Written next to <filename> and moved over it, so columns still mapped from <filename> (a field loaded from
+        # the file being overwritten) keep reading the old file instead of a truncated one
+        descriptor, temporary = tempfile.mkstemp(suffix=BINARY_EXTENSION, dir=os.path.dirname(os.path.abspath(filename)))
+        try:
+            with os.fdopen(descriptor, 'wb') as outfile:
+                outfile.write(BINARY_MAGIC)
+                outfile.write(np.uint32(size - len(BINARY_MAGIC) - 4).astype('<u4').tobytes())
+                outfile.write(text.ljust(size - len(BINARY_MAGIC) - 4))
+
+                for column in columns:
+                    outfile.seek(column['offset'])
+                    outfile.write(np.ascontiguousarray(getattr(self, column['name']), dtype=column['dtype']).tobytes())
+
+                outfile.truncate(offset)
+
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(temporary, 0o666 & ~umask)  # mkstemp creates it readable by the owner only
+            os.replace(temporary, filename)
+        except BaseException:
+            os.remove(temporary)
+            raise
+
+    # Opens a binary file. Columns are copy-on-write memory maps: edits stay in memory and never touch the file
+
+    @staticmethod
+    def loadBinary(filename):
+        with open(filename, 'rb') as infile:
+            if infile.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+                raise ValueError('{} is not a particle field file'.format(filename))
+
+            length = int(np.frombuffer(infile.read(4), dtype='<u4')[0])
+            header = json.loads(infile.read(length).decode('utf-8'))
+
+        n = header['n']
+        arrays = {}
+        for column in header['columns']:
+            if n == 0:
+                arrays[column['name']] = np.empty(0, dtype=column['dtype'])
+            else:
+                arrays[column['name']] = np.memmap(filename, dtype=column['dtype'], mode='c', offset=column['offset'], shape=(n,))
+
+        return ParticleField(arrays['x'], arrays['y'], arrays['i'], arrays['j'], arrays['t'], header['dx'], header['dy'], header)
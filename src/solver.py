@@ -0,0 +1,471 @@
+import hashlib
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.linalg import spsolve, splu
+
+from particles import ParticleField
+
+# Steady-state heat (Laplace) solver for a ParticleField.
+# Builds the same 5-point stencil system as mainv1.jl: every particle with unknown temperature gets the block
+# (c1, c2, c3, c4, c5) on itself and its left, right, bottom and top neighbours, a neighbour with known temperature
+# moves its temperature to b, and every particle with known temperature becomes an identity row.
+
+
+# Raised when an iterative solve stops before its residual is below the tolerance, so a partial iterate is never
+# taken for a solution
+
+class NotConverged(RuntimeError):
+    def __init__(self, iterations, residual):
+        super().__init__('No convergence after {} iterations, residual {:.2e}'.format(iterations, residual))
+        self.iterations = iterations
+        self.residual = residual
+
+
+# Raised when the callback of a solve asks it to stop
+
+class Cancelled(Exception):
+    pass
+
+
+# Stencil coefficients, h ~ dx, k ~ dy: middle, left, right, bottom, top
+
+def block(h, k):
+    c1 = 2.0 * ((h / k) ** 2.0 + 1)
+    c2 = -(h / k) ** 2.0
+    c3 = c2
+    c4 = -1.0
+    c5 = c4
+
+    return np.array([c1, c2, c3, c4, c5])
+
+
+# Neighbours of every particle as an (n, 4) array of indices (left, right, bottom, top), -1 where there is none
+
+def connect(i, j):
+    n = len(i)
+    if n == 0:
+        return np.empty((0, 4), dtype=np.intp)
+
+    i = np.asarray(i, dtype=np.int64)
+    j = np.asarray(j, dtype=np.int64)
+
+    # Unique key per (i, j) cell, with a margin of one cell on every side so neighbours never wrap around
+    imin = i.min()
+    jmin = j.min()
+    width = j.max() - jmin + 3
+
+    def key(i, j):
+        return (i - imin + 1) * width + (j - jmin + 1)
+
+    keys = key(i, j)
+    order = np.argsort(keys, kind='stable')
+    sortedKeys = keys[order]
+
+    offsets = [(0, -1), (0, 1), (-1, 0), (1, 0)]  # Left, Right, Bottom, Top
+    neighbours = np.full((n, 4), -1, dtype=np.intp)
+
+    for column, (di, dj) in enumerate(offsets):
+        target = key(i + di, j + dj)
+        position = np.searchsorted(sortedKeys, target)
+        position = np.minimum(position, n - 1)
+        found = sortedKeys[position] == target
+        neighbours[found, column] = order[position[found]]
+
+    return neighbours
+
+
+# Sparse matrices A and B (CSR) of the system for <field>, where b = B t with unknown temperatures taken as zero.
+# Both depend only on the mesh, on which particles are known and on dx / dy, not on the known temperatures themselves.
+
+def system(field):
+    n = field.n
+    coefficients = block(field.dx, field.dy)
+
+    known = field.known()
+    unknown = ~known
+    neighbours = connect(field.i, field.j)
+
+    rows = [np.flatnonzero(known), np.flatnonzero(unknown)]
+    columns = [rows[0], rows[1]]
+    values = [np.ones(len(rows[0])), np.full(len(rows[1]), coefficients[0])]
+
+    # Known particle: its own temperature
+    brows = [rows[0]]
+    bcolumns = [rows[0]]
+
+    for column in range(4):
+        node = neighbours[:, column]
+        exists = unknown & (node >= 0)
+
+        # Unknown neighbour: coefficient in A
+        coupled = exists.copy()
+        coupled[exists] = unknown[node[exists]]
+        rows.append(np.flatnonzero(coupled))
+        columns.append(node[coupled])
+        values.append(np.full(np.count_nonzero(coupled), coefficients[column + 1]))
+
+        # Known neighbour: its temperature goes to b
+        fixed = exists & ~coupled
+        brows.append(np.flatnonzero(fixed))
+        bcolumns.append(node[fixed])
+
+    A = coo_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(columns))), shape=(n, n))
+
+    brows = np.concatenate(brows)
+    B = coo_matrix((np.ones(len(brows)), (brows, np.concatenate(bcolumns))), shape=(n, n))
+
+    return A.tocsr(), B.tocsr()
+
+
+# Known temperatures of <field>, zero where unknown
+
+def knownTemperatures(field):
+    return np.where(field.known(), field.t, 0.0)
+
+
+# Sparse matrix A (CSR) and vector b of the system for <field>
+
+def assemble(field):
+    A, B = system(field)
+    return A, B @ knownTemperatures(field)
+
+
+# Temperatures of every particle of <field> (known ones are kept), either with geometric multigrid or with a direct
+# sparse factorization of the assembled system. Multigrid raises NotConverged or Cancelled instead of returning an
+# unfinished iterate.
+
+def solve(field, method='multigrid', tol=1e-10, callback=None):
+    if field.n == 0:
+        return np.empty(0)
+
+    if method == 'multigrid':
+        return Multigrid(field).solve(tol, callback=callback)
+
+    A, b = assemble(field)
+    return spsolve(A.tocsc(), b)
+
+
+# Solver that keeps the factorized system between solves. As long as the mesh, the set of known particles and dx / dy
+# stay the same, a new solve only builds b from the known temperatures and back-substitutes.
+
+class Session:
+    def __init__(self):
+        self.key = None
+        self.lu = None
+        self.A = None
+        self.B = None
+
+    # Identifies the system of <field>: particle lattice, known particles and dx / dy
+
+    @staticmethod
+    def topology(field):
+        digest = hashlib.sha1()
+        digest.update(np.ascontiguousarray(field.i).tobytes())
+        digest.update(np.ascontiguousarray(field.j).tobytes())
+        digest.update(np.packbits(field.known()).tobytes())
+        digest.update(np.array([field.n, field.dx, field.dy]).tobytes())
+        return digest.hexdigest()
+
+    def factorize(self, field):
+        self.A, self.B = system(field)
+        self.lu = splu(self.A.tocsc())
+        self.key = Session.topology(field)
+
+    def isFactorized(self, field):
+        return self.key is not None and self.key == Session.topology(field)
+
+    # Temperatures of every particle of <field>, refactorizing only if its system changed. <callback>(1, residual) is
+    # called with the relative residual of the solution, Cancelled is raised if it returns True.
+
+    def solve(self, field, callback=None):
+        if field.n == 0:
+            return np.empty(0)
+
+        if not self.isFactorized(field):
+            self.factorize(field)
+
+        b = self.B @ knownTemperatures(field)
+        t = self.lu.solve(b)
+
+        if callback is not None:
+            norm = np.linalg.norm(b)
+            if callback(1, np.linalg.norm(b - self.A @ t) / norm if norm > 0.0 else 0.0):
+                raise Cancelled()
+
+        return t
+
+    # Temperatures for several sets of known temperatures at once, given as the columns of the (n, k) array
+    # <temperatures>. All of them must have the same known particles as <field>.
+
+    def solveMany(self, field, temperatures):
+        if not self.isFactorized(field):
+            self.factorize(field)
+
+        known = field.known()
+        b = self.B @ np.where(known[:, None], temperatures, 0.0)
+        return self.lu.solve(b)
+
+
+# Temperatures of <field> after applying <scenario>: either a full array of n temperatures (NaN for unknown) or a
+# sequence of (indices, temperature) assignments on top of the temperatures of <field>, like Canvas.updateSelection
+
+def scenarioTemperatures(field, scenario):
+    try:
+        temperatures = np.asarray(scenario, dtype=np.float64)  # None becomes NaN
+    except (TypeError, ValueError):
+        temperatures = None  # Ragged, a sequence of assignments
+
+    if temperatures is not None and temperatures.shape == (field.n,):
+        return temperatures.copy()
+
+    t = field.t.copy()
+    for indices, temperature in scenario:
+        t[np.asarray(indices, dtype=np.intp)] = np.nan if temperature is None else temperature
+    return t
+
+
+# Solves every scenario of <scenarios> over the mesh of <field> and streams the results to the .npy file <filename>,
+# one row of n temperatures per scenario. Consecutive scenarios with the same known particles share one factorization
+# and are solved together, <batch> right hand sides at a time. <callback>(done, total) is called after each batch and
+# stops the sweep if it returns True, leaving the rows of the scenarios not solved as NaN. Returns the results as a
+# read-only memory map.
+
+def sweep(field, scenarios, filename, batch=64, callback=None):
+    scenarios = list(scenarios)
+    results = np.lib.format.open_memmap(filename, mode='w+', dtype='<f8', shape=(len(scenarios), field.n))
+    results[:] = np.nan
+
+    session = Session()
+    pending = []  # (row, temperatures) waiting to be solved with the current known particles
+    pendingField = None
+    done = 0
+
+    def flush():
+        temperatures = np.column_stack([t for _, t in pending])
+        solution = session.solveMany(pendingField, temperatures)
+        for column, (row, _) in enumerate(pending):
+            results[row] = solution[:, column]
+        pending.clear()
+
+    for row, scenario in enumerate(scenarios):
+        t = scenarioTemperatures(field, scenario)
+        current = ParticleField(field.x, field.y, field.i, field.j, t, field.dx, field.dy)
+
+        if pending and (len(pending) == batch or Session.topology(current) != Session.topology(pendingField)):
+            done += len(pending)
+            flush()
+            if callback is not None and callback(done, len(scenarios)):
+                break
+
+        if not pending:
+            pendingField = current
+        pending.append((row, t))
+
+    if pending:
+        done += len(pending)
+        flush()
+        if callback is not None:
+            callback(done, len(scenarios))
+
+    results.flush()
+    del results
+
+    return np.load(filename, mmap_mode='r')
+
+
+# ----- Multigrid -----
+
+# Geometric multigrid for particles on the regular i/j lattice.
+# The unknown particles are scattered into a padded 2D grid (row i, column j) where known and missing particles are
+# zero, so the stencil can be applied with array slices. Coarse levels keep every other row and column of the finer
+# one (vertex centered), use bilinear prolongation and its transpose as restriction, and are smoothed with red-black
+# Gauss-Seidel. The V-cycle preconditions a conjugate gradient iteration, which keeps convergence robust on irregular
+# domains whose boundaries the coarse grids cannot follow exactly.
+
+COARSEST = 2000  # Maximum number of unknowns solved directly on the coarsest level
+
+
+class MultigridLevel:
+    def __init__(self, mask, coefficients):
+        self.mask = mask  # Unknown cells, False on the border
+        self.n = int(np.count_nonzero(mask))
+        self.c1, self.c2, self.c3, self.c4, self.c5 = coefficients.tolist()
+
+        # Red and black unknown cells of the interior
+        i, j = np.indices((mask.shape[0] - 2, mask.shape[1] - 2))
+        red = (i + j) % 2 == 0
+        interior = mask[1:-1, 1:-1]
+        self.colors = [interior & red, interior & ~red]
+
+        self.lu = None  # Factorization when this is the coarsest level
+        self.cells = None
+
+    # Coarser level keeping every other row and column, padded so its shape stays odd
+
+    def coarsen(self, coefficients):
+        mask = self.mask[::2, ::2]
+        rows = mask.shape[0] + (mask.shape[0] + 1) % 2
+        columns = mask.shape[1] + (mask.shape[1] + 1) % 2
+
+        coarse = np.zeros((rows, columns), dtype=bool)
+        coarse[:mask.shape[0], :mask.shape[1]] = mask
+        return MultigridLevel(coarse, coefficients)
+
+    # A u, for u zero outside the unknown cells
+
+    def apply(self, u):
+        Au = np.zeros_like(u)
+        Au[1:-1, 1:-1] = (self.c1 * u[1:-1, 1:-1] +
+                          self.c2 * u[1:-1, :-2] + self.c3 * u[1:-1, 2:] +
+                          self.c4 * u[:-2, 1:-1] + self.c5 * u[2:, 1:-1])
+        Au[~self.mask] = 0.0
+        return Au
+
+    # Gauss-Seidel sweeps over the cells of <order> colors (0 red, 1 black), in place
+
+    def smooth(self, u, f, order):
+        for color in order:
+            update = (f[1:-1, 1:-1] -
+                      self.c2 * u[1:-1, :-2] - self.c3 * u[1:-1, 2:] -
+                      self.c4 * u[:-2, 1:-1] - self.c5 * u[2:, 1:-1]) / self.c1
+            u[1:-1, 1:-1][self.colors[color]] = update[self.colors[color]]
+
+    # Residual f - A u restricted to the coarse grid of shape <shape> (transpose of prolong)
+
+    def restrict(self, r, shape):
+        rows = 2 * shape[0] - 1
+        columns = 2 * shape[1] - 1
+        fine = np.zeros((rows + 2, columns + 2))
+        fine[1:r.shape[0] + 1, 1:r.shape[1] + 1] = r
+
+        # Weights 1 on the coincident cell, 1/2 on the edge neighbours and 1/4 on the corners
+        center = fine[1:-1:2, 1:-1:2]
+        edges = fine[0:-2:2, 1:-1:2] + fine[2::2, 1:-1:2] + fine[1:-1:2, 0:-2:2] + fine[1:-1:2, 2::2]
+        corners = fine[0:-2:2, 0:-2:2] + fine[0:-2:2, 2::2] + fine[2::2, 0:-2:2] + fine[2::2, 2::2]
+        return center + 0.5 * edges + 0.25 * corners
+
+    # Bilinear interpolation of the coarse correction <e> onto this level
+
+    def prolong(self, e):
+        rows = 2 * e.shape[0] - 1
+        columns = 2 * e.shape[1] - 1
+        fine = np.zeros((rows, columns))
+
+        fine[0::2, 0::2] = e
+        fine[1::2, 0::2] = 0.5 * (e[:-1, :] + e[1:, :])
+        fine[0::2, 1::2] = 0.5 * (e[:, :-1] + e[:, 1:])
+        fine[1::2, 1::2] = 0.25 * (e[:-1, :-1] + e[1:, :-1] + e[:-1, 1:] + e[1:, 1:])
+
+        fine = fine[:self.mask.shape[0], :self.mask.shape[1]]
+        fine[~self.mask] = 0.0
+        return fine
+
+    # Factorizes the stencil restricted to the unknown cells, for the direct solve on the coarsest level
+
+    def factorize(self, dx, dy):
+        self.cells = np.nonzero(self.mask)
+        coarse = ParticleField(np.zeros(self.n), np.zeros(self.n), self.cells[0], self.cells[1], None, dx, dy)
+        A, _ = assemble(coarse)
+        self.lu = splu(A.tocsc())
+
+    def directSolve(self, f):
+        u = np.zeros_like(f)
+        if self.n > 0:
+            u[self.cells] = self.lu.solve(f[self.cells])
+        return u
+
+
+class Multigrid:
+    def __init__(self, field, smoothing=2):
+        self.field = field
+        self.smoothing = smoothing  # Pre and post smoothing sweeps per level
+
+        coefficients = block(field.dx, field.dy)
+
+        # Padded lattice, row i and column j of a particle at cell (i - mini + 1, j - minj + 1)
+        self.rows = field.i - field.mini + 1
+        self.columns = field.j - field.minj + 1
+        shape = (field.maxi - field.mini + 3, field.maxj - field.minj + 3)
+        shape = (shape[0] + (shape[0] + 1) % 2, shape[1] + (shape[1] + 1) % 2)
+
+        known = field.known()
+        unknown = ~known
+        self.unknown = unknown
+
+        mask = np.zeros(shape, dtype=bool)
+        mask[self.rows[unknown], self.columns[unknown]] = True
+
+        # Right hand side, known neighbours contribute their temperature as in assemble
+        t = np.zeros(shape)
+        t[self.rows[known], self.columns[known]] = field.t[known]
+        self.f = np.zeros(shape)
+        self.f[1:-1, 1:-1] = t[1:-1, :-2] + t[1:-1, 2:] + t[:-2, 1:-1] + t[2:, 1:-1]
+        self.f[~mask] = 0.0
+
+        self.levels = [MultigridLevel(mask, coefficients)]
+        while self.levels[-1].n > COARSEST and min(self.levels[-1].mask.shape) > 3:
+            self.levels.append(self.levels[-1].coarsen(coefficients))
+        self.levels[-1].factorize(field.dx, field.dy)
+
+    # One V-cycle for A u = f starting from zero on level <index>
+
+    def vcycle(self, f, index=0):
+        level = self.levels[index]
+        if index == len(self.levels) - 1:
+            return level.directSolve(f)
+
+        u = np.zeros_like(f)
+        for _ in range(self.smoothing):
+            level.smooth(u, f, (0, 1))
+
+        coarse = self.levels[index + 1]
+        r = f - level.apply(u)
+        rc = level.restrict(r, coarse.mask.shape)
+        rc[~coarse.mask] = 0.0
+        u += level.prolong(self.vcycle(rc, index + 1))
+
+        # Reversed color order keeps the cycle symmetric, as conjugate gradient requires
+        for _ in range(self.smoothing):
+            level.smooth(u, f, (1, 0))
+
+        return u
+
+    # Temperatures of every particle, iterating until the residual norm is below <tol> times the norm of the right
+    # hand side. <callback>(iteration, residual) is called after each iteration and stops the solve if it returns True.
+    # Raises Cancelled when stopped by <callback> and NotConverged after <maxiter> iterations above <tol>.
+
+    def solve(self, tol=1e-10, maxiter=200, callback=None):
+        level = self.levels[0]
+        f = self.f
+
+        u = np.zeros_like(f)
+        r = f.copy()
+        norm = np.linalg.norm(f)
+
+        if norm > 0.0:
+            z = self.vcycle(r)
+            p = z.copy()
+            rz = np.vdot(r, z)
+
+            for iteration in range(1, maxiter + 1):
+                Ap = level.apply(p)
+                alpha = rz / np.vdot(p, Ap)
+                u += alpha * p
+                r -= alpha * Ap
+
+                residual = np.linalg.norm(r) / norm
+                if callback is not None and callback(iteration, residual):
+                    raise Cancelled()
+                if residual < tol:
+                    break
+
+                z = self.vcycle(r)
+                rzNew = np.vdot(r, z)
+                p = z + (rzNew / rz) * p
+                rz = rzNew
+            else:
+                raise NotConverged(maxiter, residual)
+
+        t = self.field.t.copy()
+        t[self.unknown] = u[self.rows[self.unknown], self.columns[self.unknown]]
+        return t
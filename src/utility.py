@@ -1,5 +1,6 @@
 from PyQt5.QtCore import QRectF, QPointF
 import math
+import numpy as np
 from multipledispatch import *
 
 # Returns mantissa and exponent for <value> in normalized scientific notation
@@ -21,4 +22,71 @@ def collision(l: float, r: float, b: float, t: float, x: float, y: float):
 
 @dispatch(float, float, float, float, float, float, float, float)
 def collision(l1, r1, b1, t1, l2, r2, b2, t2):
-    return l1 < r2 and r1 > l2 and b1 < t2 and t1 > b2
\ No newline at end of file
+    return l1 < r2 and r1 > l2 and b1 < t2 and t1 > b2
+
+# Uniform spatial hash of 2D points. Items are bucketed by cell, by column and by row, so that
+# both neighbourhood queries and axis-aligned strip queries only visit the buckets in range
+
+
+class SpatialHash:
+    def __init__(self, size: float):
+        self.size = size  # Cell width and height
+        self.cells = {}
+        self.columns = {}
+        self.rows = {}
+
+    def key(self, value: float):
+        return math.floor(value / self.size)
+
+    def insert(self, x: float, y: float, item):
+        entry = (x, y, item)
+        i = self.key(x)
+        j = self.key(y)
+        self.cells.setdefault((i, j), []).append(entry)
+        self.columns.setdefault(i, []).append(entry)
+        self.rows.setdefault(j, []).append(entry)
+
+    def clear(self):
+        self.cells.clear()
+        self.columns.clear()
+        self.rows.clear()
+
+    # Entries (x, y, item) in the cells overlapping the square of half-width r around (x, y)
+    def queryRadius(self, x: float, y: float, r: float):
+        for i in range(self.key(x - r), self.key(x + r) + 1):
+            for j in range(self.key(y - r), self.key(y + r) + 1):
+                yield from self.cells.get((i, j), ())
+
+    # Entries (x, y, item) in the columns overlapping [x - r, x + r]
+    def queryColumns(self, x: float, r: float):
+        for i in range(self.key(x - r), self.key(x + r) + 1):
+            yield from self.columns.get(i, ())
+
+    # Entries (x, y, item) in the rows overlapping [y - r, y + r]
+    def queryRows(self, y: float, r: float):
+        for j in range(self.key(y - r), self.key(y + r) + 1):
+            yield from self.rows.get(j, ())
+
+# Static index of axis-aligned bounding boxes, for finding the items that overlap a window.
+# Boxes are sorted by their left side, so only the ones starting left of the window's right side are tested
+
+
+class BoxIndex:
+    def __init__(self, items: list, boxes: list):
+        boxes = np.array(boxes, dtype=np.float64).reshape(-1, 4)  # (l, r, b, t) per item
+        order = np.argsort(boxes[:, 0], kind='stable')
+
+        self.items = [items[k] for k in order]
+        self.l = boxes[order, 0]
+        self.r = boxes[order, 1]
+        self.b = boxes[order, 2]
+        self.t = boxes[order, 3]
+
+    def __len__(self):
+        return len(self.items)
+
+    # Items whose boxes overlap [l, r] x [b, t]
+    def query(self, l: float, r: float, b: float, t: float):
+        end = np.searchsorted(self.l, r, side='right')
+        overlap = (self.r[:end] >= l) & (self.b[:end] <= t) & (self.t[:end] >= b)
+        return [self.items[k] for k in np.flatnonzero(overlap)]
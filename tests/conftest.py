@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+# The application modules import each other from src (e.g. "from particles import ParticleField") and hetool reads
+# its attribute prototypes relative to the working directory, so tests run as the application does from the root
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+
+@pytest.fixture(autouse=True)
+def rootdir(monkeypatch):
+    monkeypatch.chdir(ROOT)
@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+from hetool.hetool import BVH
+
+
+def overlaps(box, window):
+    return not (box[0] > window[1] or box[1] < window[0] or box[2] > window[3] or box[3] < window[2])
+
+
+def randomBox(rng):
+    x = rng.uniform(0.0, 100.0)
+    y = rng.uniform(0.0, 100.0)
+    # Points, horizontal and vertical segments (zero width or height) and boxes
+    return (x, x + rng.choice([0.0, rng.uniform(0.0, 10.0)]), y, y + rng.choice([0.0, rng.uniform(0.0, 10.0)]))
+
+
+# Parent links, boxes enclosing the children, heights and balance of every node, and the leaf table. Like Box2D's
+# tree, a single rotation can leave children heights two apart, but never more
+def checkInvariants(tree):
+    if tree.root is None:
+        assert len(tree.leaves) == 0
+        return
+
+    assert tree.root.parent is None
+    leaves = 0
+    stack = [tree.root]
+    while stack:
+        node = stack.pop()
+        if node.isLeaf():
+            assert tree.leaves[node.item] is node
+            assert node.height == 0
+            leaves += 1
+            continue
+
+        for child in (node.child1, node.child2):
+            assert child.parent is node
+            assert node.box == BVH.union(node.box, child.box)
+            stack.append(child)
+        assert node.height == 1 + max(node.child1.height, node.child2.height)
+        assert abs(node.child1.height - node.child2.height) <= 2
+
+    assert leaves == len(tree)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_queries_match_brute_force(seed):
+    rng = random.Random(seed)
+    tree = BVH()
+    boxes = {}  # Item -> box, in insertion order
+    next = 0
+
+    for step in range(600):
+        if boxes and rng.random() < 0.35:
+            item = rng.choice(list(boxes))
+            tree.remove(item)
+            del boxes[item]
+        else:
+            boxes[next] = randomBox(rng)
+            tree.insert(next, boxes[next])
+            next += 1
+
+        if step % 50 == 0:
+            checkInvariants(tree)
+            for _ in range(20):
+                x = rng.uniform(-10.0, 110.0)
+                y = rng.uniform(-10.0, 110.0)
+                window = (x, x + rng.uniform(0.0, 30.0), y, y + rng.uniform(0.0, 30.0))
+                expected = [item for item, box in boxes.items() if overlaps(box, window)]
+                assert tree.query(*window) == expected
+
+    checkInvariants(tree)
+
+
+def test_remove_everything_and_clear():
+    tree = BVH()
+    for k in range(10):
+        tree.insert(k, (k, k + 1.0, 0.0, 1.0))
+
+    for k in range(10):
+        tree.remove(k)
+        checkInvariants(tree)
+    assert tree.root is None
+    assert tree.query(-1.0, 100.0, -1.0, 100.0) == []
+
+    tree.remove(3)  # Missing items are ignored
+    tree.insert(1, (0.0, 1.0, 0.0, 1.0))
+    tree.clear()
+    assert len(tree) == 0
+    assert tree.query(-1.0, 100.0, -1.0, 100.0) == []
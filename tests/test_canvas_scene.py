@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('PyQt5')
+pytest.importorskip('OpenGL')
+
+from gui.canvas import Canvas
+from hetool.hetool import HeArrayModel, HeController, HeModel, HeView
+
+
+# Just the state Canvas.updateSceneIndex uses, without a window or an OpenGL context
+class SceneState:
+    updateSceneIndex = Canvas.updateSceneIndex
+
+    def __init__(self):
+        self.heM = HeModel()
+        self.heV = HeView(self.heM)
+        self.heC = HeController(self.heM)
+        self.heA = HeArrayModel(self.heM)
+        self.sceneIndex = None
+        self.sceneIndexVersion = None
+        self.patchPaths = {}
+
+
+def overlaps(xs, ys, left, right, bottom, top):
+    return max(xs) >= left and min(xs) <= right and max(ys) >= bottom and min(ys) <= top
+
+
+def test_empty_scene():
+    index = SceneState().updateSceneIndex()
+    assert index['segments'].query(-1.0, 1.0, -1.0, 1.0) == []
+    assert index['points'].query(-1.0, 1.0, -1.0, 1.0) == []
+    assert index['segmentEnds'].shape == (0, 4)
+
+
+# Segments and points on screen, found through the arrays, are the ones whose coordinates overlap the window
+def test_scene_index_matches_segments_and_points():
+    state = SceneState()
+    rng = np.random.default_rng(3)
+    for x0, y0, x1, y1 in rng.uniform(0.0, 100.0, (30, 4)).tolist():
+        state.heC.insertSegment([x0, y0, x1, y1], 0.01)
+    state.heC.insertPoint([150.0, 150.0], 0.01)
+
+    index = state.updateSceneIndex()
+    segments = state.heV.getSegments()
+    points = state.heV.getPoints()
+
+    for left, bottom in rng.uniform(-20.0, 120.0, (20, 2)).tolist():
+        window = (left, left + 30.0, bottom, bottom + 30.0)
+
+        found = index['segments'].query(*window)
+        ends = index['segmentEnds'][found]
+        assert [id(segments[k]) for k in sorted(found)] == [
+            id(segment) for segment in segments
+            if overlaps([p.getX() for p in segment.getPoints()], [p.getY() for p in segment.getPoints()], *window)]
+        for row, segment in zip(found, ends.tolist()):
+            first, last = segments[row].getPoints()[0], segments[row].getPoints()[-1]
+            assert segment == [first.getX(), first.getY(), last.getX(), last.getY()]
+
+        found = index['points'].query(*window)
+        assert [id(points[k]) for k in sorted(found)] == [
+            id(point) for point in points if overlaps([point.getX()], [point.getY()], *window)]
+        assert index['pointXY'][found].tolist() == [[points[k].getX(), points[k].getY()] for k in found]
+
+
+# The index and the arrays follow the model
+def test_scene_index_rebuilt_after_edit():
+    state = SceneState()
+    state.heC.insertSegment([0.0, 0.0, 10.0, 0.0], 0.01)
+    first = state.updateSceneIndex()
+    assert state.updateSceneIndex() is first
+
+    state.heC.insertSegment([0.0, 5.0, 10.0, 5.0], 0.01)
+    index = state.updateSceneIndex()
+    assert index is not first
+    assert len(index['segments']) == 2
+    assert sorted(index['segmentEnds'][:, 1].tolist()) == [0.0, 5.0]
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('PyQt5')
+pytest.importorskip('OpenGL')
+
+from gui.canvas import Canvas
+from test_solver import plate
+
+
+class Signal:
+    def __init__(self):
+        self.messages = []
+
+    def emit(self, message):
+        self.messages.append(message)
+
+
+class Worker:
+    def __init__(self):
+        self.count = 0
+
+    def submit(self, field):
+        self.count += 1
+        return self.count
+
+    def pending(self):
+        return 0
+
+
+# Just the state Canvas.solve and Canvas.onSolved use, without a window or an OpenGL context
+class SolveState:
+    solve = Canvas.solve
+    onSolved = Canvas.onSolved
+
+    def __init__(self, data):
+        self.data = data
+        self.solveJobs = {}
+        self.solveWorker = Worker()
+        self.solveSignal = Signal()
+
+    def update(self):
+        pass
+
+
+def test_result_is_applied_when_data_is_unchanged():
+    canvas = SolveState(plate(5))
+    canvas.solve()
+
+    t = np.arange(canvas.data.n, dtype=float)
+    canvas.onSolved(1, t)
+    np.testing.assert_array_equal(canvas.data.t, t)
+
+
+def test_result_is_dropped_after_an_edit():
+    canvas = SolveState(plate(5))
+    canvas.solve()
+
+    canvas.data.assign([12], 42.0)  # What updateSelection does while the solve runs
+    canvas.onSolved(1, np.zeros(canvas.data.n))
+
+    assert canvas.data.t[12] == 42.0
+    assert np.isnan(canvas.data.t[6])
+    assert 'outdated' in canvas.solveSignal.messages[-1]
+
+
+def test_result_is_dropped_for_replaced_data():
+    canvas = SolveState(plate(5))
+    canvas.solve()
+
+    canvas.data = plate(5)
+    canvas.onSolved(1, np.zeros(canvas.data.n))
+    assert np.isnan(canvas.data.t[6])
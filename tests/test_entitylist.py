@@ -0,0 +1,99 @@
+import random
+
+import pytest
+
+from hetool.hetool import EntityList, Point
+
+
+# Entity compared by value, as Point is, so EntityList must still match by identity
+class Entity:
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return isinstance(other, Entity) and other.value == self.value
+
+    __hash__ = None
+
+
+def remove(reference, item):
+    for k, other in enumerate(reference):
+        if other is item:
+            del reference[k]
+            return
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_list(seed):
+    rng = random.Random(seed)
+    entities = EntityList()
+    reference = []
+
+    for step in range(2000):
+        action = rng.random()
+        if reference and action < 0.45:
+            item = rng.choice(reference)
+            entities.remove(item)
+            remove(reference, item)
+        else:
+            item = Entity(rng.randrange(10))  # Equal values, different entities
+            entities.append(item)
+            reference.append(item)
+
+        assert len(entities) == len(reference)
+        if reference and step % 7 == 0:
+            # First and last are read without compacting, any other index compacts
+            assert entities[0] is reference[0]
+            assert entities[-1] is reference[-1]
+            if len(reference) > 1:
+                k = rng.randrange(1, len(reference))
+                assert entities[k] is reference[k]
+                assert entities.holes == 0
+        if step % 13 == 0:
+            assert [id(item) for item in entities] == [id(item) for item in reference]
+
+    assert all(item in entities for item in reference)
+
+
+def test_remove_missing_raises():
+    first = Point(1.0, 2.0)
+    entities = EntityList([first])
+
+    with pytest.raises(ValueError):
+        entities.remove(Point(1.0, 2.0))  # Equal, but not in the list
+
+    entities.remove(first)
+    with pytest.raises(ValueError):
+        entities.remove(first)
+
+
+def test_ends_do_not_compact():
+    items = [Entity(k) for k in range(5)]
+    entities = EntityList(items)
+    entities.remove(items[0])
+    entities.remove(items[4])
+
+    assert entities[0] is items[1]
+    assert entities[-1] is items[3]
+    assert entities.holes == 2
+
+    entities.clear()
+    assert len(entities) == 0
+    assert list(entities) == []
+
+
+def test_append_compacts_when_mostly_holes():
+    items = [Entity(k) for k in range(100)]
+    entities = EntityList(items)
+    for item in items[:60]:
+        entities.remove(item)
+    assert entities.holes == 60
+
+    last = Entity(100)
+    entities.append(last)
+    assert entities.holes == 0
+    assert [item.value for item in entities] == list(range(60, 101))
+
+    entities.remove(items[70])
+    assert items[70] not in entities
+    assert entities[-1] is last
@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+
+from hetool.hetool import HeArrayModel, HeController, HeModel, HeView
+
+QUERIES = {
+    'points': ['getIncidentSegmentsFromPoint', 'getIncidentPatchesFromPoint', 'getAdjacentPointsFromPoint'],
+    'segments': ['getAdjacentSegmentsFromSegment', 'getIncidentPatchesFromSegment', 'getIncidentPointsFromSegment'],
+    'patches': ['getIncidentSegmentsFromPatch', 'getAdjacentPatchesFromPatch', 'getIncidentPointsFromPatch',
+                'getInternalPacthesFromPatch'],
+}
+
+
+def ids(entities):
+    return [id(entity) for entity in entities]
+
+
+# Every HeView query answered from the pointer structure and from the arrays, entity by entity
+def assertSameQueries(model, arrays):
+    pointers = HeView(model)
+    view = HeView(arrays)
+
+    assert ids(view.getPoints()) == ids(pointers.getPoints())
+    assert ids(view.getSegments()) == ids(pointers.getSegments())
+    assert ids(view.getPatches()) == ids(pointers.getPatches())
+    assert view.getBoundBox() == pointers.getBoundBox()
+
+    entities = {'points': pointers.getPoints(), 'segments': pointers.getSegments(), 'patches': pointers.getPatches()}
+    for kind, queries in QUERIES.items():
+        for entity in entities[kind]:
+            for query in queries:
+                assert ids(getattr(view, query)(entity)) == ids(getattr(pointers, query)(entity)), query
+
+
+# Two squares, one inside the other, crossed by a line, plus isolated points and a dangling segment
+@pytest.fixture
+def controller():
+    controller = HeController(HeModel())
+    controller.insertSegment([0.0, 0.0, 10.0, 0.0, 10.0, 10.0, 0.0, 10.0, 0.0, 0.0], 0.01)
+    controller.insertSegment([2.0, 2.0, 4.0, 2.0, 4.0, 4.0, 2.0, 4.0, 2.0, 2.0], 0.01)
+    controller.insertSegment([6.0, 6.0, 8.0, 6.0, 8.0, 8.0, 6.0, 8.0, 6.0, 6.0], 0.01)
+    controller.insertSegment([-5.0, 5.0, 15.0, 5.0], 0.01)
+    controller.insertPoint([7.0, 7.0], 0.01)
+    controller.insertPoint([20.0, 20.0], 0.01)
+    controller.insertSegment([30.0, 0.0, 40.0, 0.0], 0.01)
+    return controller
+
+
+def test_empty_model():
+    arrays = HeArrayModel(HeModel())
+    assert arrays.isEmpty()
+    assert len(arrays.heNext) == 0
+    assert arrays.segmentEndPoints().shape == (0, 4)
+    assertSameQueries(HeModel(), arrays)
+
+
+def test_queries_match_hemodel(controller):
+    assertSameQueries(controller.hemodel, HeArrayModel(controller.hemodel))
+
+
+def test_rebuilds_after_edits_undo_and_redo(controller):
+    model = controller.hemodel
+    arrays = HeArrayModel(model)
+
+    controller.insertSegment([0.0, 0.0, 10.0, 10.0], 0.01)
+    assertSameQueries(model, arrays)
+
+    model.getSegments()[0].setSelected(True)
+    controller.delSelectedEntities()
+    assertSameQueries(model, arrays)
+
+    controller.undo()
+    assertSameQueries(model, arrays)
+    controller.redo()
+    assertSameQueries(model, arrays)
+
+
+def test_half_edge_arrays(controller):
+    arrays = HeArrayModel(controller.hemodel)
+    he = np.arange(len(arrays.heNext))
+
+    assert np.array_equal(arrays.hePrev[arrays.heNext], he)
+    assert np.array_equal(arrays.heTwin[arrays.heTwin], he)
+    assert np.array_equal(arrays.heLoop[arrays.heNext], arrays.heLoop)
+
+    # A half-edge starts where its twin's successor starts, and every edge has its two half-edges
+    assert np.array_equal(arrays.heVertex[arrays.heNext[arrays.heTwin]], arrays.heVertex)
+    assert np.array_equal(arrays.heEdge[arrays.edgeHe], np.repeat(np.arange(len(arrays.edgeHe))[:, None], 2, 1))
+
+
+def test_array_queries(controller):
+    model = controller.hemodel
+    arrays = HeArrayModel(model)
+
+    ends = arrays.segmentEndPoints()
+    for segment, row in zip(model.getSegments(), ends):
+        points = segment.getPoints()  # Polylines keep their inner points
+        assert sorted(row.reshape(2, 2).tolist()) == sorted([[p.getX(), p.getY()] for p in (points[0], points[-1])])
+
+    inside = [p for p in model.getPoints() if -1.0 <= p.getX() <= 11.0 and -1.0 <= p.getY() <= 11.0]
+    assert ids(arrays.pointsInWindow(-1.0, 11.0, -1.0, 11.0)) == ids(inside)
+
+    closest = arrays.closestPoint(7.1, 7.1, 0.5)
+    assert (closest.getX(), closest.getY()) == (7.0, 7.0)
+    assert arrays.closestPoint(50.0, 50.0, 0.5) is None
+
+
+def test_grid():
+    controller = HeController(HeModel())
+    n = 8
+    for k in range(n + 1):
+        controller.insertSegment([0.0, float(k), float(n), float(k)], 1e-3)
+    for k in range(n + 1):
+        controller.insertSegment([float(k), 0.0, float(k), float(n)], 1e-3)
+
+    arrays = HeArrayModel(controller.hemodel)
+    assert len(arrays.faces) == n * n + 1
+    assertSameQueries(controller.hemodel, arrays)
+
+
+def test_unique_keeps_first_occurrences():
+    assert HeArrayModel.unique([3, -1, 1, 3, 2, 1, -1, 0]) == [3, 1, 2, 0]
+    assert HeArrayModel.unique(range(100000)) == list(range(100000))
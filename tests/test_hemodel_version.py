@@ -0,0 +1,53 @@
+import pytest
+
+from hetool.hetool import HeController, HeModel
+
+# Caches built from a HeModel (canvas patch paths and scene index, face tree, HeArrayModel) are invalidated only when
+# HeModel.version changes, so every edit and every undo and redo must change it
+
+
+@pytest.fixture
+def controller():
+    controller = HeController(HeModel())
+    controller.insertSegment([0.0, 0.0, 10.0, 0.0, 10.0, 10.0, 0.0, 10.0, 0.0, 0.0], 0.01)
+    return controller
+
+
+def changes(controller, action):
+    before = controller.hemodel.version
+    action()
+    return controller.hemodel.version != before
+
+
+def test_insertions_change_version(controller):
+    assert changes(controller, lambda: controller.insertSegment([-5.0, 5.0, 15.0, 5.0], 0.01))
+    assert changes(controller, lambda: controller.insertPoint([2.0, 2.0], 0.01))
+    assert changes(controller, lambda: controller.insertPoint([20.0, 20.0], 0.01))
+
+
+def test_delete_undo_redo_change_version(controller):
+    controller.insertSegment([-5.0, 5.0, 15.0, 5.0], 0.01)
+    controller.selectPick(12.0, 5.0, 0.1, False)
+    assert controller.hemodel.selectedEdges()
+
+    assert changes(controller, controller.delSelectedEntities)
+    assert changes(controller, controller.undo)
+    assert changes(controller, controller.redo)
+    assert changes(controller, controller.undo)
+    assert changes(controller, controller.undo)  # The horizontal segment
+    assert changes(controller, controller.redo)
+
+
+def test_open_and_clear_change_version(controller, tmp_path):
+    filename = str(tmp_path / 'model.json')
+    controller.insertPoint([2.0, 2.0], 0.01)
+    controller.saveFile(filename)
+
+    other = HeController(HeModel())
+    assert changes(other, lambda: other.openFile(filename))
+    assert len(other.hemodel.getPoints()) == len(controller.hemodel.getPoints())
+    assert changes(other, other.hemodel.clearAll)
+
+
+def test_selection_keeps_version(controller):
+    assert not changes(controller, lambda: controller.selectPick(5.0, 5.0, 0.1, False))
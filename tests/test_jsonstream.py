@@ -0,0 +1,94 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from jsonstream import ARRAYS, JSONStreamReader
+
+
+def data(n, seed=0):
+    rng = np.random.default_rng(seed)
+    t = [None if unknown else value for unknown, value in zip(rng.random(n) < 0.3, rng.uniform(-50.0, 400.0, n).tolist())]
+    known = [value for value in t if value is not None]
+    return {
+        'n': n,
+        'dx': 2.5,
+        'dy': 0.1,
+        'mint': min(known) if known else None,
+        'maxt': max(known) if known else None,
+        'x': rng.uniform(-1e3, 1e3, n).tolist(),
+        'y': (rng.uniform(-1.0, 1.0, n) * 1e-7).tolist(),
+        'i': rng.integers(-5, 100000, n).tolist(),
+        'j': rng.integers(0, 10, n).tolist(),
+        't': t,
+    }
+
+
+# Same dictionary json.load gives, arrays converted to the types JSONStreamReader returns (null becomes NaN)
+def assertSameData(actual, expected):
+    assert list(actual) == list(expected)
+    for key, value in expected.items():
+        if key in ARRAYS:
+            assert actual[key].dtype == ARRAYS[key]
+            np.testing.assert_array_equal(actual[key], np.array(value, dtype=np.float64).astype(ARRAYS[key]))
+        else:
+            assert actual[key] == value and type(actual[key]) is type(value), key
+
+
+@pytest.mark.parametrize('indent', [None, 4])
+@pytest.mark.parametrize('chunkSize', [1, 2, 3, 7, 64, 1 << 20])
+def test_matches_json_load(tmp_path, indent, chunkSize):
+    filename = str(tmp_path / 'data.json')
+    with open(filename, 'w') as outfile:
+        json.dump(data(200), outfile, indent=indent)
+
+    with open(filename) as infile:
+        expected = json.load(infile)
+    assertSameData(JSONStreamReader(filename, chunkSize).read(), expected)
+
+
+@pytest.mark.parametrize('chunkSize', [1, 5, 1 << 20])
+def test_count_after_arrays(tmp_path, chunkSize):
+    # The Julia solvers may write "n" after the arrays, it is looked up ahead
+    values = data(30)
+    reordered = {key: values[key] for key in ['x', 'y', 'i', 'j', 't', 'dx', 'dy', 'mint', 'maxt', 'n']}
+
+    filename = str(tmp_path / 'data.json')
+    with open(filename, 'w') as outfile:
+        json.dump(reordered, outfile)
+    assertSameData(JSONStreamReader(filename, chunkSize).read(), reordered)
+
+
+@pytest.mark.parametrize('chunkSize', [1, 1 << 20])
+def test_empty_field_and_object(tmp_path, chunkSize):
+    filename = str(tmp_path / 'data.json')
+    with open(filename, 'w') as outfile:
+        json.dump(data(0), outfile, indent=4)
+    assertSameData(JSONStreamReader(filename, chunkSize).read(), data(0))
+
+    with open(filename, 'w') as outfile:
+        outfile.write(' { } ')
+    assert JSONStreamReader(filename, chunkSize).read() == {}
+
+
+def test_repository_files():
+    for name in ['data.json', 'result.json']:
+        filename = os.path.join(os.path.dirname(__file__), '..', name)
+        with open(filename) as infile:
+            expected = json.load(infile)
+        assertSameData(JSONStreamReader(filename, 4096).read(), expected)
+
+
+@pytest.mark.parametrize('text', [
+    '{"n": 3, "x": [1.0, 2.0',            # Truncated array
+    '{"n": 3, "x": [1.0, 2.0]}',          # Wrong length
+    '{"x": [1.0, 2.0, 3.0]}',             # No "n"
+    '{"n": 3, "q": [1.0, 2.0, 3.0]}',     # Unknown array
+])
+def test_invalid_files(tmp_path, text):
+    filename = tmp_path / 'data.json'
+    filename.write_text(text)
+
+    with pytest.raises(ValueError):
+        JSONStreamReader(str(filename), 4).read()
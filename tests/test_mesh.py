@@ -0,0 +1,112 @@
+import random
+
+import numpy as np
+import pytest
+
+from hetool.hetool import HeController, HeModel, HeView, Point
+from mesh import regularMesh
+
+
+# The per-cell loop regularMesh replaced in Canvas.showRegularMeshDialog
+def cellByCell(patches, dx, dy, box):
+    L, R, B, T = box
+
+    X = []
+    Y = []
+    I = []
+    J = []
+
+    y = B + dy / 2.0
+    i = 1
+    while y <= T:
+        x = L + dx / 2.0
+        j = 1
+        while x <= R:
+            point = Point(x, y)
+            for patch in patches:
+                if patch.isPointInside(point):
+                    X.append(x)
+                    Y.append(y)
+                    I.append(i)
+                    J.append(j)
+            x += dx
+            j += 1
+        y += dy
+        i += 1
+
+    return X, Y, I, J
+
+
+def model(*polylines):
+    controller = HeController(HeModel())
+    for polyline in polylines:
+        controller.insertSegment(list(polyline), 0.01)  # insertSegment consumes the list
+    return HeView(controller.hemodel)
+
+
+SQUARE = [0.0, 0.0, 10.0, 0.0, 10.0, 10.0, 0.0, 10.0, 0.0, 0.0]
+MODELS = {
+    'square': [SQUARE],
+    'hole': [SQUARE, [3.0, 3.0, 7.0, 3.0, 7.0, 7.0, 3.0, 7.0, 3.0, 3.0]],
+    'two holes and a split': [SQUARE, [1.0, 1.0, 4.0, 1.0, 4.0, 4.0, 1.0, 4.0, 1.0, 1.0],
+                              [6.0, 6.0, 9.0, 6.0, 7.5, 9.0, 6.0, 6.0], [-2.0, 5.0, 12.0, 5.0]],
+    'concave': [[0.0, 0.0, 8.0, 0.0, 8.0, 2.0, 2.0, 2.0, 2.0, 6.0, 8.0, 6.0, 8.0, 8.0, 0.0, 8.0, 0.0, 0.0]],
+    'slanted': [[0.3, -1.1, 9.7, 2.9, 6.1, 11.3, -2.2, 7.4, 0.3, -1.1]],
+    'diamond': [[5.0, 0.0, 10.0, 5.0, 5.0, 10.0, 0.0, 5.0, 5.0, 0.0]],
+}
+
+
+@pytest.mark.parametrize('name', sorted(MODELS))
+def test_matches_cell_by_cell(name):
+    view = model(*MODELS[name])
+    patches = view.getPatches()
+    box = view.getBoundBox()
+    rng = random.Random(name)
+
+    # Spacings that put cell centers exactly on vertices and edges, and arbitrary ones
+    for dx, dy in [(1.0, 1.0), (0.5, 0.5), (2.0, 1.0)] + [(rng.uniform(0.2, 2.0), rng.uniform(0.2, 2.0)) for _ in range(8)]:
+        X, Y, I, J = regularMesh(patches, dx, dy, box)
+        expected = cellByCell(patches, dx, dy, box)
+
+        assert len(X) > 0
+        for actual, values in zip((X, Y, I, J), expected):
+            np.testing.assert_array_equal(actual, values)
+
+
+# Closed star-shaped polygon around the origin, vertices at sorted random angles so it never crosses itself
+def star(rng, rmin, rmax, sides):
+    angles = sorted(rng.uniform(0.0, 2.0 * np.pi) for _ in range(sides))
+    radii = [rng.uniform(rmin, rmax) for _ in range(sides)]
+    points = [(r * np.cos(a), r * np.sin(a)) for a, r in zip(angles, radii)]
+    return [float(c) for point in points + points[:1] for c in point]
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_random_models_match_cell_by_cell(seed):
+    rng = random.Random(seed)
+    view = model(star(rng, 6.0, 10.0, rng.randint(3, 9)), star(rng, 1.0, 3.0, rng.randint(3, 6)))
+    patches = view.getPatches()
+    box = view.getBoundBox()
+
+    dx = rng.uniform(0.3, 1.5)
+    dy = rng.uniform(0.3, 1.5)
+    X, Y, I, J = regularMesh(patches, dx, dy, box)
+    expected = cellByCell(patches, dx, dy, box)
+
+    for actual, values in zip((X, Y, I, J), expected):
+        np.testing.assert_array_equal(actual, values)
+
+
+def test_holes_are_empty():
+    view = model(*MODELS['hole'])
+    outer = [patch for patch in view.getPatches() if patch.holes]  # The inner square is a patch of its own
+    assert len(outer) == 1
+    X, Y, I, J = regularMesh(outer, 0.5, 0.5)
+
+    assert not np.any((3.0 < X) & (X < 7.0) & (3.0 < Y) & (Y < 7.0))
+    assert np.all((0.0 < X) & (X < 10.0) & (0.0 < Y) & (Y < 10.0))
+
+
+def test_no_patches():
+    X, Y, I, J = regularMesh([], 1.0, 1.0)
+    assert len(X) == len(Y) == len(I) == len(J) == 0
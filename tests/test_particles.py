@@ -0,0 +1,237 @@
+import json
+
+import numpy as np
+import pytest
+
+from particles import BINARY_ALIGNMENT, BINARY_COLUMNS, BINARY_MAGIC, BOUNDS, ParticleField
+
+
+def field(n, seed=0):
+    rng = np.random.default_rng(seed)
+    i = rng.integers(1, 50, n)
+    j = rng.integers(1, 80, n)
+    t = rng.uniform(0.0, 400.0, n)
+    t[rng.random(n) < 0.5] = np.nan  # Unknown, null in JSON
+    return ParticleField(j * 2.5 - 100.0, i * 2.5 - 60.0, i, j, t, 2.5, 2.5)
+
+
+def assertSameField(actual, expected):
+    assert actual.n == expected.n
+    assert (actual.dx, actual.dy) == (expected.dx, expected.dy)
+    for column in 'xyij':
+        np.testing.assert_array_equal(getattr(actual, column), getattr(expected, column))
+    np.testing.assert_array_equal(actual.t, expected.t)  # NaN compared equal to NaN
+    for key in BOUNDS:
+        assert getattr(actual, key) == getattr(expected, key), key
+
+
+@pytest.mark.parametrize('n', [0, 1, 7, 1000])
+@pytest.mark.parametrize('extension', ['.pfb', '.json'])
+def test_round_trip(tmp_path, n, extension):
+    expected = field(n)
+    filename = str(tmp_path / ('field' + extension))
+
+    expected.save(filename)
+    assertSameField(ParticleField.load(filename), expected)
+
+
+def test_all_temperatures_unknown(tmp_path):
+    expected = field(20)
+    expected.t[:] = np.nan
+    expected.updateMinMax()
+    assert expected.mint is None
+
+    for extension in ('.pfb', '.json'):
+        filename = str(tmp_path / ('field' + extension))
+        expected.save(filename)
+        assertSameField(ParticleField.load(filename), expected)
+
+
+def test_json_matches_json_load(tmp_path):
+    filename = str(tmp_path / 'field.json')
+    field(50).save(filename)
+
+    with open(filename) as infile:
+        expected = ParticleField.fromDict(json.load(infile))
+    assertSameField(ParticleField.load(filename), expected)
+
+
+def test_binary_columns_are_aligned(tmp_path):
+    filename = str(tmp_path / 'field.pfb')
+    field(13).save(filename)
+
+    with open(filename, 'rb') as infile:
+        assert infile.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+        length = int(np.frombuffer(infile.read(4), dtype='<u4')[0])
+        header = json.loads(infile.read(length).decode('utf-8'))
+
+    assert [column['name'] for column in header['columns']] == [name for name, _ in BINARY_COLUMNS]
+    for column in header['columns']:
+        assert column['offset'] % BINARY_ALIGNMENT == 0
+
+
+def test_binary_edits_stay_in_memory(tmp_path):
+    filename = str(tmp_path / 'field.pfb')
+    expected = field(10)
+    expected.save(filename)
+
+    loaded = ParticleField.load(filename)
+    loaded.assign([0, 1, 2], 1000.0)
+    del loaded
+
+    assertSameField(ParticleField.load(filename), expected)
+
+
+def test_not_a_binary_field(tmp_path):
+    filename = tmp_path / 'field.pfb'
+    filename.write_bytes(b'not a particle field')
+
+    with pytest.raises(ValueError):
+        ParticleField.load(str(filename))
+
+
+def test_binary_save_over_loaded_file(tmp_path):
+    # Used to truncate the file the loaded columns are mapped from, killing the process with SIGBUS
+    filename = str(tmp_path / 'field.pfb')
+    expected = field(5000)
+    expected.save(filename)
+
+    loaded = ParticleField.load(filename)
+    loaded.assign([0], 1.0)
+    loaded.save(filename)
+    expected.assign([0], 1.0)
+
+    assertSameField(loaded, expected)
+    assertSameField(ParticleField.load(filename), expected)
+    assert [path.name for path in tmp_path.iterdir()] == ['field.pfb']
+
+
+# ----- Vectorized operations against the per-particle loops they replaced in Canvas -----
+
+def lists(field):
+    t = [None if np.isnan(value) else value for value in field.t.tolist()]
+    return {'x': field.x.tolist(), 'y': field.y.tolist(), 'i': field.i.tolist(), 'j': field.j.tolist(), 't': t}
+
+
+def test_select_matches_loop():
+    expected = field(500, seed=1)
+    data = lists(expected)
+    rng = np.random.default_rng(1)
+
+    for _ in range(50):
+        l, r = np.sort(rng.uniform(-110.0, 110.0, 2))
+        b, t = np.sort(rng.uniform(-70.0, 70.0, 2))
+
+        selection = []
+        for index in range(len(data['x'])):
+            x = data['x'][index]
+            y = data['y'][index]
+            if l <= x <= r and b <= y <= t and index not in selection:
+                selection.append(index)
+
+        assert expected.select(l, r, b, t).tolist() == selection
+
+
+def test_delete_matches_loop():
+    expected = field(300, seed=2)
+    data = lists(expected)
+    selection = sorted(np.random.default_rng(2).choice(300, 120, replace=False).tolist())
+
+    count = 0
+    for index in selection:
+        for key in data:
+            del data[key][index - count]
+        count += 1
+
+    expected.delete(selection)
+    assert lists(expected) == data
+    assert expected.n == 180
+    assert (expected.minx, expected.maxx) == (min(data['x']), max(data['x']))
+
+
+def test_assign_matches_loop():
+    expected = field(100, seed=3)
+    data = lists(expected)
+    selection = [3, 5, 8, 13, 21]
+
+    for t in [250.0, None, float('nan')]:
+        for index in selection:
+            data['t'][index] = None if t is None or np.isnan(t) else t
+
+        expected.assign(selection, t)
+        assert lists(expected) == data
+
+
+def test_min_max_matches_loop():
+    expected = field(200, seed=4)
+    data = lists(expected)
+
+    known = [t for t in data['t'] if t is not None]
+    assert (expected.mini, expected.maxi) == (min(data['i']), max(data['i']))
+    assert (expected.minj, expected.maxj) == (min(data['j']), max(data['j']))
+    assert (expected.miny, expected.maxy) == (min(data['y']), max(data['y']))
+    assert (expected.mint, expected.maxt) == (min(known), max(known))
+
+
+def test_min_max_without_known_temperatures():
+    expected = field(10)
+    expected.assign(np.arange(10), None)
+    assert expected.mint is None and expected.maxt is None
+    assert expected.minx is not None
+
+    expected.delete(np.arange(10))
+    assert expected.n == 0
+    assert all(getattr(expected, key) is None for key in BOUNDS)
+
+
+# Regular lattice of particles with holes, as regularMesh generates them
+def lattice(seed):
+    rng = np.random.default_rng(seed)
+    i, j = np.indices((40, 60))
+    keep = rng.random(i.shape) < 0.7
+    i = i[keep] + 1
+    j = j[keep] + 1
+    order = rng.permutation(len(i))  # Particles in no particular order
+    i = i[order]
+    j = j[order]
+    return ParticleField(-50.0 + (j - 1) * 2.0, 10.0 + (i - 1) * 1.5, i, j, None, 2.0, 1.5)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_lattice_window_matches_loop(seed):
+    expected = lattice(seed)
+    rng = np.random.default_rng(seed)
+
+    for _ in range(50):
+        l, r = np.sort(rng.uniform(-60.0, 80.0, 2))
+        b, t = np.sort(rng.uniform(0.0, 80.0, 2))
+
+        # Particles whose cell overlaps the rectangle
+        overlapping = []
+        for index in range(expected.n):
+            x = expected.x[index]
+            y = expected.y[index]
+            if (x - expected.dx / 2.0 <= r and x + expected.dx / 2.0 >= l and
+                    y - expected.dy / 2.0 <= t and y + expected.dy / 2.0 >= b):
+                overlapping.append(index)
+
+        window = expected.window(*expected.latticeWindow(l, r, b, t))
+        assert sorted(window.tolist()) == overlapping
+
+
+def test_lattice_order_and_ranges():
+    expected = lattice(5)
+    order, keys = expected.lattice()
+
+    assert sorted(order.tolist()) == list(range(expected.n))
+    assert np.all(np.diff(keys) > 0)  # One particle per cell, row by row
+
+    ilo, ihi, jlo, jhi = 5, 20, 10, 30
+    first, count = expected.windowRanges(ilo, ihi, jlo, jhi)
+    for start, size in zip(first, count):
+        rows = expected.i[order[start:start + size]]
+        assert len(set(rows.tolist())) == 1  # Each range is a single row
+
+    inside = (ilo <= expected.i) & (expected.i <= ihi) & (jlo <= expected.j) & (expected.j <= jhi)
+    assert sorted(expected.window(ilo, ihi, jlo, jhi).tolist()) == np.flatnonzero(inside).tolist()
+    assert len(expected.window(3, 2, 0, 100)) == 0
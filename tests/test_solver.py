@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+import solver
+from particles import ParticleField
+
+
+# Square plate of <size> x <size> particles, the top row at 100 and the other borders at 0
+
+def plate(size):
+    i, j = np.indices((size, size))
+    i = i.ravel()
+    j = j.ravel()
+
+    t = np.full(len(i), np.nan)
+    t[(i == 0) | (j == 0) | (j == size - 1)] = 0.0
+    t[i == size - 1] = 100.0
+    return ParticleField(j.astype(float), i.astype(float), i, j, t)
+
+
+def test_multigrid_matches_direct():
+    field = plate(60)
+    expected = solver.solve(field, 'direct')
+    np.testing.assert_allclose(solver.solve(field, 'multigrid'), expected, atol=1e-6)
+
+
+@pytest.mark.parametrize('method', ['multigrid', 'direct'])
+def test_solve_reproduces_result_json(method):
+    field = ParticleField.load('data.json')
+    expected = ParticleField.load('result.json')
+
+    np.testing.assert_array_equal(field.x, expected.x)
+    np.testing.assert_array_equal(field.y, expected.y)
+    np.testing.assert_allclose(solver.solve(field, method), expected.t, rtol=0.0, atol=1e-9)
+
+
+def test_multigrid_raises_when_not_converged():
+    with pytest.raises(solver.NotConverged) as error:
+        solver.Multigrid(plate(60)).solve(tol=0.0, maxiter=3)
+    assert error.value.iterations == 3
+
+
+def test_multigrid_raises_when_cancelled():
+    iterations = []
+
+    def callback(iteration, residual):
+        iterations.append(iteration)
+        return True
+
+    with pytest.raises(solver.Cancelled):
+        solver.solve(plate(60), 'multigrid', callback=callback)
+    assert iterations == [1]
+
+
+def test_session_raises_when_cancelled():
+    with pytest.raises(solver.Cancelled):
+        solver.Session().solve(plate(20), callback=lambda iteration, residual: True)
+
+
+def test_sweep_matches_single_solves(tmp_path):
+    field = plate(12)
+    top = field.i == field.maxi
+    scenarios = [[(np.flatnonzero(top), temperature)] for temperature in (0.0, 50.0, 100.0)]
+
+    results = solver.sweep(field, scenarios, str(tmp_path / 'sweep.npy'), batch=2)
+
+    for row, temperature in enumerate((0.0, 50.0, 100.0)):
+        scenario = field.copy()
+        scenario.assign(np.flatnonzero(top), temperature)
+        np.testing.assert_allclose(results[row], solver.solve(scenario, 'direct'), atol=1e-9)
+
+
+def test_sweep_leaves_unsolved_rows_nan(tmp_path):
+    field = plate(12)
+    scenarios = [[(np.flatnonzero(field.i == field.maxi), float(k))] for k in range(5)]
+
+    results = solver.sweep(field, scenarios, str(tmp_path / 'sweep.npy'), batch=2, callback=lambda done, total: True)
+
+    assert not np.isnan(results[:2]).any()
+    assert np.isnan(results[2:]).all()
+
+
+def test_scenario_as_list_is_a_full_temperature_vector():
+    field = plate(4)
+    scenario = [None if np.isnan(t) else t + 1.0 for t in field.t]
+
+    t = solver.scenarioTemperatures(field, scenario)
+
+    np.testing.assert_array_equal(t, field.t + 1.0)
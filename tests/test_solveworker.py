@@ -0,0 +1,83 @@
+import queue
+
+import numpy as np
+import pytest
+
+pytest.importorskip('PyQt5')
+
+import solver
+from gui.solveworker import SolveWorker
+from test_solver import plate
+
+
+# Job queue that stops the worker once it is empty, instead of waiting for more jobs
+class Jobs(queue.Queue):
+    def get(self, block=True, timeout=None):
+        try:
+            return super().get(False)
+        except queue.Empty:
+            return None
+
+
+# Runs the queued jobs on the calling thread instead of starting the worker thread
+def runJobs(worker):
+    worker.run()
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    monkeypatch.setattr(SolveWorker, 'start', lambda self: None)
+    worker = SolveWorker()
+    worker.jobs = Jobs()
+    worker.results = {}
+    worker.solved.connect(lambda id, t: worker.results.__setitem__(id, t))
+    return worker
+
+
+# <function> that also appends <name> to <calls> when called
+def counted(calls, name, function):
+    def wrapper(*args, **kwargs):
+        calls.append(name)
+        return function(*args, **kwargs)
+    return wrapper
+
+
+def test_resolve_with_new_known_temperatures_back_substitutes(worker, monkeypatch):
+    calls = []
+    monkeypatch.setattr(solver.Session, 'factorize', counted(calls, 'factorize', solver.Session.factorize))
+    monkeypatch.setattr(solver.Session, 'solve', counted(calls, 'solve', solver.Session.solve))
+    monkeypatch.setattr(solver.Multigrid, 'solve', counted(calls, 'multigrid', solver.Multigrid.solve))
+
+    field = plate(30)
+    first = worker.submit(field)
+    runJobs(worker)
+    assert calls == ['multigrid', 'factorize']
+
+    # Only Dirichlet values change: the session back-substitutes with the factorization of the first solve
+    calls.clear()
+    field.assign(np.flatnonzero(field.i == field.maxi), 50.0)
+    second = worker.submit(field)
+    runJobs(worker)
+    assert calls == ['solve']
+
+    np.testing.assert_allclose(worker.results[first] * 0.5, worker.results[second], atol=1e-8)
+    np.testing.assert_allclose(worker.results[second], solver.solve(field, 'direct'), atol=1e-9)
+
+    # New known particles change the system: back to multigrid
+    calls.clear()
+    field.assign(np.flatnonzero((field.i == 15) & (field.j == 15)), 10.0)
+    worker.submit(field)
+    runJobs(worker)
+    assert calls[0] == 'multigrid'
+
+
+def test_queued_jobs_are_not_delayed_by_factorization(worker, monkeypatch):
+    factorized = []
+    monkeypatch.setattr(solver.Session, 'factorize', lambda self, field: factorized.append(field.n))
+
+    worker.submit(plate(10))
+    worker.submit(plate(12))
+    runJobs(worker)
+
+    assert len(worker.results) == 2
+    assert factorized == [144]  # Only after the last one, once the queue is empty
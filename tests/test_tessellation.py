@@ -0,0 +1,196 @@
+import math
+import random
+
+import pytest
+
+from hetool.hetool import Point, Tesselation
+
+
+def polygonArea(pts):
+    area = 0.0
+    for k in range(len(pts)):
+        a = pts[k]
+        b = pts[(k + 1) % len(pts)]
+        area += a.getX() * b.getY() - b.getX() * a.getY()
+    return area / 2.0
+
+
+def triangleAreas(pts, triangs):
+    return [Tesselation.signed_triangle_area(pts[i], pts[j], pts[k]) for i, j, k in triangs]
+
+
+def points(coords):
+    return [Point(x, y) for x, y in coords]
+
+
+# Counter-clockwise simple polygon: vertices at sorted random angles around the origin
+def starPolygon(rng, n):
+    angles = sorted(rng.uniform(0.0, 2.0 * math.pi) for _ in range(n))
+    return [Point(r * math.cos(a), r * math.sin(a)) for a, r in zip(angles, (rng.uniform(1.0, 10.0) for _ in range(n)))]
+
+
+# ----- Ear clipping -----
+
+@pytest.mark.parametrize('seed', range(20))
+def test_ear_clipping_matches_triangle_paring(seed):
+    rng = random.Random(seed)
+    pts = starPolygon(rng, rng.randint(3, 60))
+    area = polygonArea(pts)
+
+    for function in (Tesselation.earClipping, Tesselation.triangleParing):
+        triangs = function(pts)
+        areas = triangleAreas(pts, triangs)
+
+        assert len(triangs) == len(pts) - 2
+        assert sorted(set(index for triangle in triangs for index in triangle)) == list(range(len(pts)))
+        assert sum(areas) == pytest.approx(area, rel=1e-9)
+        assert min(areas) > 0.0  # No inverted (clockwise) triangle
+
+
+def test_ear_clipping_concave():
+    # Comb with deep teeth: most vertices are reflex
+    coords = [(0.0, 0.0), (20.0, 0.0), (20.0, 10.0)]
+    for k in range(9, -1, -1):
+        coords += [(2.0 * k + 1.5, 10.0), (2.0 * k + 1.0, 1.0), (2.0 * k + 0.5, 10.0)]
+    coords.append((0.0, 10.0))
+    pts = points(coords)
+
+    triangs = Tesselation.earClipping(pts)
+    areas = triangleAreas(pts, triangs)
+    assert len(triangs) == len(pts) - 2
+    assert sum(areas) == pytest.approx(polygonArea(pts))
+    assert min(areas) > 0.0
+
+
+@pytest.mark.parametrize('coords', [
+    [(0.0, 0.0), (5.0, 0.0), (10.0, 0.0), (10.0, 5.0), (10.0, 10.0), (5.0, 10.0), (0.0, 10.0), (0.0, 5.0)],  # Collinear
+    [(0.0, 0.0), (10.0, 0.0), (10.0, 0.0), (10.0, 10.0), (0.0, 10.0), (0.0, 10.0)],  # Duplicates
+    [(0.0, 0.0), (1.0, 0.0), (2.0, 0.0), (3.0, 0.0)],  # Flat
+    [(0.0, 0.0), (4.0, 0.0), (4.0, 4.0), (2.0, 2.0), (2.0, 2.0), (0.0, 4.0)],  # Duplicate reflex vertex
+])
+def test_ear_clipping_degenerate_polygons_finish(coords):
+    pts = points(coords)
+    triangs = Tesselation.earClipping(pts)
+    areas = triangleAreas(pts, triangs)
+
+    assert len(triangs) == len(pts) - 2
+    assert sum(areas) == pytest.approx(polygonArea(pts), abs=1e-12)
+    assert min(areas) >= 0.0
+
+
+def test_tessellate_coordinates():
+    pts = points([(0.0, 0.0), (4.0, 0.0), (4.0, 3.0), (0.0, 3.0)])
+    coords = Tesselation.tessellateCoords(pts)
+    triangles = Tesselation.tessellate(pts)
+
+    assert len(coords) == 6 * len(triangles) == 12
+    assert coords == [c for triangle in triangles for p in triangle for c in (p.getX(), p.getY())]
+
+
+# ----- Constrained triangulation -----
+
+def square(x, y, size):
+    return points([(x, y), (x + size, y), (x + size, y + size), (x, y + size)])
+
+
+def triangleEdges(triangs):
+    edges = set()
+    for triangle in triangs:
+        for m in range(3):
+            edges.add(frozenset((triangle[m], triangle[(m + 1) % 3])))
+    return edges
+
+
+def coordinateEdges(pts, triangs):
+    key = lambda p: (p.getX(), p.getY())
+    return set(frozenset((key(pts[i]), key(pts[j]))) for i, j in map(tuple, triangleEdges(triangs)) if key(pts[i]) != key(pts[j]))
+
+
+def checkTriangulation(outer, holes=[], segments=[]):
+    pts, triangs = Tesselation.constrainedTriangulation(outer, holes, segments)
+    areas = triangleAreas(pts, triangs)
+    expected = abs(polygonArea(outer)) - sum(abs(polygonArea(hole)) for hole in holes)
+
+    assert sum(areas) == pytest.approx(expected)
+    assert min(areas) >= -1e-12  # No inverted triangle
+    assert sum(area for area in areas if area > 0.0) == pytest.approx(expected)
+
+    # Triangles stay out of the holes and every hole and segment edge is kept
+    edges = coordinateEdges(pts, triangs)
+    for hole in holes:
+        for k in range(len(hole)):
+            a, b = hole[k], hole[(k + 1) % len(hole)]
+            assert frozenset(((a.getX(), a.getY()), (b.getX(), b.getY()))) in edges
+        for i, j, k in triangs:
+            cx = (pts[i].getX() + pts[j].getX() + pts[k].getX()) / 3.0
+            cy = (pts[i].getY() + pts[j].getY() + pts[k].getY()) / 3.0
+            if Tesselation.signed_triangle_area(pts[i], pts[j], pts[k]) > 0.0:
+                assert not insidePolygon(hole, cx, cy)
+    for segment in segments:
+        for a, b in zip(segment, segment[1:]):
+            assert frozenset(((a.getX(), a.getY()), (b.getX(), b.getY()))) in edges
+
+    return pts, triangs
+
+
+def insidePolygon(pts, x, y):
+    inside = False
+    for k in range(len(pts)):
+        a, b = pts[k], pts[k - 1]
+        if (a.getY() > y) != (b.getY() > y):
+            if x < a.getX() + (y - a.getY()) * (b.getX() - a.getX()) / (b.getY() - a.getY()):
+                inside = not inside
+    return inside
+
+
+def test_constrained_without_holes():
+    outer = square(0.0, 0.0, 10.0)
+    pts, triangs = checkTriangulation(outer)
+    assert len(triangs) == 2
+
+
+@pytest.mark.parametrize('clockwise', [False, True])
+def test_constrained_outer_orientation(clockwise):
+    outer = square(0.0, 0.0, 10.0)
+    hole = square(3.0, 3.0, 4.0)
+    if clockwise:
+        outer.reverse()
+        hole.reverse()
+    checkTriangulation(outer, [hole])
+
+
+@pytest.mark.parametrize('clockwise', [False, True])
+def test_constrained_several_holes_and_dangling_segment(clockwise):
+    outer = points([(0.0, 0.0), (30.0, 0.0), (30.0, 20.0), (15.0, 12.0), (0.0, 20.0)])
+    if clockwise:
+        outer.reverse()
+    holes = [square(2.0, 2.0, 3.0), square(10.0, 3.0, 2.0), list(reversed(square(20.0, 2.0, 4.0)))]
+    segments = [points([(8.0, 8.0), (12.0, 9.0), (14.0, 6.0)]), points([(25.0, 9.0), (27.0, 10.0)])]
+    pts, triangs = checkTriangulation(outer, holes, segments)
+
+    # Every input vertex takes part in the triangulation
+    assert set(i for triangle in triangs for i in triangle) == set(range(len(pts)))
+
+
+def test_constrained_collinear_bridge_candidates():
+    # The holes' rightmost vertices are level with each other and with an
+    # outer vertex, so the bridge ray runs along edges and through vertices
+    outer = points([(0.0, 0.0), (20.0, 0.0), (20.0, 4.0), (20.0, 6.0), (20.0, 10.0), (0.0, 10.0)])
+    holes = [square(2.0, 4.0, 2.0), square(8.0, 4.0, 2.0), square(14.0, 4.0, 2.0)]
+    checkTriangulation(outer, holes)
+
+
+def test_constrained_touching_bridge_candidates():
+    # Reflex vertices of the outer boundary sit exactly on the bridge ray
+    outer = points([(0.0, 0.0), (20.0, 0.0), (20.0, 10.0), (12.0, 10.0), (12.0, 5.0), (10.0, 5.0), (10.0, 10.0), (0.0, 10.0)])
+    holes = [square(2.0, 4.0, 2.0), points([(5.0, 3.0), (8.0, 5.0), (5.0, 7.0)])]
+    segments = [points([(14.0, 5.0), (18.0, 5.0)])]
+    checkTriangulation(outer, holes, segments)
+
+
+def test_constrained_segment_through_hole_level():
+    # A segment whose rightmost point is level with a hole vertex to its right
+    outer = square(0.0, 0.0, 10.0)
+    holes = [points([(6.0, 4.0), (8.0, 5.0), (6.0, 6.0)])]
+    segments = [points([(2.0, 5.0), (4.0, 5.0)])]
+    checkTriangulation(outer, holes, segments)